@@ -1,35 +1,81 @@
 """Agent pipeline for calorie tracking."""
 
+import asyncio
+import contextvars
 import json
-from typing import TypedDict, Optional
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, NamedTuple, TypedDict, Optional
 import sys
 from pathlib import Path
 
-# Load common foods
-DATA_DIR = Path(__file__).parent / "data"
-COMMON_FOODS = {}
-try:
-    with open(DATA_DIR / "common_foods.json", "r") as f:
-        COMMON_FOODS = json.load(f)
-except Exception as e:
-    print(f"Warning: Could not load common_foods.json: {e}")
+# NotRequired is in typing from Python 3.11; the README supports 3.10
+from typing_extensions import NotRequired
 
 # Determine if we are running as a package or a script
 if __package__:
+    from . import calorie_engine, config, db, fastpath, foods, metrics
+    from .food_index import FoodIndex
+    from .history import HistoryManager, HistoryUsage
     from .search import search_nutrition
+    from .singleflight import group as flight_group
+    from .llm import scheduler
     from .routers.llm import get_connector
 else:
     # When running as a script, we need to ensure we can import 'search' and 'routers'
     # We assume the script is run from the 'backend' directory or root
     try:
+        import calorie_engine
+        import config
+        import db
+        import fastpath
+        import foods
+        import metrics
+        from food_index import FoodIndex
+        from history import HistoryManager, HistoryUsage
         from search import search_nutrition
+        from singleflight import group as flight_group
+        from llm import scheduler
         from routers.llm import get_connector
     except ImportError:
         # Fallback if running from root and backend is not in path directly as top level
         # This handles 'python backend/agent.py' if the CWD is root
+        from backend import calorie_engine, config, db, fastpath, foods, metrics
+        from backend.food_index import FoodIndex
+        from backend.history import HistoryManager, HistoryUsage
         from backend.search import search_nutrition
+        from backend.singleflight import group as flight_group
+        from backend.llm import scheduler
         from backend.routers.llm import get_connector
 
+# Identical searches and extractions running at the same time are made once
+_searches = flight_group("search")
+_extractions = flight_group("extraction")
+
+# LLM calls that wait behind the calls a user is waiting on (intent, replies, questions)
+_BACKGROUND_PURPOSES = {"extract", "extract_batch"}
+
+# Shared by every message, so threads are reused and bounded however many requests run at once
+_item_pool = ThreadPoolExecutor(max_workers=max(1, config.AGENT_ITEM_THREADS), thread_name_prefix="agent-item")
+
+_foods_lock = threading.Lock()
+_foods: Optional[tuple[foods.FoodTable, FoodIndex]] = None
+
+
+def load_foods() -> tuple[foods.FoodTable, FoodIndex]:
+    """Return the food table and its index, loading them on first use.
+
+    The index is built once so lookups stay fast however large the table grows.
+    """
+    global _foods
+    if _foods is None:
+        with _foods_lock:
+            if _foods is None:
+                table = foods.load_food_table()
+                _foods = (table, FoodIndex(table.keys()))
+    return _foods
+
 # Define the structure of the final output
 class Ingredient(TypedDict):
     name: str
@@ -52,20 +98,10 @@ class MealPlan(TypedDict):
 class AgentResponse(TypedDict):
     text: str
     draft_entry: Optional[MealPlan]
+    # How the conversation history was fitted into the intent prompt
+    usage: NotRequired[dict]
 
-class Agent:
-    def __init__(self, provider="local", base_url=None, model=None):
-        self.connector = get_connector(provider, base_url, model)
-
-    def process_message(self, history: list[dict]) -> AgentResponse:
-        """
-        Process the user's message history and determine the next step.
-        """
-        # Construct the context from history
-        # We need to pass the conversation history to the analysis prompt
-        # so the LLM can resolve references (e.g., "It was fried" refers to "Eggs" from prev turn).
-
-        system_instruction = """You are a calorie tracking assistant. Your goal is to log meals accurately.
+INTENT_INSTRUCTION = """You are a calorie tracking assistant. Your goal is to log meals accurately.
 Analyze the user's latest input in the context of the conversation.
 - If the user provides a food item but details are missing (e.g. quantity, preparation method), output {"action": "CLARIFY", "question": "..."}.
 - If the user provides specific food items:
@@ -75,40 +111,290 @@ Analyze the user's latest input in the context of the conversation.
 
 Output ONLY raw JSON. Do not use Markdown blocks."""
 
-        # Construct full prompt with history
-        # We assume 'history' contains {"role": "user"|"assistant", "content": "..."}
-        messages = [{"role": "system", "content": system_instruction}]
 
-        # Append history (skip system messages if any, though usually history is user/assistant)
-        # We might limit history length if it gets too long, but for now take all.
-        for msg in history:
-            messages.append({"role": msg["role"], "content": msg["content"]})
+def _parse_json(text: str):
+    """Parse a JSON object from an LLM reply, tolerating Markdown fences and chatter."""
+    # Try to clean the response in case LLM adds backticks
+    text = text.replace("```json", "").replace("```", "").strip()
+    # Find the first { and last }
+    start = text.find("{")
+    end = text.rfind("}") + 1
+    if start != -1 and end != -1:
+        text = text[start:end]
+    return json.loads(text)
+
+
+def _parse_json_array(text: str) -> list:
+    """Parse a JSON array from an LLM reply, like `_parse_json` does for objects."""
+    text = text.replace("```json", "").replace("```", "").strip()
+    start = text.find("[")
+    end = text.rfind("]") + 1
+    if start != -1 and end != 0:
+        text = text[start:end]
+    data = json.loads(text)
+    if not isinstance(data, list):
+        raise ValueError("expected a JSON array")
+    return data
+
+
+def _valid_ingredient(data) -> Optional[Ingredient]:
+    """Return `data` as an Ingredient if it has every field with a usable type, else None."""
+    if not isinstance(data, dict):
+        return None
+    ingredient = {}
+    for field, kind in Ingredient.__annotations__.items():
+        value = data.get(field)
+        if kind is str:
+            if not isinstance(value, str):
+                return None
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            return None
+        ingredient[field] = value
+    return ingredient
+
+
+class _Extraction(NamedTuple):
+    """An item that needs the LLM, with the context to extract its nutrition from."""
+    item: str
+    source: str  # "database" or "search"; part of the extraction cache key
+    source_label: str
+    context_text: str
+
+
+class ReplyStreamer:
+    """
+    Incrementally extract the "reply" or "question" string from a streamed JSON plan.
+
+    Fed the raw chunks of the intent response, it returns the newly decoded
+    part of that string value so it can be shown while the model is still
+    generating. Other fields (such as LOOKUP items) produce no output.
+    """
+
+    _START = re.compile(r'"(?:reply|question)"\s*:\s*"')
+    _ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos: Optional[int] = None  # Index of the next undecoded character of the value
+        self._done = False
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        if self._done:
+            return ""
+        if self._pos is None:
+            match = self._START.search(self._buffer)
+            if not match:
+                return ""
+            self._pos = match.end()
+
+        out = []
+        buf, pos = self._buffer, self._pos
+        while pos < len(buf):
+            char = buf[pos]
+            if char == '"':
+                self._done = True
+                break
+            if char != "\\":
+                out.append(char)
+                pos += 1
+                continue
+            # Escape sequence: wait for the rest of it if it is split across chunks
+            if pos + 1 >= len(buf):
+                break
+            if buf[pos + 1] == "u":
+                if pos + 6 > len(buf):
+                    break
+                try:
+                    out.append(chr(int(buf[pos + 2:pos + 6], 16)))
+                except ValueError:
+                    pass
+                pos += 6
+            else:
+                out.append(self._ESCAPES.get(buf[pos + 1], buf[pos + 1]))
+                pos += 2
+        self._pos = pos
+        return "".join(out)
+
+
+class Agent:
+    def __init__(self, provider="local", base_url=None, model=None, max_workers=None):
+        self.connector = get_connector(provider, base_url, model)
+        # Admission control shared by every agent and proxy call using the same backend
+        self.slots = scheduler.for_connector(self.connector)
+        # Number of items resolved in parallel; 1 keeps the old sequential behaviour
+        self.max_workers = max(1, max_workers or config.AGENT_MAX_WORKERS)
+        # Extractions are cached per model, so identify the one behind the connector
+        self.model_name = getattr(self.connector, "model", None) or type(self.connector).__name__
+        self.history = HistoryManager(config.HISTORY_TOKEN_BUDGET, config.HISTORY_KEEP_LAST,
+                                      config.HISTORY_COMPACTION)
 
+    def process_message(self, history: list[dict]) -> AgentResponse:
+        """
+        Process the user's message history and determine the next step.
+        """
+        plan = self._fast_plan(history)
+        if plan is not None:
+            return self._respond(plan)
+        messages, usage = self._intent_messages(history)
+        return {**self._process_intent(messages), "usage": usage._asdict()}
+
+    def _process_intent(self, messages: list[dict]) -> AgentResponse:
+        response_text = None
+        try:
+            with metrics.span("agent_stage", "intent", stage="intent"):
+                response_text = self._chat(messages, "intent")
+                plan = _parse_json(response_text)
+        except scheduler.Overloaded:
+            # Shed load to the caller rather than answering as if the model failed
+            raise
+        except Exception as e:
+            return self._intent_error(e, response_text)
+        return self._respond(plan)
+
+    def _respond(self, plan: dict) -> AgentResponse:
+        """Answer a decided plan: reply directly, or resolve its items into a draft."""
+        reply = self._reply_for_plan(plan)
+        if reply is not None:
+            return reply
+
+        with metrics.span("agent_stage", "items", stage="items"):
+            results = self._process_items(plan["action"], plan.get("items", []))
+        return self._draft_response(results)
+
+    async def aprocess_message(self, history: list[dict]) -> AgentResponse:
+        """Async variant of `process_message` for use inside the event loop."""
+        plan = self._fast_plan(history)
+        if plan is not None:
+            return await self._arespond(plan)
+        messages, usage = self._intent_messages(history)
+        return {**await self._aprocess_intent(messages), "usage": usage._asdict()}
+
+    async def _aprocess_intent(self, messages: list[dict]) -> AgentResponse:
         response_text = None
         try:
-            response_text = self.connector.chat(messages)
-            # Try to clean the response in case LLM adds backticks
-            response_text = response_text.replace("```json", "").replace("```", "").strip()
-            # Find the first { and last }
-            start = response_text.find("{")
-            end = response_text.rfind("}") + 1
-            if start != -1 and end != -1:
-                response_text = response_text[start:end]
-
-            plan = json.loads(response_text)
+            with metrics.span("agent_stage", "intent", stage="intent"):
+                response_text = await self._achat(messages, "intent")
+                plan = _parse_json(response_text)
+        except scheduler.Overloaded:
+            raise
         except Exception as e:
-            # Fallback for parsing errors
-            print(f"Agent JSON Parse/Chat Error: {e}")
-            if response_text:
-                print(f"Response text was: {response_text}")
+            return self._intent_error(e, response_text)
+        return await self._arespond(plan)
 
-            # Check for connection error to provide better message
-            str_e = str(e)
-            if "Connection refused" in str_e or "Max retries exceeded" in str_e:
-                return {"text": "I cannot connect to the AI service. Please ensure Ollama is running.", "draft_entry": None}
+    async def _arespond(self, plan: dict) -> AgentResponse:
+        reply = self._reply_for_plan(plan)
+        if reply is not None:
+            return reply
 
-            return {"text": "I'm having trouble understanding. Could you please specify what you ate?", "draft_entry": None}
+        with metrics.span("agent_stage", "items", stage="items"):
+            results = await self._aprocess_items(plan["action"], plan.get("items", []))
+        return self._draft_response(results)
 
+    async def astream_message(self, history: list[dict]) -> AsyncIterator[dict]:
+        """
+        Process the message history like `aprocess_message`, yielding progress events.
+
+        Events are dicts with "event" and "data" keys:
+        - token: a chunk of a CHITCHAT reply or CLARIFY question as it is generated
+        - intent: the decided action and items
+        - item_lookup: where an item's nutrition context came from
+        - item_extracted: an item's ingredient (or None if it failed)
+        - draft: the meal draft, once all items are resolved
+        - done: the final AgentResponse, with history usage; always the last event
+        """
+        plan = self._fast_plan(history)
+        if plan is not None:
+            async for event in self._astream_plan(plan):
+                yield event
+            return
+        messages, usage = self._intent_messages(history)
+        async for event in self._astream_intent(messages):
+            if event["event"] == "done":
+                event["data"] = {**event["data"], "usage": usage._asdict()}
+            yield event
+
+    async def _astream_intent(self, messages: list[dict]) -> AsyncIterator[dict]:
+        response_text = ""
+        streamer = ReplyStreamer()
+        try:
+            async for chunk in self._achat_stream(messages, "intent"):
+                response_text += chunk
+                text = streamer.feed(chunk)
+                if text:
+                    yield {"event": "token", "data": {"text": text}}
+            plan = _parse_json(response_text)
+        except scheduler.Overloaded:
+            raise
+        except Exception as e:
+            yield {"event": "done", "data": self._intent_error(e, response_text or None)}
+            return
+        async for event in self._astream_plan(plan):
+            yield event
+
+    async def _astream_plan(self, plan: dict) -> AsyncIterator[dict]:
+        yield {"event": "intent", "data": {"action": plan.get("action"), "items": plan.get("items", [])}}
+        reply = self._reply_for_plan(plan)
+        if reply is not None:
+            yield {"event": "done", "data": reply}
+            return
+
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def run() -> list[Optional[Ingredient]]:
+            try:
+                with metrics.span("agent_stage", "items", stage="items"):
+                    return await self._aprocess_items(plan["action"], plan.get("items", []), events.put_nowait)
+            finally:
+                events.put_nowait(None)
+
+        task = asyncio.create_task(run())
+        try:
+            while (event := await events.get()) is not None:
+                yield event
+            response = self._draft_response(await task)
+        finally:
+            # Client went away mid-stream: stop the remaining item work
+            task.cancel()
+
+        if response["draft_entry"] is not None:
+            yield {"event": "draft", "data": response["draft_entry"]}
+        yield {"event": "done", "data": response}
+
+    def _fast_plan(self, history: list[dict]) -> Optional[dict]:
+        """Plan simple messages (greetings, exact food-table items) without the intent LLM call."""
+        if not config.FAST_PATH:
+            return None
+        last = history[-1] if history else None
+        plan = fastpath.plan_for(last["content"], self._lookup) if last and last["role"] == "user" else None
+        fastpath.record(plan is not None)
+        return plan
+
+    def _intent_messages(self, history: list[dict]) -> tuple[list[dict], HistoryUsage]:
+        """Build the intent-classification prompt from the conversation history."""
+        # We need to pass the conversation history to the analysis prompt
+        # so the LLM can resolve references (e.g., "It was fried" refers to "Eggs" from prev turn).
+        # We assume 'history' contains {"role": "user"|"assistant", "content": "..."}
+        # Only recent turns go in verbatim so the prompt stays within the token budget.
+        return self.history.build(INTENT_INSTRUCTION, history)
+
+    @staticmethod
+    def _intent_error(e: Exception, response_text: Optional[str]) -> AgentResponse:
+        """Turn a failed intent call or unparsable plan into a user-facing reply."""
+        print(f"Agent JSON Parse/Chat Error: {e}")
+        if response_text:
+            print(f"Response text was: {response_text}")
+
+        # Check for connection error to provide better message
+        str_e = str(e)
+        if "Connection refused" in str_e or "Max retries exceeded" in str_e:
+            return {"text": "I cannot connect to the AI service. Please ensure Ollama is running.", "draft_entry": None}
+
+        return {"text": "I'm having trouble understanding. Could you please specify what you ate?", "draft_entry": None}
+
+    @staticmethod
+    def _reply_for_plan(plan: dict) -> Optional[AgentResponse]:
+        """Return the direct reply for non-food plans, or None when items must be resolved."""
         action = plan.get("action")
 
         if action == "CHITCHAT":
@@ -118,48 +404,333 @@ Output ONLY raw JSON. Do not use Markdown blocks."""
             return {"text": plan.get("question", "Could you provide more details?"), "draft_entry": None}
 
         if action == "SEARCH" or action == "LOOKUP":
-            items = plan.get("items", [])
-            ingredients_data = []
-
-            for item in items:
-                # 1. Determine Context (Lookup or Search)
-                context_text = ""
-                source_label = ""
-
-                # Check DB first if action is LOOKUP or as fallback?
-                # We prioritize the DB if action is LOOKUP, but also check it if SEARCH?
-                # The user prompt says LOOKUP for common foods.
-
-                found_in_db = False
-                if action == "LOOKUP":
-                    # Try to find in DB
-                    key = item.lower().strip()
-                    # exact match
-                    val = COMMON_FOODS.get(key)
-                    # fuzzy match attempt
-                    if not val:
-                        # naive fuzzy: check if key is substring of any db key or vice versa
-                        # Sort keys by length descending to match longest key first (e.g. "sweet potato" before "potato")
-                        sorted_keys = sorted(COMMON_FOODS.keys(), key=len, reverse=True)
-                        for db_k in sorted_keys:
-                            if db_k in key or key in db_k:
-                                val = COMMON_FOODS[db_k]
-                                break
-
-                    if val:
-                        context_text = f"Database Entry: {val}"
-                        source_label = "database"
-                        found_in_db = True
-
-                if not found_in_db:
-                    # Fallback to search (or if action was SEARCH)
-                    snippets = search_nutrition(item)
-                    context_text = "Search Results:\n" + "\n".join(snippets)
-                    source_label = "search results"
-
-                # 2. Extract Data using LLM
-                extract_prompt = [
-                    {"role": "system", "content": f"""You are a nutritionist.
+            return None
+
+        return {"text": "I'm not sure how to help with that.", "draft_entry": None}
+
+    @staticmethod
+    def _draft_response(results: list[Optional[Ingredient]]) -> AgentResponse:
+        """Synthesize the final meal draft from the per-item results."""
+        ingredients_data = [data for data in results if data is not None]
+        if not ingredients_data:
+            return {"text": "I couldn't find nutritional info for that. Could you try again?", "draft_entry": None}
+
+        totals = calorie_engine.totals({
+            field: [i[field] for i in ingredients_data] for field in ("calories", "protein", "carbs", "fat", "sugar")
+        })
+
+        meal_name = ", ".join([i['name'] for i in ingredients_data])
+
+        draft = {
+            "name": meal_name,
+            "ingredients": ingredients_data,
+            "total_calories": int(totals["calories"]),
+            "total_protein": round(totals["protein"], 1),
+            "total_carbs": round(totals["carbs"], 1),
+            "total_fat": round(totals["fat"], 1),
+            "total_sugar": round(totals["sugar"], 1)
+        }
+
+        return {
+            "text": f"I've calculated the nutrition for {meal_name}. Please confirm the details below.",
+            "draft_entry": draft
+        }
+
+    def _process_items(self, action: str, items: list[str]) -> list[Optional[Ingredient]]:
+        """
+        Resolve every item, in parallel when more than one worker is configured.
+        Results keep the order of `items`; failed items are returned as None.
+
+        In batch extraction mode, the items that need the LLM share a single
+        extraction call; only those missing or malformed in its answer are
+        extracted again one by one.
+        """
+        if config.EXTRACTION_MODE != "batch":
+            return self._map(lambda item: self._process_item(action, item), items)
+
+        prepared = self._map(lambda item: self._prepare_item(action, item), items)
+        results = [result for result, _ in prepared]
+        pending = [i for i, (_, request) in enumerate(prepared) if request is not None]
+        if len(pending) > 1:
+            for i, data in zip(pending, self._extract_batch([prepared[i][1] for i in pending])):
+                results[i] = data
+            pending = [i for i in pending if results[i] is None]
+        for i, data in zip(pending, self._map(lambda i: self._extract(prepared[i][1]), pending)):
+            results[i] = data
+        return results
+
+    def _map(self, fn, values: list) -> list:
+        """Apply `fn` to every value on up to `max_workers` threads of the shared pool, keeping the order."""
+        workers = min(self.max_workers, len(values))
+        if workers <= 1:
+            return [fn(value) for value in values]
+        limit = threading.Semaphore(workers)
+
+        def run(value):
+            try:
+                return fn(value)
+            finally:
+                limit.release()
+
+        futures = []
+        for value in values:
+            limit.acquire()
+            # Each call runs in a copy of the caller's context so its timing spans reach the request
+            futures.append(_item_pool.submit(contextvars.copy_context().run, run, value))
+        return [future.result() for future in futures]
+
+    async def _aprocess_items(self, action: str, items: list[str], emit=None) -> list[Optional[Ingredient]]:
+        """Async counterpart of `_process_items`, bounded by the same worker count.
+
+        `emit`, if given, is called with progress events for each item.
+        """
+        limit = asyncio.Semaphore(self.max_workers)
+
+        def item_events(index: int):
+            def item_event(event: str, **info) -> None:
+                if emit:
+                    emit({"event": event, "data": {"index": index, "item": items[index], **info}})
+            return item_event
+
+        async def prepare(index: int) -> tuple[Optional[Ingredient], Optional[_Extraction]]:
+            async with limit:
+                return await self._aprepare_item(action, items[index], item_events(index))
+
+        async def extract(index: int, request: _Extraction) -> Optional[Ingredient]:
+            async with limit:
+                data = await self._aextract(request)
+            item_events(index)("item_extracted", ingredient=data)
+            return data
+
+        if config.EXTRACTION_MODE != "batch":
+            async def process(index: int) -> Optional[Ingredient]:
+                result, request = await prepare(index)
+                if request is not None:
+                    return await extract(index, request)
+                item_events(index)("item_extracted", ingredient=result)
+                return result
+
+            return list(await asyncio.gather(*(process(i) for i in range(len(items)))))
+
+        prepared = await asyncio.gather(*(prepare(i) for i in range(len(items))))
+        results = [result for result, _ in prepared]
+        pending = [i for i, (_, request) in enumerate(prepared) if request is not None]
+        for i, result in enumerate(results):
+            if prepared[i][1] is None:
+                item_events(i)("item_extracted", ingredient=result)
+        if len(pending) > 1:
+            for i, data in zip(pending, await self._aextract_batch([prepared[i][1] for i in pending])):
+                results[i] = data
+                if data is not None:
+                    item_events(i)("item_extracted", ingredient=data)
+            pending = [i for i in pending if results[i] is None]
+        for i, data in zip(pending, await asyncio.gather(*(extract(i, prepared[i][1]) for i in pending))):
+            results[i] = data
+        return results
+
+    def _process_item(self, action: str, item: str) -> Optional[Ingredient]:
+        """Look up or search a single item and extract its nutrition with the LLM."""
+        result, request = self._prepare_item(action, item)
+        return result if request is None else self._extract(request)
+
+    def _prepare_item(self, action: str, item: str) -> tuple[Optional[Ingredient], Optional[_Extraction]]:
+        """Resolve an item without the LLM where possible, else return what its extraction needs."""
+        db_entry = self._lookup(item) if action == "LOOKUP" else None
+        if db_entry:
+            # Exact database hits are computed directly, without an LLM call
+            ingredient = foods.portion(item, db_entry)
+            if ingredient is not None:
+                return ingredient, None
+        source = "database" if db_entry else "search"
+        cached = db.get_cached_extraction(item, source, self.model_name)
+        # Entries cached before results were validated may be malformed; those are extracted again
+        ingredient = _valid_ingredient({**cached, "name": item}) if cached is not None else None
+        if ingredient is not None:
+            return ingredient, None
+
+        source_label, context_text = self._item_context(item, db_entry)
+        return None, _Extraction(item, source, source_label, context_text)
+
+    async def _aprepare_item(self, action: str, item: str, emit) -> tuple[Optional[Ingredient], Optional[_Extraction]]:
+        db_entry = self._lookup(item) if action == "LOOKUP" else None
+        if db_entry:
+            ingredient = foods.portion(item, db_entry)
+            if ingredient is not None:
+                emit("item_lookup", source="table", match=db_entry.key)
+                return ingredient, None
+        source = "database" if db_entry else "search"
+        cached = await asyncio.to_thread(db.get_cached_extraction, item, source, self.model_name)
+        ingredient = _valid_ingredient({**cached, "name": item}) if cached is not None else None
+        if ingredient is not None:
+            emit("item_lookup", source="cache")
+            return ingredient, None
+
+        # Search is blocking, so resolve the context off the loop
+        source_label, context_text = await asyncio.to_thread(self._item_context, item, db_entry)
+        emit("item_lookup", source=source, match=db_entry.key if db_entry else None)
+        return None, _Extraction(item, source, source_label, context_text)
+
+    def _extract(self, request: _Extraction) -> Optional[Ingredient]:
+        """Extract one item, sharing the LLM call with concurrent requests for the same item."""
+        data = _extractions.do(self._extraction_key(request), lambda: self._extract_now(request))
+        return None if data is None else {**data, "name": request.item}
+
+    async def _aextract(self, request: _Extraction) -> Optional[Ingredient]:
+        data = await _extractions.ado(self._extraction_key(request), lambda: self._aextract_now(request))
+        return None if data is None else {**data, "name": request.item}
+
+    def _extraction_key(self, request: _Extraction) -> tuple[str, str, str]:
+        # Same key as the extraction cache, so coalesced calls are the ones it would store once
+        return db.normalize_item(request.item), request.source, self.model_name
+
+    def _extract_now(self, request: _Extraction) -> Optional[Ingredient]:
+        try:
+            data = _parse_json(self._chat(self._extract_messages(request.item, request.source_label, request.context_text), "extract"))
+        except scheduler.Overloaded:
+            raise
+        except Exception as e:
+            print(f"Extraction Error for {request.item}: {e}")
+            return None
+        ingredient = _valid_ingredient(data)
+        if ingredient is None:
+            # Not cached, so the next request for this item asks the LLM again
+            print(f"Extraction Error for {request.item}: malformed result {data!r}")
+            return None
+        db.put_cached_extraction(request.item, request.source, self.model_name, ingredient)
+        return ingredient
+
+    async def _aextract_now(self, request: _Extraction) -> Optional[Ingredient]:
+        try:
+            data = _parse_json(await self._achat(self._extract_messages(request.item, request.source_label, request.context_text), "extract"))
+        except scheduler.Overloaded:
+            raise
+        except Exception as e:
+            print(f"Extraction Error for {request.item}: {e}")
+            return None
+        ingredient = _valid_ingredient(data)
+        if ingredient is None:
+            print(f"Extraction Error for {request.item}: malformed result {data!r}")
+            return None
+        await asyncio.to_thread(db.put_cached_extraction, request.item, request.source, self.model_name, ingredient)
+        return ingredient
+
+    def _extract_batch(self, requests: list[_Extraction]) -> list[Optional[Ingredient]]:
+        """Extract several items with one LLM call; malformed results come back as None."""
+        try:
+            answer = _parse_json_array(self._chat(self._batch_extract_messages(requests), "extract_batch"))
+        except scheduler.Overloaded:
+            raise
+        except Exception as e:
+            print(f"Batch Extraction Error: {e}")
+            return [None] * len(requests)
+        return self._accept_batch(requests, answer)
+
+    async def _aextract_batch(self, requests: list[_Extraction]) -> list[Optional[Ingredient]]:
+        try:
+            answer = _parse_json_array(await self._achat(self._batch_extract_messages(requests), "extract_batch"))
+        except scheduler.Overloaded:
+            raise
+        except Exception as e:
+            print(f"Batch Extraction Error: {e}")
+            return [None] * len(requests)
+        return await asyncio.to_thread(self._accept_batch, requests, answer)
+
+    def _accept_batch(self, requests: list[_Extraction], answer: list) -> list[Optional[Ingredient]]:
+        """Validate a batch answer item by item (by position) and cache the good extractions."""
+        results = []
+        for i, request in enumerate(requests):
+            ingredient = _valid_ingredient(answer[i] if i < len(answer) else None)
+            if ingredient is None:
+                print(f"Batch Extraction: malformed result for {request.item}, retrying alone")
+            else:
+                ingredient["name"] = request.item
+                db.put_cached_extraction(request.item, request.source, self.model_name, ingredient)
+            results.append(ingredient)
+        return results
+
+    def _chat(self, messages: list[dict], purpose: str) -> str:
+        with self.slots.slot(self._priority(purpose)), metrics.llm_call(self.connector, purpose):
+            return self.connector.chat(messages)
+
+    async def _achat_stream(self, messages: list[dict], purpose: str) -> AsyncIterator[str]:
+        achat_stream = getattr(self.connector, "achat_stream", None)
+        if achat_stream is None:
+            yield await self._achat(messages, purpose)
+            return
+        async with self.slots.aslot(self._priority(purpose)):
+            with metrics.llm_call(self.connector, purpose):
+                async for chunk in achat_stream(messages):
+                    yield chunk
+
+    async def _achat(self, messages: list[dict], purpose: str) -> str:
+        achat = getattr(self.connector, "achat", None)
+        async with self.slots.aslot(self._priority(purpose)):
+            with metrics.llm_call(self.connector, purpose):
+                if achat is None:
+                    # Connectors that only implement the blocking API
+                    return await asyncio.to_thread(self.connector.chat, messages)
+                return await achat(messages)
+
+    @staticmethod
+    def _priority(purpose: str) -> str:
+        return scheduler.BACKGROUND if purpose in _BACKGROUND_PURPOSES else scheduler.INTERACTIVE
+
+    @staticmethod
+    def _lookup(item: str) -> Optional[foods.Food]:
+        """Return the food table entry for an item, if any."""
+        # Exact match first, then the longest name that occurs in the item or contains it
+        # (e.g. "sweet potato" before "potato")
+        table, index = load_foods()
+        match = index.best(item)
+        return table[match] if match else None
+
+    @staticmethod
+    def _item_context(item: str, db_entry: Optional[foods.Food]) -> tuple[str, str]:
+        """Return the (source label, context text) used to extract nutrition for an item."""
+        # Database entries are used for LOOKUP hits; everything else falls back to search
+        if db_entry:
+            return "database", f"Database Entry: {db_entry.describe()}"
+
+        # Concurrent searches for the same item share one request
+        snippets = _searches.do(db.normalize_item(item), lambda: search_nutrition(item))
+        return "search results", "Search Results:\n" + "\n".join(snippets)
+
+    @staticmethod
+    def _batch_extract_messages(requests: list[_Extraction]) -> list[dict]:
+        """Build one nutrition-extraction prompt covering several items."""
+        sections = "\n\n".join(
+            f"Item {n}: '{request.item}'\nBased on the following {request.source_label}:\n{request.context_text}"
+            for n, request in enumerate(requests, 1)
+        )
+        return [
+            {"role": "system", "content": f"""You are a nutritionist.
+Extract the nutritional info for each of the following {len(requests)} items.
+
+{sections}
+
+Estimate the values for the specific amount mentioned in each item.
+If the amount is not clear in the text, use a standard serving size and note it.
+Output valid JSON only: an array with exactly one object per item, in the same order:
+[
+  {{
+    "name": "item as given",
+    "amount": "detected amount or serving size",
+    "calories": int,
+    "protein": float (grams),
+    "carbs": float (grams),
+    "fat": float (grams),
+    "sugar": float (grams)
+  }}
+]
+"""},
+            {"role": "user", "content": "Extract nutrition."}
+        ]
+
+    @staticmethod
+    def _extract_messages(item: str, source_label: str, context_text: str) -> list[dict]:
+        """Build the nutrition-extraction prompt for a single item."""
+        return [
+            {"role": "system", "content": f"""You are a nutritionist.
 Based on the following {source_label}, extract the nutritional info for '{item}'.
 {context_text}
 
@@ -176,50 +747,8 @@ Output valid JSON only:
   "sugar": float (grams)
 }}
 """},
-                    {"role": "user", "content": "Extract nutrition."}
-                ]
-                try:
-                    extract_res = self.connector.chat(extract_prompt)
-                    extract_res = extract_res.replace("```json", "").replace("```", "").strip()
-                    start = extract_res.find("{")
-                    end = extract_res.rfind("}") + 1
-                    if start != -1 and end != -1:
-                        extract_res = extract_res[start:end]
-
-                    data = json.loads(extract_res)
-                    ingredients_data.append(data)
-                except Exception as e:
-                    print(f"Extraction Error for {item}: {e}")
-                    continue
-
-            # 3. Synthesize Final Entry
-            if not ingredients_data:
-                return {"text": "I couldn't find nutritional info for that. Could you try again?", "draft_entry": None}
-
-            total_cal = sum(i['calories'] for i in ingredients_data)
-            total_pro = sum(i['protein'] for i in ingredients_data)
-            total_carb = sum(i['carbs'] for i in ingredients_data)
-            total_fat = sum(i['fat'] for i in ingredients_data)
-            total_sugar = sum(i['sugar'] for i in ingredients_data)
-
-            meal_name = ", ".join([i['name'] for i in ingredients_data])
-
-            draft = {
-                "name": meal_name,
-                "ingredients": ingredients_data,
-                "total_calories": int(total_cal),
-                "total_protein": round(total_pro, 1),
-                "total_carbs": round(total_carb, 1),
-                "total_fat": round(total_fat, 1),
-                "total_sugar": round(total_sugar, 1)
-            }
-
-            return {
-                "text": f"I've calculated the nutrition for {meal_name}. Please confirm the details below.",
-                "draft_entry": draft
-            }
-
-        return {"text": "I'm not sure how to help with that.", "draft_entry": None}
+            {"role": "user", "content": "Extract nutrition."}
+        ]
 
 if __name__ == "__main__":
     # Test script
@@ -1,8 +1,14 @@
 """Deterministic calorie calculations."""
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
 from dataclasses import dataclass
 
+# Energy per gram of each macronutrient (Atwater factors)
+KCAL_PER_GRAM = {"protein": 4, "carbs": 4, "fat": 9}
 
-@dataclass
+
+@dataclass(slots=True)
 class Nutrition:
     protein: float
     carbs: float
@@ -12,3 +18,86 @@ class Nutrition:
 def calories(nutrition: Nutrition) -> int:
     """Return caloric value based on macronutrients."""
     return int(nutrition.protein * 4 + nutrition.carbs * 4 + nutrition.fat * 9)
+
+
+def scaled_ingredient(name: str, amount: str, factor: float, kcal: float,
+                      protein: float, carbs: float, fat: float, sugar: float) -> dict:
+    """
+    Scale per-serving nutrition by `factor` into an ingredient dict.
+
+    When the source has no energy value the macronutrient formula is used.
+    """
+    if not kcal:
+        kcal = calories(Nutrition(protein=protein, carbs=carbs, fat=fat))
+    return {
+        "name": name,
+        "amount": amount,
+        "calories": int(round(kcal * factor)),
+        "protein": round(protein * factor, 1),
+        "carbs": round(carbs * factor, 1),
+        "fat": round(fat * factor, 1),
+        "sugar": round(sugar * factor, 1),
+    }
+
+
+def macro_split(protein: float, carbs: float, fat: float) -> dict[str, float]:
+    """Share of macronutrient energy from protein, carbs and fat (all 0 without any)."""
+    energy = {"protein": protein * 4, "carbs": carbs * 4, "fat": fat * 9}
+    total = sum(energy.values())
+    return {name: value / total if total > 0 else 0.0 for name, value in energy.items()}
+
+
+# --- Batch API ---
+#
+# Columns are equal-length sequences with one value per row: `array('d')`
+# (as `foods.FoodTable.column` returns), lists, or NumPy arrays. When every
+# input is a NumPy array the work is vectorized and NumPy arrays come back;
+# otherwise results are stdlib arrays.
+
+def _numpy(*columns):
+    """Return the NumPy module when every given column is a NumPy array, else None."""
+    # Columns can only be NumPy arrays once the caller has imported NumPy, so it is never imported here
+    np = sys.modules.get("numpy")
+    given = [c for c in columns if c is not None]
+    if np is not None and given and all(isinstance(c, np.ndarray) for c in given):
+        return np
+    return None
+
+
+def batch_calories(protein: Sequence[float], carbs: Sequence[float], fat: Sequence[float],
+                   kcal: Sequence[float] | None = None) -> Sequence[int]:
+    """
+    Energy of many rows at once, truncated to whole kcal like `calories`.
+
+    Rows with a non-zero `kcal` keep it; the others use the macronutrient formula.
+    """
+    np = _numpy(protein, carbs, fat, kcal)
+    if np is not None:
+        energy = protein * 4.0 + carbs * 4.0 + fat * 9.0
+        if kcal is not None:
+            energy = np.where(kcal != 0, kcal, energy)
+        return np.trunc(energy).astype(np.int64)
+    if kcal is None:
+        return array("q", map(lambda p, c, f: int(p * 4 + c * 4 + f * 9), protein, carbs, fat))
+    return array("q", map(lambda k, p, c, f: int(k if k else p * 4 + c * 4 + f * 9), kcal, protein, carbs, fat))
+
+
+def totals(columns: Mapping[str, Sequence[float]]) -> dict[str, float]:
+    """Sum every column."""
+    return {name: float(column.sum()) if _numpy(column) is not None else float(sum(column))
+            for name, column in columns.items()}
+
+
+def macro_ratios(protein: Sequence[float], carbs: Sequence[float], fat: Sequence[float]) -> dict[str, Sequence[float]]:
+    """Share of each row's macronutrient energy from protein, carbs and fat (0 for rows without any)."""
+    np = _numpy(protein, carbs, fat)
+    if np is not None:
+        energy = {"protein": protein * 4.0, "carbs": carbs * 4.0, "fat": fat * 9.0}
+        total = energy["protein"] + energy["carbs"] + energy["fat"]
+        safe = np.where(total > 0, total, 1.0)
+        return {name: np.where(total > 0, value / safe, 0.0) for name, value in energy.items()}
+    ratios = {name: array("d") for name in KCAL_PER_GRAM}
+    for p, c, f in zip(protein, carbs, fat):
+        for name, ratio in macro_split(p, c, f).items():
+            ratios[name].append(ratio)
+    return ratios
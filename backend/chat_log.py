@@ -0,0 +1,109 @@
+"""Write-behind persistence of chat turns to the chat_logs table."""
+
+import queue
+import threading
+from typing import Optional
+
+from . import config, db, metrics
+
+INSERT_LOG_SQL = "INSERT INTO chat_logs (user_message, bot_response, timestamp) VALUES (?, ?, ?)"
+
+_STOP = object()
+
+
+class ChatLogWriter:
+    """
+    Queue chat turns and write them from a background thread.
+
+    Callers never touch SQLite: `record` only enqueues. The worker drains
+    whatever has accumulated (up to `batch_size` rows) into one transaction,
+    so a burst of turns costs one commit instead of one per message. When the
+    queue is full, turns are dropped and counted rather than blocking a reply.
+    """
+
+    def __init__(self, max_queue: Optional[int] = None, batch_size: Optional[int] = None):
+        self.batch_size = max(1, batch_size or config.CHAT_LOG_BATCH_SIZE)
+        self._queue: queue.Queue = queue.Queue(max_queue or config.CHAT_LOG_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._counters = {"queued": 0, "written": 0, "dropped": 0, "failed": 0, "batches": 0}
+
+    def record(self, user_message: Optional[str], bot_response: Optional[str],
+               timestamp: Optional[str] = None) -> bool:
+        """Enqueue one turn; returns False if it was dropped because the queue is full."""
+        row = (user_message, bot_response, timestamp or db.utc_timestamp())
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self._counters["dropped"] += 1
+            return False
+        with self._lock:
+            self._counters["queued"] += 1
+        return True
+
+    def flush(self) -> None:
+        """Block until every queued turn has been written (or has failed)."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write out the queue and stop the worker, e.g. on application shutdown."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            print("Chat log writer: queue still full at shutdown, pending turns are lost")
+            return
+        thread.join(timeout)
+
+    def stats(self) -> dict:
+        """Return queue depth and lifetime counters."""
+        with self._lock:
+            return {"queue_depth": self._queue.qsize(), **self._counters}
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="chat-log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            rows = [self._queue.get()]
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(row is _STOP for row in rows)
+            batch = [row for row in rows if row is not _STOP]
+            if batch:
+                self._write(batch)
+            for _ in rows:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, rows: list[tuple]) -> None:
+        try:
+            with metrics.db_operation("write_chat_logs"), db.transaction() as conn:
+                conn.executemany(INSERT_LOG_SQL, rows)
+        except Exception as e:
+            print(f"Logging error (chat log batch of {len(rows)}): {e}")
+            with self._lock:
+                self._counters["failed"] += len(rows)
+            return
+        with self._lock:
+            self._counters["written"] += len(rows)
+            self._counters["batches"] += 1
+
+
+# Process-wide writer used by the chat routes
+writer = ChatLogWriter()
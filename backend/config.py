@@ -0,0 +1,89 @@
+"""Deployment settings read from environment variables."""
+
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        print(f"Warning: invalid integer for {name}, using {default}")
+        return default
+
+
+# Maximum number of items the agent resolves in parallel (1 = sequential)
+AGENT_MAX_WORKERS = _env_int("CALORIE_AGENT_MAX_WORKERS", 4)
+# Threads shared by all messages for resolving items in parallel
+AGENT_ITEM_THREADS = _env_int("CALORIE_AGENT_ITEM_THREADS", 16)
+# How items are sent to the LLM for extraction: "per_item" (one call each) or
+# "batch" (one call for all items of a meal, retrying malformed results per item)
+EXTRACTION_MODE = os.environ.get("CALORIE_EXTRACTION_MODE", "per_item")
+# Answer greetings and exact food-table items without the intent LLM call (0 disables)
+FAST_PATH = _env_int("CALORIE_FAST_PATH", 1)
+
+# Extraction cache: entries older than the TTL are ignored (0 disables the cache)
+EXTRACTION_CACHE_TTL = _env_int("CALORIE_EXTRACTION_CACHE_TTL", 30 * 24 * 3600)
+# Least recently used entries beyond this count are evicted
+EXTRACTION_CACHE_MAX_ENTRIES = _env_int("CALORIE_EXTRACTION_CACHE_MAX_ENTRIES", 10000)
+
+# Search cache: results are fresh for the TTL, then served stale while refreshed
+SEARCH_CACHE_TTL = _env_int("CALORIE_SEARCH_CACHE_TTL", 7 * 24 * 3600)
+# Stale results older than this are refetched before answering (0 disables the cache)
+SEARCH_CACHE_MAX_STALE = _env_int("CALORIE_SEARCH_CACHE_MAX_STALE", 90 * 24 * 3600)
+# Optional JSON file of {"query": ["snippet", ...]} used instead of live web search
+SEARCH_OFFLINE_SNIPPETS = os.environ.get("CALORIE_SEARCH_OFFLINE_SNIPPETS")
+
+# SQLite: idle pooled connections kept per database file
+DB_POOL_SIZE = _env_int("CALORIE_DB_POOL_SIZE", 8)
+# SQLite page cache per connection, in KiB
+DB_CACHE_SIZE_KB = _env_int("CALORIE_DB_CACHE_SIZE_KB", 16384)
+# SQLite memory-mapped I/O window, in bytes
+DB_MMAP_SIZE = _env_int("CALORIE_DB_MMAP_SIZE", 256 * 1024 * 1024)
+
+# Rows written per transaction by bulk ingestion
+BULK_CHUNK_SIZE = _env_int("CALORIE_BULK_CHUNK_SIZE", 5000)
+# Rows fetched per round trip while streaming an export
+EXPORT_BATCH_SIZE = _env_int("CALORIE_EXPORT_BATCH_SIZE", 1000)
+# Text search ranks at most this many of the newest matches per table, bounding latency for common words
+TEXT_SEARCH_MAX_CANDIDATES = _env_int("CALORIE_TEXT_SEARCH_MAX_CANDIDATES", 2000)
+
+# Conversation history: estimated token budget for the intent prompt
+HISTORY_TOKEN_BUDGET = _env_int("CALORIE_HISTORY_TOKEN_BUDGET", 2048)
+# Most recent messages always sent verbatim
+HISTORY_KEEP_LAST = _env_int("CALORIE_HISTORY_KEEP_LAST", 6)
+# What happens to older messages: "summary" or "drop"
+HISTORY_COMPACTION = os.environ.get("CALORIE_HISTORY_COMPACTION", "summary")
+
+# LLM connectors: instances idle for longer than this are evicted from the registry
+LLM_IDLE_TTL = _env_int("CALORIE_LLM_IDLE_TTL", 600)
+# Seconds before a backend marked unhealthy is probed again
+LLM_HEALTH_RETRY = _env_int("CALORIE_LLM_HEALTH_RETRY", 30)
+# Warm up (e.g. load the model of) a connector in the background when first used (0 disables)
+LLM_WARM_UP = _env_int("CALORIE_LLM_WARM_UP", 1)
+# Calls running at once against one LLM backend (per server of an Ollama pool); further calls queue
+LLM_MAX_CONCURRENCY = _env_int("CALORIE_LLM_MAX_CONCURRENCY", 4)
+# Calls waiting per backend; beyond this requests are rejected with 429
+LLM_MAX_QUEUE = _env_int("CALORIE_LLM_MAX_QUEUE", 32)
+# Seconds a queued call waits for a slot before it is rejected
+LLM_QUEUE_TIMEOUT = _env_int("CALORIE_LLM_QUEUE_TIMEOUT", 30)
+
+# Ollama: base URL(s) used when a request names none; a comma-separated list spreads calls across backends
+OLLAMA_BASE_URLS = os.environ.get("CALORIE_OLLAMA_BASE_URLS", "http://localhost:11434")
+# Further attempts, on another backend where possible, after a connection error or 5xx
+OLLAMA_RETRIES = _env_int("CALORIE_OLLAMA_RETRIES", 2)
+# Delay before the first retry in milliseconds, doubled for each further one
+OLLAMA_RETRY_BACKOFF_MS = _env_int("CALORIE_OLLAMA_RETRY_BACKOFF_MS", 200)
+# Consecutive failures that take a backend out of rotation
+OLLAMA_BREAKER_FAILURES = _env_int("CALORIE_OLLAMA_BREAKER_FAILURES", 3)
+# Seconds before a backend taken out of rotation gets a trial call
+OLLAMA_BREAKER_COOLDOWN = _env_int("CALORIE_OLLAMA_BREAKER_COOLDOWN", 30)
+# Send a second copy of a call to another backend once it runs past this latency percentile (0 disables)
+OLLAMA_HEDGE_PERCENTILE = _env_int("CALORIE_OLLAMA_HEDGE_PERCENTILE", 0)
+
+# Chat logs: turns waiting to be written; further turns are dropped when full
+CHAT_LOG_QUEUE_SIZE = _env_int("CALORIE_CHAT_LOG_QUEUE_SIZE", 10000)
+# Most turns written in one transaction
+CHAT_LOG_BATCH_SIZE = _env_int("CALORIE_CHAT_LOG_BATCH_SIZE", 500)
+
+# Add a Server-Timing header with per-stage durations to every API response (1 enables)
+SERVER_TIMING = _env_int("CALORIE_SERVER_TIMING", 0)
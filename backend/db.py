@@ -1,26 +1,144 @@
 """SQLite persistence helpers."""
 
+import html
+import json
+import re
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Iterator, Optional
+
+from . import config, metrics
 
 DB_PATH = Path("user_data.db")
 
+# Statements kept compiled per connection; pooled connections keep them warm
+STATEMENT_CACHE_SIZE = 256
+
+
+def _pragmas() -> tuple[str, ...]:
+    return (
+        # WAL lets readers proceed during writes and avoids most "database is locked" errors
+        "PRAGMA journal_mode=WAL",
+        # Safe with WAL: only the last transactions may be lost on power failure
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA cache_size=-{config.DB_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={config.DB_MMAP_SIZE}",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA busy_timeout=5000",
+    )
+
+
+def get_conn(path: Optional[Path] = None) -> sqlite3.Connection:
+    """Return a new, configured connection to the user-side database.
 
-def get_conn() -> sqlite3.Connection:
-    """Return a connection to the user-side database."""
-    conn = sqlite3.connect(DB_PATH)
+    The caller owns the connection and must close it. Request handlers
+    should use the pooled `connection()` or the `get_db` dependency instead.
+    """
+    conn = sqlite3.connect(path or DB_PATH, cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    for pragma in _pragmas():
+        conn.execute(pragma)
     return conn
 
 
-def init_db() -> None:
-    """Create the entries table if it does not exist."""
-    conn = get_conn()
-    cur = conn.cursor()
+class ConnectionPool:
+    """Reuse connections to one database file across requests and threads.
+
+    A connection is only ever checked out by one caller at a time, so it can
+    safely move between the worker threads FastAPI runs dependencies on.
+    """
+
+    def __init__(self, path: Path, max_idle: int):
+        self.path = path
+        self.max_idle = max_idle
+        self._idle: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return get_conn(self.path)
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            # Never hand out a connection holding an open transaction (and its locks)
+            conn.rollback()
+        with self._lock:
+            if not self._closed and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+_pools: dict[Path, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool() -> ConnectionPool:
+    path = Path(DB_PATH)
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is not None:
+            return pool
+    # First use of this database in the process: bring its schema up to date
+    init_db(path)
+    with _pools_lock:
+        return _pools.setdefault(path, ConnectionPool(path, config.DB_POOL_SIZE))
 
-    # Enable support for column alterations
 
-    # Create entries table
+@contextmanager
+def connection() -> Iterator[sqlite3.Connection]:
+    """Check out a pooled connection for the duration of the block."""
+    pool = _pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+@contextmanager
+def transaction() -> Iterator[sqlite3.Connection]:
+    """Check out a pooled connection and commit (or roll back) when the block exits."""
+    with connection() as conn:
+        with conn:
+            yield conn
+
+
+def get_db() -> Iterator[sqlite3.Connection]:
+    """FastAPI dependency yielding a pooled connection."""
+    with connection() as conn:
+        yield conn
+
+
+def close_pools() -> None:
+    """Close every idle pooled connection, e.g. on shutdown."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+# --- Schema migrations ---
+#
+# Each migration runs exactly once per database, in order; PRAGMA user_version
+# records how many have been applied. Append new migrations, never edit old ones.
+
+def _migrate_base_tables(cur: sqlite3.Cursor) -> None:
     cur.execute(
         """
         CREATE TABLE IF NOT EXISTS entries (
@@ -31,12 +149,11 @@ def init_db() -> None:
             protein REAL DEFAULT 0,
             carbs REAL DEFAULT 0,
             fat REAL DEFAULT 0,
-            sugar REAL DEFAULT 0
+            sugar REAL DEFAULT 0,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
         )
         """
     )
-
-    # Create chat_logs table
     cur.execute(
         """
         CREATE TABLE IF NOT EXISTS chat_logs (
@@ -47,32 +164,458 @@ def init_db() -> None:
         )
         """
     )
+    # Databases created before versioning may predate the macro and timestamp columns
+    columns = {row[1] for row in cur.execute("PRAGMA table_info(entries)")}
+    for column in ("protein", "carbs", "fat", "sugar"):
+        if column not in columns:
+            cur.execute(f"ALTER TABLE entries ADD COLUMN {column} REAL DEFAULT 0")
+    if "created_at" not in columns:
+        # ALTER TABLE cannot add a CURRENT_TIMESTAMP default, so backfill existing rows
+        cur.execute("ALTER TABLE entries ADD COLUMN created_at TEXT")
+        cur.execute("UPDATE entries SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_entries_created_at ON entries (created_at, id)")
+
 
-    # Attempt to add columns if they don't exist (migration for existing DBs)
-    # This is a simple migration strategy for development
+def _migrate_caches(cur: sqlite3.Cursor) -> None:
+    # Cache of LLM nutrition extractions, keyed on normalized item text
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS extraction_cache (
+            item TEXT NOT NULL,
+            source TEXT NOT NULL,
+            model TEXT NOT NULL,
+            data TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (item, source, model)
+        )
+        """
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_used ON extraction_cache (last_used)"
+    )
+    # Cache of web search snippets, keyed on the normalized query
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS search_cache (
+            query TEXT PRIMARY KEY,
+            snippets TEXT NOT NULL,
+            fetched_at REAL NOT NULL
+        )
+        """
+    )
+
+
+def _migrate_daily_totals(cur: sqlite3.Cursor) -> None:
+    _create_daily_totals(cur)
+
+
+def _migrate_search_index(cur: sqlite3.Cursor) -> None:
+    _create_search_index(cur)
+
+
+MIGRATIONS = (
+    _migrate_base_tables,
+    _migrate_caches,
+    _migrate_daily_totals,
+    _migrate_search_index,
+)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def init_db(path: Optional[Path] = None) -> int:
+    """Apply pending schema migrations and return how many ran."""
+    conn = get_conn(path)
     try:
-        cur.execute("ALTER TABLE entries ADD COLUMN protein REAL DEFAULT 0")
-    except sqlite3.OperationalError:
-        pass # Column likely exists
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return 0
+        # Take the write lock first so concurrent workers migrate one at a time
+        conn.execute("BEGIN IMMEDIATE")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        cur = conn.cursor()
+        for migrate in MIGRATIONS[version:]:
+            migrate(cur)
+        cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+        return max(0, SCHEMA_VERSION - version)
+    finally:
+        conn.close()
+
+
+# --- Daily summaries ---
+
+# Day an entry counts towards (UTC); rows without a timestamp count towards today
+_ENTRY_DAY = "coalesce(date({row}.created_at), date('now'))"
+_TOTAL_COLUMNS = ("calories", "protein", "carbs", "fat", "sugar")
+
+
+def _create_daily_totals(cur: sqlite3.Cursor) -> None:
+    """Create the per-day totals table and the triggers that keep it in sync with entries."""
+    existed = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_totals'"
+    ).fetchone()
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS daily_totals (
+            day TEXT PRIMARY KEY,
+            entries INTEGER NOT NULL DEFAULT 0,
+            calories REAL NOT NULL DEFAULT 0,
+            protein REAL NOT NULL DEFAULT 0,
+            carbs REAL NOT NULL DEFAULT 0,
+            fat REAL NOT NULL DEFAULT 0,
+            sugar REAL NOT NULL DEFAULT 0
+        )
+        """
+    )
+
+    def add(row: str, sign: str) -> str:
+        values = ", ".join(f"{sign}coalesce({row}.{col}, 0)" for col in _TOTAL_COLUMNS)
+        updates = ", ".join(f"{col} = {col} + excluded.{col}" for col in _TOTAL_COLUMNS)
+        return f"""
+            INSERT INTO daily_totals (day, entries, {", ".join(_TOTAL_COLUMNS)})
+            VALUES ({_ENTRY_DAY.format(row=row)}, {sign}1, {values})
+            ON CONFLICT(day) DO UPDATE SET entries = entries + excluded.entries, {updates};
+        """
 
+    prune = "DELETE FROM daily_totals WHERE day = {day} AND entries <= 0;".format(day=_ENTRY_DAY.format(row="OLD"))
+    cur.execute(f"CREATE TRIGGER IF NOT EXISTS entries_totals_insert AFTER INSERT ON entries BEGIN {add('NEW', '')} END")
+    cur.execute(f"CREATE TRIGGER IF NOT EXISTS entries_totals_delete AFTER DELETE ON entries BEGIN {add('OLD', '-')} {prune} END")
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS entries_totals_update AFTER UPDATE ON entries "
+        f"BEGIN {add('OLD', '-')} {add('NEW', '')} {prune} END"
+    )
+    if not existed:
+        # Backfill databases created before the summary table existed
+        _rebuild_daily_totals(cur)
+
+
+def _rebuild_daily_totals(cur: sqlite3.Cursor) -> int:
+    cur.execute("DELETE FROM daily_totals")
+    sums = ", ".join(f"sum(coalesce({col}, 0))" for col in _TOTAL_COLUMNS)
+    cur.execute(
+        f"""
+        INSERT INTO daily_totals (day, entries, {", ".join(_TOTAL_COLUMNS)})
+        SELECT {_ENTRY_DAY.format(row="entries")}, count(*), {sums}
+        FROM entries GROUP BY 1
+        """
+    )
+    return cur.rowcount
+
+
+@metrics.db_operation("rebuild_daily_totals")
+def rebuild_daily_totals() -> int:
+    """Recompute every day's totals from the entries table and return the number of days."""
+    with transaction() as conn:
+        return _rebuild_daily_totals(conn.cursor())
+
+
+@metrics.db_operation("daily_totals")
+def daily_totals(start: str, end: str) -> list[dict]:
+    """Return per-day totals for days in [start, end] (ISO dates), oldest first."""
+    with connection() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT day, entries, {", ".join(_TOTAL_COLUMNS)}
+            FROM daily_totals WHERE day >= ? AND day <= ? ORDER BY day
+            """,
+            (start, end),
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def utc_timestamp(moment: Optional[datetime] = None) -> str:
+    """Format a moment (default: now) the way SQLite's CURRENT_TIMESTAMP does, in UTC."""
+    if moment is None:
+        moment = datetime.now(timezone.utc)
+    elif moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+# --- Extraction cache ---
+
+# Only refresh last_used when it is older than this, so hits rarely write
+_TOUCH_INTERVAL = 60.0
+
+_cache_lock = threading.Lock()
+_cache_counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+
+def normalize_item(text: str) -> str:
+    """Normalize free-text item descriptions so trivial variations share a cache key."""
+    text = re.sub(r"\s+", " ", text.lower()).strip()
+    return text.strip(" .,;:!?")
+
+
+def _count(counter: str, amount: int = 1) -> None:
+    with _cache_lock:
+        _cache_counters[counter] += amount
+
+
+@metrics.db_operation("get_cached_extraction")
+def get_cached_extraction(item: str, source: str, model: str) -> Optional[dict]:
+    """Return the cached extraction for an item, or None on a miss or expired entry."""
+    if config.EXTRACTION_CACHE_TTL <= 0:
+        return None
+    key = (normalize_item(item), source, model)
+    now = time.time()
+    try:
+        with transaction() as conn:
+            row = conn.execute(
+                "SELECT data, created_at, last_used FROM extraction_cache WHERE item = ? AND source = ? AND model = ?",
+                key,
+            ).fetchone()
+            if row is None or now - row["created_at"] > config.EXTRACTION_CACHE_TTL:
+                _count("misses")
+                return None
+            if now - row["last_used"] > _TOUCH_INTERVAL:
+                conn.execute(
+                    "UPDATE extraction_cache SET last_used = ? WHERE item = ? AND source = ? AND model = ?",
+                    (now, *key),
+                )
+    except sqlite3.Error as e:
+        print(f"Extraction cache read error: {e}")
+        _count("misses")
+        return None
+    _count("hits")
+    return json.loads(row["data"])
+
+
+@metrics.db_operation("put_cached_extraction")
+def put_cached_extraction(item: str, source: str, model: str, data: dict) -> None:
+    """Store an extraction result and evict least recently used entries over the limit."""
+    if config.EXTRACTION_CACHE_TTL <= 0:
+        return
+    now = time.time()
     try:
-        cur.execute("ALTER TABLE entries ADD COLUMN carbs REAL DEFAULT 0")
-    except sqlite3.OperationalError:
-        pass
+        with transaction() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO extraction_cache (item, source, model, data, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (normalize_item(item), source, model, json.dumps(data), now, now),
+            )
+            evicted = conn.execute(
+                """
+                DELETE FROM extraction_cache WHERE rowid IN (
+                    SELECT rowid FROM extraction_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (max(config.EXTRACTION_CACHE_MAX_ENTRIES, 0),),
+            ).rowcount
+    except sqlite3.Error as e:
+        print(f"Extraction cache write error: {e}")
+        return
+    _count("stores")
+    if evicted > 0:
+        _count("evictions", evicted)
+
+
+@metrics.db_operation("clear_extraction_cache")
+def clear_extraction_cache(model: Optional[str] = None) -> int:
+    """Delete cached extractions (optionally only for one model) and return the count."""
+    with transaction() as conn:
+        if model is None:
+            return conn.execute("DELETE FROM extraction_cache").rowcount
+        return conn.execute("DELETE FROM extraction_cache WHERE model = ?", (model,)).rowcount
+
 
+@metrics.db_operation("extraction_cache_stats")
+def extraction_cache_stats() -> dict:
+    """Return hit/miss counters and the current number of cached entries."""
+    with connection() as conn:
+        size = conn.execute("SELECT COUNT(*) FROM extraction_cache").fetchone()[0]
+    with _cache_lock:
+        stats = dict(_cache_counters)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    stats["entries"] = size
+    stats["max_entries"] = config.EXTRACTION_CACHE_MAX_ENTRIES
+    stats["ttl_seconds"] = config.EXTRACTION_CACHE_TTL
+    return stats
+
+
+# --- Search cache ---
+
+
+@metrics.db_operation("get_cached_search")
+def get_cached_search(query: str) -> Optional[tuple[list[str], float]]:
+    """Return (snippets, fetched_at) for a normalized query, or None if never cached."""
     try:
-        cur.execute("ALTER TABLE entries ADD COLUMN fat REAL DEFAULT 0")
-    except sqlite3.OperationalError:
-        pass
+        with connection() as conn:
+            row = conn.execute(
+                "SELECT snippets, fetched_at FROM search_cache WHERE query = ?", (query,)
+            ).fetchone()
+    except sqlite3.Error as e:
+        print(f"Search cache read error: {e}")
+        return None
+    if row is None:
+        return None
+    return json.loads(row["snippets"]), row["fetched_at"]
 
+
+@metrics.db_operation("put_cached_search")
+def put_cached_search(query: str, snippets: list[str]) -> None:
+    """Store fresh snippets for a normalized query."""
     try:
-        cur.execute("ALTER TABLE entries ADD COLUMN sugar REAL DEFAULT 0")
-    except sqlite3.OperationalError:
-        pass
+        with transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache (query, snippets, fetched_at) VALUES (?, ?, ?)",
+                (query, json.dumps(snippets), time.time()),
+            )
+    except sqlite3.Error as e:
+        print(f"Search cache write error: {e}")
+
+
+# --- Full-text search ---
+
+# Indexed text columns per table, and how much a match in each weighs in the ranking
+_SEARCH_COLUMNS = {
+    "entries": {"name": 10.0, "details": 1.0},
+    "chat_logs": {"user_message": 2.0, "bot_response": 1.0},
+}
+SNIPPET_START, SNIPPET_END = "<mark>", "</mark>"
+# Placeholders FTS5 puts around matches, swapped for the tags once the text is HTML-escaped
+_MATCH_START, _MATCH_END = "\ue000", "\ue001"
+_SNIPPET_TOKENS = 12
+_WORD = re.compile(r"\w+")
+
+
+def _create_search_index(cur: sqlite3.Cursor) -> None:
+    """Create FTS5 indexes over entry and chat text, and the triggers that keep them in sync."""
+    for table, weights in _SEARCH_COLUMNS.items():
+        fts = f"{table}_fts"
+        existed = cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)
+        ).fetchone()
+        columns = ", ".join(weights)
+        # External content: the index stores only tokens, the text stays in the table itself
+        cur.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, content='{table}', "
+            f"content_rowid='id', tokenize='porter unicode61')"
+        )
+
+        new = ", ".join(f"NEW.{col}" for col in weights)
+        old = ", ".join(f"OLD.{col}" for col in weights)
+        add = f"INSERT INTO {fts} (rowid, {columns}) VALUES (NEW.id, {new});"
+        remove = f"INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', OLD.id, {old});"
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN {add} END")
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN {remove} END")
+        cur.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF {columns} ON {table} "
+            f"BEGIN {remove} {add} END"
+        )
+        if not existed:
+            # Index rows written before the search index existed
+            cur.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+@metrics.db_operation("rebuild_search_index")
+def rebuild_search_index() -> dict:
+    """Re-index every entry and chat log from scratch and return the row counts indexed."""
+    counts = {}
+    with transaction() as conn:
+        for table in _SEARCH_COLUMNS:
+            conn.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')")
+            # Merge index segments so queries touch as few b-trees as possible
+            conn.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('optimize')")
+            counts[table] = conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+    return counts
+
+
+def search_query(text: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query matching rows that contain every word.
+
+    Words are quoted so user input never reaches FTS5's query syntax. None if
+    there are no words.
+    """
+    words = _WORD.findall(text.lower())
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words)
+
+
+# Page of the best matches in one table: bm25 over its newest :candidates matches only
+_RANKED_SQL = """
+    SELECT * FROM (
+        SELECT '{table}' AS source, rowid AS id, bm25({table}_fts, {weights}) AS score
+        FROM {table}_fts
+        WHERE {table}_fts MATCH :query AND rowid >= (
+            SELECT coalesce(min(rowid), 0) FROM (
+                SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH :query ORDER BY rowid DESC LIMIT :candidates
+            )
+        )
+        ORDER BY score LIMIT :depth
+    )
+"""
+
+# Display columns, fetched only for the rows of the requested page
+_DETAIL_COLUMNS = {
+    "entries": "'entry' AS type, t.id, t.name, t.calories, t.created_at",
+    "chat_logs": "'chat' AS type, t.id, NULL AS name, NULL AS calories, t.timestamp AS created_at",
+}
+
+
+def _highlight(snippet: Optional[str]) -> Optional[str]:
+    """Escape stored text for HTML, then mark the matches."""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_MATCH_START, SNIPPET_START).replace(_MATCH_END, SNIPPET_END)
+
+
+@metrics.db_operation("search_text")
+def search(text: str, tables: tuple[str, ...] = ("entries",), limit: int = 20, offset: int = 0) -> list[dict]:
+    """
+    Return entries and/or chat logs matching `text`, best matches first.
+
+    Each row carries its `type` ("entry" or "chat"), `id`, `name` and
+    `calories` (entries only), `created_at`, an HTML `snippet` (the text
+    escaped, matches wrapped in SNIPPET_START/SNIPPET_END), and its bm25
+    `score` (lower is better).
+    Only the newest `TEXT_SEARCH_MAX_CANDIDATES` matches per table are ranked.
+    """
+    query = search_query(text)
+    if query is None:
+        return []
+    ranked = " UNION ALL ".join(
+        _RANKED_SQL.format(table=table, weights=", ".join(map(str, _SEARCH_COLUMNS[table].values())))
+        for table in tables
+    )
+    params = {"query": query, "candidates": config.TEXT_SEARCH_MAX_CANDIDATES, "depth": offset + limit,
+              "limit": limit, "offset": offset}
+    with connection() as conn:
+        page = conn.execute(f"{ranked} ORDER BY score LIMIT :limit OFFSET :offset", params).fetchall()
+        details = {}
+        # Snippets and joins are costly per row, so they are left until the page is known
+        for table in tables:
+            ids = [row["id"] for row in page if row["source"] == table]
+            if not ids:
+                continue
+            rows = conn.execute(
+                f"""
+                SELECT {_DETAIL_COLUMNS[table]},
+                       snippet({table}_fts, -1, '{_MATCH_START}', '{_MATCH_END}', '…', {_SNIPPET_TOKENS}) AS snippet
+                FROM {table}_fts JOIN {table} t ON t.id = {table}_fts.rowid
+                WHERE {table}_fts MATCH ? AND {table}_fts.rowid IN ({", ".join("?" * len(ids))})
+                """,
+                (query, *ids),
+            ).fetchall()
+            details.update(((table, row["id"]), {**dict(row), "snippet": _highlight(row["snippet"])}) for row in rows)
+    return [{**details[(row["source"], row["id"])], "score": row["score"]}
+            for row in page if (row["source"], row["id"]) in details]
 
-    conn.commit()
-    conn.close()
 
+if __name__ == "__main__":
+    import sys
 
-# Initialize database on import
-init_db()
+    if sys.argv[1:] == ["rebuild-summaries"]:
+        print(f"Rebuilt totals for {rebuild_daily_totals()} days")
+    elif sys.argv[1:] == ["rebuild-search"]:
+        counts = rebuild_search_index()
+        print(f"Re-indexed {counts['entries']} entries and {counts['chat_logs']} chat logs")
+    else:
+        print("usage: python -m backend.db rebuild-summaries | rebuild-search")
+        sys.exit(1)
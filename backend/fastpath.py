@@ -0,0 +1,70 @@
+"""Rule-based plans for simple messages, so they skip the intent LLM call."""
+
+import re
+import threading
+from typing import Callable, Optional
+
+try:
+    from . import foods
+    from .quantity import parse_quantity
+except ImportError:
+    from backend import foods
+    from backend.quantity import parse_quantity
+
+GREETING_REPLY = "Hello! Ready to log your meal? Tell me what you ate and how much."
+THANKS_REPLY = "You're welcome! Tell me whenever you want to log another meal."
+
+_GREETING_RE = re.compile(r"(?:hi|hello|hey|hiya|howdy|good (?:morning|afternoon|evening))(?: there)?")
+_THANKS_RE = re.compile(r"(?:thanks|thank you|thx|cheers)(?: a lot| so much)?")
+# "I had", "for lunch I ate", "log" ... in front of the food list
+_LEAD_IN_RE = re.compile(
+    r"^(?:(?:for|at) (?:breakfast|lunch|dinner|a snack),? )?"
+    r"(?:(?:i )?(?:just )?(?:had|ate|have eaten|drank)|log|add) "
+)
+_SPLIT_RE = re.compile(r"\s*(?:,|;|&|\+|\band\b|\bplus\b)\s*")
+
+# Longer lists are rare enough to leave to the LLM
+MAX_ITEMS = 8
+
+_lock = threading.Lock()
+_counters = {"turns": 0, "fast_path": 0}
+
+
+def plan_for(message: str, lookup: Callable[[str], Optional[foods.Food]]) -> Optional[dict]:
+    """
+    Return a CHITCHAT or LOOKUP plan for a simple message, or None to defer to the LLM.
+
+    Only greetings and lists whose every item has an explicit amount and is
+    exactly a food-table entry (so its portion is computed without the LLM)
+    are handled; anything else is ambiguous and goes to the intent call.
+    """
+    text = " ".join(message.lower().split()).strip(" .!")
+    if _GREETING_RE.fullmatch(text):
+        return {"action": "CHITCHAT", "reply": GREETING_REPLY}
+    if _THANKS_RE.fullmatch(text):
+        return {"action": "CHITCHAT", "reply": THANKS_REPLY}
+
+    items = [item for item in _SPLIT_RE.split(_LEAD_IN_RE.sub("", text)) if item]
+    if not items or len(items) > MAX_ITEMS:
+        return None
+    for item in items:
+        if parse_quantity(item).amount is None:
+            return None
+        food = lookup(item)
+        if food is None or foods.portion(item, food) is None:
+            return None
+    return {"action": "LOOKUP", "items": items}
+
+
+def record(fast: bool) -> None:
+    """Count a turn, and whether it took the fast path."""
+    with _lock:
+        _counters["turns"] += 1
+        _counters["fast_path"] += fast
+
+
+def stats() -> dict:
+    """Return turn counters and the share of turns that skipped the intent call."""
+    with _lock:
+        turns, fast = _counters["turns"], _counters["fast_path"]
+    return {"turns": turns, "fast_path": fast, "share": round(fast / turns, 3) if turns else 0.0}
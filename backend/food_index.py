@@ -0,0 +1,124 @@
+"""Precomputed index for matching free-text items against food names."""
+
+from array import array
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+# Length of the character n-grams used to find names containing the query
+GRAM = 3
+
+
+class FoodMatch(NamedTuple):
+    key: str
+    # "exact", "in_query" (the name occurs in the query) or "in_name" (the query occurs in the name)
+    kind: str
+    # Share of the longer string covered by the shorter one (1.0 for exact matches)
+    score: float
+
+
+def _grams(text: str) -> set[str]:
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class FoodIndex:
+    """
+    Match items against food names with longest-match-wins semantics.
+
+    A name matches when it equals the query, occurs in the query, or contains
+    the query. Among matches, longer names win and ties keep insertion order,
+    as the original linear scan over length-sorted keys did. The index is
+    built once so lookups do not depend on the size of the table:
+
+    * names occurring in the query are found by probing the query's
+      substrings against a hash of names;
+    * names containing the query are found through a character n-gram
+      inverted index whose posting lists are kept in rank order, so the
+      first verified candidate is the best one.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        keys = list(dict.fromkeys(keys))
+        # Rank order: longest first, ties in insertion order (sorted() is stable)
+        self._ranked: list[str] = sorted(keys, key=len, reverse=True)
+        self._rank: dict[str, int] = {key: pos for pos, key in enumerate(self._ranked)}
+        self._lengths: list[int] = sorted({len(key) for key in keys if key}, reverse=True)
+        self._postings: dict[str, array] = {}
+        for pos, key in enumerate(self._ranked):
+            for gram in _grams(key):
+                postings = self._postings.get(gram)
+                if postings is None:
+                    postings = self._postings[gram] = array("I")
+                postings.append(pos)
+
+    def __len__(self) -> int:
+        return len(self._ranked)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rank
+
+    def best(self, query: str) -> Optional[str]:
+        """Return the best matching food name for `query`, or None."""
+        matches = self.search(query, limit=1)
+        return matches[0].key if matches else None
+
+    def search(self, query: str, limit: int = 5) -> list[FoodMatch]:
+        """Return up to `limit` matches for `query`, best first."""
+        query = query.lower().strip()
+        if not query or limit <= 0:
+            return []
+        if query in self._rank:
+            exact = [FoodMatch(query, "exact", 1.0)]
+            if limit == 1:
+                return exact
+        else:
+            exact = []
+
+        # Both sources yield rank positions in ascending order; merge the heads
+        found: dict[int, str] = {}
+        for kind, source in (("in_query", self._names_in(query)), ("in_name", self._names_containing(query))):
+            for count, pos in enumerate(source):
+                if count >= limit:
+                    break
+                found.setdefault(pos, kind)
+
+        matches = exact
+        for pos in sorted(found):
+            key = self._ranked[pos]
+            if key == query:
+                continue
+            shorter, longer = sorted((len(key), len(query)))
+            matches.append(FoodMatch(key, found[pos], round(shorter / longer, 3)))
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def _names_in(self, query: str) -> Iterator[int]:
+        """Yield rank positions of names that occur in `query`, best first."""
+        positions = set()
+        for length in self._lengths:
+            if length > len(query):
+                continue
+            for start in range(len(query) - length + 1):
+                pos = self._rank.get(query[start:start + length])
+                if pos is not None:
+                    positions.add(pos)
+        yield from sorted(positions)
+
+    def _names_containing(self, query: str) -> Iterator[int]:
+        """Yield rank positions of names that contain `query`, best first."""
+        if len(query) < GRAM:
+            # Too short for the n-gram index; rare enough to scan
+            for pos, key in enumerate(self._ranked):
+                if query in key:
+                    yield pos
+            return
+
+        shortest = None
+        for gram in _grams(query):
+            postings = self._postings.get(gram)
+            if postings is None:
+                return
+            if shortest is None or len(postings) < len(shortest):
+                shortest = postings
+        for pos in shortest:
+            if query in self._ranked[pos]:
+                yield pos
@@ -0,0 +1,232 @@
+"""Typed food table with per-serving nutrition columns.
+
+The table is loaded from ``data/foods.csv``. The legacy free-text
+``data/common_foods.json`` can be converted with::
+
+    python -m backend.foods import [common_foods.json] [foods.csv]
+"""
+
+import csv
+import json
+import re
+import sys
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from . import calorie_engine
+from .quantity import Quantity, parse_quantity
+
+DATA_DIR = Path(__file__).parent / "data"
+FOODS_CSV = DATA_DIR / "foods.csv"
+COMMON_FOODS_JSON = DATA_DIR / "common_foods.json"
+
+COLUMNS = ("key", "name", "serving", "grams", "kcal", "protein", "carbs", "fat", "sugar")
+NUMERIC_COLUMNS = COLUMNS[3:]
+
+
+class Food(NamedTuple):
+    key: str
+    name: str
+    # Serving description, e.g. "Cooked, 1 cup"
+    serving: str
+    grams: float
+    kcal: float
+    protein: float
+    carbs: float
+    fat: float
+    sugar: float
+
+    def describe(self) -> str:
+        """Render the entry in the free-text form used in LLM prompts."""
+        return (
+            f"{self.name} ({self.serving}, {self.grams:g}g): {self.kcal:g} kcal, "
+            f"{self.protein:g}g Protein, {self.carbs:g}g Carbs, {self.fat:g}g Fat, {self.sugar:g}g Sugar."
+        )
+
+
+class FoodTable:
+    """Column-oriented food table: names in lists, nutrition in packed float arrays."""
+
+    def __init__(self, foods: Iterable[Food] = ()):
+        self._row: dict[str, int] = {}
+        self._names: list[str] = []
+        self._servings: list[str] = []
+        self._columns: dict[str, array] = {col: array("d") for col in NUMERIC_COLUMNS}
+        for food in foods:
+            self.add(food)
+
+    def add(self, food: Food) -> None:
+        if food.key in self._row:
+            raise ValueError(f"Duplicate food key: {food.key}")
+        self._row[food.key] = len(self._names)
+        self._names.append(food.name)
+        self._servings.append(food.serving)
+        for col in NUMERIC_COLUMNS:
+            self._columns[col].append(float(getattr(food, col)))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._row
+
+    def __iter__(self) -> Iterator[Food]:
+        for key in self._row:
+            yield self[key]
+
+    def __getitem__(self, key: str) -> Food:
+        row = self._row[key]
+        return Food(key, self._names[row], self._servings[row],
+                    *(self._columns[col][row] for col in NUMERIC_COLUMNS))
+
+    def get(self, key: str) -> Optional[Food]:
+        return self[key] if key in self._row else None
+
+    def keys(self) -> list[str]:
+        return list(self._row)
+
+    def column(self, name: str) -> array:
+        """Return a numeric column (in key order) without copying."""
+        return self._columns[name]
+
+
+# --- Portions ---
+
+# Servings given as a weight or volume ("1 oz", "Cooked, 3 oz", "1 cup") rather than one piece
+_MEASURED_SERVING_RE = re.compile(r"\b\d+(?:\.\d+)?\s*(?:g|kg|oz|lb|ml|cups?|tbsp|tsp)\b", re.IGNORECASE)
+
+
+def serving_factor(food: Food, quantity: Quantity) -> Optional[float]:
+    """
+    Return how many servings of `food` the parsed quantity represents,
+    or None when the unit cannot be converted confidently.
+    """
+    if quantity.unit == "g":
+        return quantity.amount / food.grams if food.grams else None
+    amount = 1.0 if quantity.amount is None else quantity.amount
+    if quantity.unit == "serving":
+        return amount
+    if quantity.unit in (None, "piece"):
+        # A count is of pieces ("2 eggs"), which says nothing about a serving of "1 oz" or "1 cup"
+        if quantity.amount is not None and _MEASURED_SERVING_RE.search(food.serving):
+            return None
+        return amount
+    # Household measures only convert when the serving is given in the same unit
+    if re.search(rf"\b1 {quantity.unit}\b", food.serving):
+        return amount
+    return None
+
+
+# Words that describe the serving rather than the food ("2 large eggs")
+_SIZE_WORDS = {"small", "medium", "large", "whole", "cooked", "raw", "plain"}
+
+
+def _singular(word: str) -> str:
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def same_food(phrase: str, key: str) -> bool:
+    """True when a food phrase names exactly the table entry, ignoring plurals and size words."""
+    words = [_singular(w) for w in phrase.lower().split() if w not in _SIZE_WORDS]
+    return words == [_singular(w) for w in key.split()]
+
+
+def portion(item: str, food: Food) -> Optional[dict]:
+    """
+    Build the ingredient for `item` from a table entry.
+
+    Returns None when the item is not exactly this food (e.g. "apple pie"
+    for "apple") or when the amount cannot be converted.
+    """
+    quantity = parse_quantity(item)
+    if not same_food(quantity.food, food.key):
+        return None
+    factor = serving_factor(food, quantity)
+    if factor is None or factor <= 0:
+        return None
+    if quantity.unit == "g":
+        amount = f"{quantity.amount:g}g"
+    else:
+        amount = f"{factor:g} x {food.serving} ({food.grams * factor:g}g)"
+    return calorie_engine.scaled_ingredient(
+        item, amount, factor, food.kcal, food.protein, food.carbs, food.fat, food.sugar
+    )
+
+
+# --- Loading and import ---
+
+_ENTRY_RE = re.compile(
+    r"^(?P<name>[^(]+)\((?P<serving>.*?),?\s*(?P<grams>[\d.]+)\s*g\)\s*:\s*"
+    r"(?P<kcal>[\d.]+)\s*kcal,\s*(?P<protein>[\d.]+)g Protein,\s*(?P<carbs>[\d.]+)g Carbs,\s*"
+    r"(?P<fat>[\d.]+)g Fat,\s*(?P<sugar>[\d.]+)g Sugar",
+    re.IGNORECASE,
+)
+
+
+def parse_common_food(key: str, text: str) -> Food:
+    """Parse a legacy entry such as "Apple (Medium, 182g): 95 kcal, 0.5g Protein, ..."."""
+    match = _ENTRY_RE.match(text.strip())
+    if not match:
+        raise ValueError(f"Unrecognized food entry for {key!r}: {text!r}")
+    fields = match.groupdict()
+    return Food(
+        key=key.lower().strip(),
+        name=fields["name"].strip(),
+        serving=fields["serving"].strip(" ,"),
+        **{col: float(fields[col]) for col in NUMERIC_COLUMNS},
+    )
+
+
+def import_common_foods(json_path: Path = COMMON_FOODS_JSON) -> FoodTable:
+    """Convert the legacy JSON mapping of free-text entries into a table."""
+    with open(json_path, "r") as f:
+        entries = json.load(f)
+    return FoodTable(parse_common_food(key, text) for key, text in entries.items())
+
+
+def write_csv(table: FoodTable, csv_path: Path = FOODS_CSV) -> None:
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for food in table:
+            writer.writerow([f"{v:g}" if isinstance(v, float) else v for v in food])
+
+
+def read_csv(csv_path: Path = FOODS_CSV) -> FoodTable:
+    table = FoodTable()
+    with open(csv_path, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            table.add(Food(
+                key=row["key"], name=row["name"], serving=row["serving"],
+                **{col: float(row[col] or 0) for col in NUMERIC_COLUMNS},
+            ))
+    return table
+
+
+def load_food_table() -> FoodTable:
+    """Load the food table, falling back to importing the legacy JSON."""
+    try:
+        if FOODS_CSV.exists():
+            return read_csv(FOODS_CSV)
+        return import_common_foods(COMMON_FOODS_JSON)
+    except Exception as e:
+        print(f"Warning: Could not load food table: {e}")
+        return FoodTable()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "import":
+        print(__doc__)
+        sys.exit(1)
+    source = Path(sys.argv[2]) if len(sys.argv) > 2 else COMMON_FOODS_JSON
+    target = Path(sys.argv[3]) if len(sys.argv) > 3 else FOODS_CSV
+    imported = import_common_foods(source)
+    write_csv(imported, target)
+    print(f"Imported {len(imported)} foods into {target}")
@@ -0,0 +1,94 @@
+"""Token-budgeted windowing of the conversation history sent to the LLM."""
+
+from typing import Callable, NamedTuple, Optional
+
+# Fixed per-message overhead (role markers, separators) added by chat templates
+MESSAGE_OVERHEAD = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: about four characters per token for English text."""
+    return (len(text) + 3) // 4
+
+
+class HistoryUsage(NamedTuple):
+    # Estimated tokens of the whole prompt, system message included
+    prompt_tokens: int
+    # Messages sent verbatim
+    kept: int
+    # Older messages folded into the summary message
+    summarized: int
+    # Messages left out entirely
+    dropped: int
+
+
+class HistoryManager:
+    """
+    Fit a conversation into a token budget.
+
+    The system prompt and the last `keep_last` messages are sent verbatim
+    (the latest message always is, even if it alone exceeds the budget).
+    Older messages are shortened and folded into one summary message,
+    newest first, as far as the remaining budget allows; with
+    `compaction="drop"` they are left out instead.
+    """
+
+    def __init__(self, budget_tokens: int = 2048, keep_last: int = 6, compaction: str = "summary",
+                 estimator: Callable[[str], int] = estimate_tokens, summary_chars: int = 160):
+        if compaction not in ("summary", "drop"):
+            raise ValueError(f"Unknown compaction mode: {compaction}")
+        self.budget_tokens = budget_tokens
+        self.keep_last = max(1, keep_last)
+        self.compaction = compaction
+        self.estimator = estimator
+        # Each older message is shortened to this many characters in the summary
+        self.summary_chars = summary_chars
+
+    def _cost(self, message: dict) -> int:
+        return self.estimator(message["content"]) + MESSAGE_OVERHEAD
+
+    def build(self, system_prompt: str, history: list[dict]) -> tuple[list[dict], HistoryUsage]:
+        """Return the messages to send and how the history was fitted."""
+        history = [{"role": m["role"], "content": m["content"]} for m in history if m["role"] != "system"]
+        system = {"role": "system", "content": system_prompt}
+        used = self._cost(system)
+
+        # Recent messages, newest first, while they fit (the latest one always goes)
+        recent: list[dict] = []
+        for message in reversed(history[-self.keep_last:]):
+            cost = self._cost(message)
+            if recent and used + cost > self.budget_tokens:
+                break
+            recent.insert(0, message)
+            used += cost
+        older = history[:len(history) - len(recent)]
+
+        summary = None
+        summarized = 0
+        if older and self.compaction == "summary":
+            summary, summarized = self._summarize(older, self.budget_tokens - used)
+            if summary is not None:
+                used += self._cost(summary)
+
+        messages = [system] + ([summary] if summary else []) + recent
+        usage = HistoryUsage(used, len(recent), summarized, len(older) - summarized)
+        return messages, usage
+
+    def _summarize(self, older: list[dict], budget: int) -> tuple[Optional[dict], int]:
+        """Fold older messages into one note, keeping the most recent ones that fit."""
+        header = "Summary of earlier conversation (oldest first):"
+        budget -= self.estimator(header) + MESSAGE_OVERHEAD
+        lines: list[str] = []
+        for message in reversed(older):
+            content = " ".join(message["content"].split())
+            if len(content) > self.summary_chars:
+                content = content[:self.summary_chars - 3].rstrip() + "..."
+            line = f"- {message['role']}: {content}"
+            cost = self.estimator(line + "\n")
+            if cost > budget:
+                break
+            lines.insert(0, line)
+            budget -= cost
+        if not lines:
+            return None, 0
+        return {"role": "system", "content": "\n".join([header] + lines)}, len(lines)
@@ -3,5 +3,8 @@ from .base import LLMConnector
 from .openai import OpenAIConnector
 from .local import LocalConnector
 from .ollama import OllamaConnector
+from .ollama_pool import BackendUnavailable, OllamaPoolConnector
+from .registry import ConnectorRegistry
+from .scheduler import Overloaded
 
-__all__ = ["LLMConnector", "OpenAIConnector", "LocalConnector", "OllamaConnector"]
+__all__ = ["LLMConnector", "OpenAIConnector", "LocalConnector", "OllamaConnector", "OllamaPoolConnector", "BackendUnavailable", "ConnectorRegistry", "Overloaded"]
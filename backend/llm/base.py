@@ -1,13 +1,51 @@
 """Abstractions for chat-oriented language model connectors."""
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from typing import AsyncIterator, Dict, Iterator, List, Optional
 
 
 class LLMConnector(ABC):
     """Abstract base class for chat completion models."""
 
+    # Label used in metrics
+    provider = "unknown"
+    # Servers the connector spreads calls over; the scheduler admits LLM_MAX_CONCURRENCY calls per server
+    backends = 1
+
     @abstractmethod
     def chat(self, messages: List[Dict[str, str]]) -> str:
         """Return response text for given chat messages."""
         raise NotImplementedError
+
+    async def achat(self, messages: List[Dict[str, str]]) -> str:
+        """Async variant of `chat`.
+
+        Connectors without a native implementation run the blocking call in a
+        worker thread so they never stall the event loop.
+        """
+        return await asyncio.to_thread(self.chat, messages)
+
+    def chat_stream(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """Yield the response text in chunks as it is generated.
+
+        The default yields the complete `chat` response as a single chunk.
+        """
+        yield self.chat(messages)
+
+    async def achat_stream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """Async variant of `chat_stream`."""
+        yield await self.achat(messages)
+
+    def warm_up(self) -> None:
+        """Prepare the backend for the first real request (e.g. load the model).
+
+        Raises if the backend is unreachable. The default does nothing.
+        """
+
+    def close(self) -> None:
+        """Release pooled connections held for this connector."""
+
+    def node_status(self) -> Optional[List[dict]]:
+        """Health of each server, for connectors spreading calls over several; None otherwise."""
+        return None
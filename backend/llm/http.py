@@ -0,0 +1,78 @@
+"""Shared keep-alive HTTP client pools for LLM connectors."""
+
+import asyncio
+import json
+import threading
+from typing import Dict, Hashable, Optional, Tuple
+
+import httpx
+
+# Generous read timeout: local models can take a while to generate
+DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+DEFAULT_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+
+_lock = threading.Lock()
+_sync_clients: Dict[Hashable, httpx.Client] = {}
+# Async clients are bound to the event loop that first used them
+_async_clients: Dict[Hashable, Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+
+def sync_client(key: Hashable) -> httpx.Client:
+    """Return the long-lived blocking client for `key`, creating it on first use."""
+    with _lock:
+        client = _sync_clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.Client(timeout=DEFAULT_TIMEOUT, limits=DEFAULT_LIMITS)
+            _sync_clients[key] = client
+        return client
+
+
+def async_client(key: Hashable) -> httpx.AsyncClient:
+    """Return the long-lived async client for `key` on the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        entry = _async_clients.get(key)
+        if entry is None or entry[0] is not loop or entry[1].is_closed:
+            # A client from another (possibly closed) loop cannot be reused here
+            entry = (loop, httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, limits=DEFAULT_LIMITS))
+            _async_clients[key] = entry
+        return entry[1]
+
+
+async def aclose_clients() -> None:
+    """Close every pooled client, e.g. on application shutdown."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        sync_clients = list(_sync_clients.values())
+        async_clients = [client for owner, client in _async_clients.values() if owner is loop]
+        _sync_clients.clear()
+        _async_clients.clear()
+    for client in sync_clients:
+        client.close()
+    for client in async_clients:
+        await client.aclose()
+
+
+def discard(key: Hashable) -> None:
+    """Close and forget the clients pooled under `key`, e.g. when their connector is evicted."""
+    with _lock:
+        sync = _sync_clients.pop(key, None)
+        entry = _async_clients.pop(key, None)
+    if sync is not None:
+        sync.close()
+    if entry is not None:
+        loop, client = entry
+        # Async clients must be closed on the loop that owns them
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(lambda: loop.create_task(client.aclose()))
+
+
+def sse_delta(line: str) -> Optional[str]:
+    """Return the content delta carried by one line of an OpenAI-style streaming response."""
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if not data or data == "[DONE]":
+        return None
+    choices = json.loads(data).get("choices") or [{}]
+    return (choices[0].get("delta") or {}).get("content") or None
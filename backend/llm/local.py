@@ -8,6 +8,8 @@ from .base import LLMConnector
 class LocalConnector(LLMConnector):
     """Dummy local model connector for offline inference."""
 
+    provider = "local"
+
     def chat(self, messages: List[Dict[str, str]]) -> str:  # pragma: no cover - placeholder
         # Return a valid JSON response so the Agent doesn't crash if this fallback is used.
         # We'll just say we can't help much.
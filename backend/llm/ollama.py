@@ -1,22 +1,69 @@
 """Connector for local Ollama servers."""
 
-from typing import Dict, List
-
-import requests
+from typing import AsyncIterator, Dict, Iterator, List
 
+from . import http
 from .base import LLMConnector
 
 
 class OllamaConnector(LLMConnector):
     """Interact with an Ollama instance via its REST API."""
 
+    provider = "ollama"
+
     def __init__(self, base_url: str = "http://localhost:11434", model: str = "llama3.2:latest"):
         self.base_url = base_url.rstrip('/')
         self.model = model
+        # Connections are pooled per (base_url, model) and kept alive between calls
+        self._pool_key = ("ollama", self.base_url, self.model)
 
     def chat(self, messages: List[Dict[str, str]]) -> str:
-        payload = {"model": self.model, "messages": messages}
-        resp = requests.post(f"{self.base_url}/v1/chat/completions", json=payload, timeout=30)
+        client = http.sync_client(self._pool_key)
+        resp = client.post(f"{self.base_url}/v1/chat/completions", json=self._payload(messages))
         resp.raise_for_status()
-        data = resp.json()
+        return self._content(resp.json())
+
+    async def achat(self, messages: List[Dict[str, str]]) -> str:
+        client = http.async_client(self._pool_key)
+        resp = await client.post(f"{self.base_url}/v1/chat/completions", json=self._payload(messages))
+        resp.raise_for_status()
+        return self._content(resp.json())
+
+    def chat_stream(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        client = http.sync_client(self._pool_key)
+        with client.stream("POST", f"{self.base_url}/v1/chat/completions",
+                           json=self._payload(messages, stream=True)) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                delta = http.sse_delta(line)
+                if delta:
+                    yield delta
+
+    async def achat_stream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        client = http.async_client(self._pool_key)
+        async with client.stream("POST", f"{self.base_url}/v1/chat/completions",
+                                 json=self._payload(messages, stream=True)) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                delta = http.sse_delta(line)
+                if delta:
+                    yield delta
+
+    def warm_up(self) -> None:
+        """Load the model into memory so the first chat does not pay for it."""
+        client = http.sync_client(self._pool_key)
+        resp = client.post(f"{self.base_url}/api/generate", json={"model": self.model})
+        resp.raise_for_status()
+
+    def close(self) -> None:
+        http.discard(self._pool_key)
+
+    def _payload(self, messages: List[Dict[str, str]], stream: bool = False) -> dict:
+        payload = {"model": self.model, "messages": messages}
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    @staticmethod
+    def _content(data: dict) -> str:
         return data["choices"][0]["message"]["content"].strip()
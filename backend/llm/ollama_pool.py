@@ -0,0 +1,393 @@
+"""Connector spreading calls across several Ollama servers."""
+
+import asyncio
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Set, TypeVar
+
+import httpx
+
+from .. import config
+from .base import LLMConnector
+from .ollama import OllamaConnector
+
+T = TypeVar("T")
+
+# Circuit breaker states of a backend
+CLOSED = "closed"        # In rotation
+OPEN = "open"            # Out of rotation until its cooldown has passed
+HALF_OPEN = "half_open"  # One trial call decides whether it returns to rotation
+
+# Latency samples kept for the hedging percentile, and how many are needed before hedging starts
+LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+
+
+class BackendUnavailable(Exception):
+    """Every backend of the pool is out of rotation."""
+
+
+def _node_fault(error: BaseException) -> bool:
+    """True for errors that say something about the backend (unreachable, timed out, 5xx, busy)."""
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return False
+
+
+class _Node:
+    __slots__ = ("index", "url", "connector", "outstanding", "state", "failures", "opened_at", "trial",
+                 "requests", "errors", "hedges", "last_error")
+
+    def __init__(self, index: int, connector: OllamaConnector):
+        self.index = index
+        self.url = connector.base_url
+        self.connector = connector
+        self.outstanding = 0
+        self.state = CLOSED
+        self.failures = 0  # Consecutive calls failing because of the backend
+        self.opened_at = 0.0
+        self.trial = False  # A half-open trial call is in flight
+        self.requests = 0
+        self.errors = 0
+        self.hedges = 0
+        self.last_error: Optional[str] = None
+
+
+class OllamaPoolConnector(LLMConnector):
+    """
+    Interact with several Ollama instances serving the same model as one backend.
+
+    Each call goes to the backend with the fewest calls in flight. A backend
+    failing `breaker_failures` calls in a row (connection errors, timeouts,
+    5xx) is taken out of rotation for `breaker_cooldown` seconds, after which
+    a single trial call decides whether it comes back. Failed calls are
+    retried up to `retries` times on another backend, with exponential
+    backoff. With `hedge_percentile` set, a call still running after that
+    percentile of recent latencies is also sent to a second backend and the
+    first answer wins. Streams are retried only before their first chunk
+    and are never hedged.
+    """
+
+    provider = "ollama"
+
+    def __init__(self, base_urls: List[str], model: str = "llama3.2:latest",
+                 retries: Optional[int] = None, backoff: Optional[float] = None,
+                 breaker_failures: Optional[int] = None, breaker_cooldown: Optional[float] = None,
+                 hedge_percentile: Optional[int] = None):
+        if not base_urls:
+            raise ValueError("OllamaPoolConnector needs at least one base URL")
+        self.model = model
+        self._nodes = [_Node(i, OllamaConnector(url, model)) for i, url in enumerate(base_urls)]
+        # One scheduler for the pool, with slots for every backend
+        self.base_url = ",".join(node.url for node in self._nodes)
+        self.backends = len(self._nodes)
+        self.retries = config.OLLAMA_RETRIES if retries is None else retries
+        self.backoff = config.OLLAMA_RETRY_BACKOFF_MS / 1000 if backoff is None else backoff
+        self.breaker_failures = max(1, breaker_failures or config.OLLAMA_BREAKER_FAILURES)
+        self.breaker_cooldown = config.OLLAMA_BREAKER_COOLDOWN if breaker_cooldown is None else breaker_cooldown
+        self.hedge_percentile = config.OLLAMA_HEDGE_PERCENTILE if hedge_percentile is None else hedge_percentile
+        self._lock = threading.Lock()
+        self._rotation = itertools.count()
+        self._latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def chat(self, messages: List[Dict[str, str]]) -> str:
+        return self._call(lambda connector: connector.chat(messages))
+
+    async def achat(self, messages: List[Dict[str, str]]) -> str:
+        return await self._acall(lambda connector: connector.achat(messages))
+
+    def chat_stream(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        tried: Set[_Node] = set()
+        for attempt in range(self.retries + 1):
+            node = self._pick(tried)
+            if node is None:
+                break
+            tried.add(node)
+            started = False
+            try:
+                for chunk in node.connector.chat_stream(messages):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                self._finish(node, None, e)
+                if started or not _node_fault(e) or attempt == self.retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            except BaseException:
+                self._finish(node, None, None, completed=False)
+                raise
+            self._finish(node, None, None)
+            return
+        raise BackendUnavailable(f"No Ollama backend available among {self.base_url}")
+
+    async def achat_stream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        tried: Set[_Node] = set()
+        for attempt in range(self.retries + 1):
+            node = self._pick(tried)
+            if node is None:
+                break
+            tried.add(node)
+            started = False
+            try:
+                async for chunk in node.connector.achat_stream(messages):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                self._finish(node, None, e)
+                if started or not _node_fault(e) or attempt == self.retries:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            except BaseException:
+                self._finish(node, None, None, completed=False)
+                raise
+            self._finish(node, None, None)
+            return
+        raise BackendUnavailable(f"No Ollama backend available among {self.base_url}")
+
+    def warm_up(self) -> None:
+        """Load the model on every backend; those that fail are taken out of rotation."""
+        errors = []
+        for node in self._nodes:
+            try:
+                node.connector.warm_up()
+            except Exception as e:
+                errors.append(e)
+                self._probed(node, e)
+            else:
+                self._probed(node, None)
+        if len(errors) == len(self._nodes):
+            raise errors[-1]
+
+    def close(self) -> None:
+        for node in self._nodes:
+            node.connector.close()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def node_status(self) -> List[dict]:
+        with self._lock:
+            return [
+                {
+                    "base_url": n.url,
+                    "state": n.state,
+                    "outstanding": n.outstanding,
+                    "failures": n.failures,
+                    "requests": n.requests,
+                    "errors": n.errors,
+                    "hedges": n.hedges,
+                    "last_error": n.last_error,
+                }
+                for n in self._nodes
+            ]
+
+    # --- Routing and circuit breaking ---
+
+    def _pick(self, tried: Set[_Node], fresh_only: bool = False) -> Optional[_Node]:
+        """Claim the usable backend with the fewest calls in flight, preferring untried ones."""
+        now = time.monotonic()
+        with self._lock:
+            usable = [n for n in self._nodes if self._usable(n, now)]
+            candidates = [n for n in usable if n not in tried]
+            if not candidates and not fresh_only:
+                candidates = usable
+            if not candidates:
+                return None
+            # Ties rotate, so idle backends share sequential calls
+            start = next(self._rotation)
+            node = min(candidates, key=lambda n: (n.outstanding, (n.index - start) % len(self._nodes)))
+            node.outstanding += 1
+            node.requests += 1
+            if node.state != CLOSED:
+                node.state, node.trial = HALF_OPEN, True
+            return node
+
+    def _usable(self, node: _Node, now: float) -> bool:
+        if node.state == CLOSED:
+            return True
+        if node.state == HALF_OPEN:
+            return not node.trial
+        return now - node.opened_at >= self.breaker_cooldown
+
+    def _finish(self, node: _Node, started: Optional[float], error: Optional[BaseException],
+                completed: bool = True) -> None:
+        """Release a claimed backend and feed the outcome of its call to the breaker."""
+        with self._lock:
+            node.outstanding -= 1
+            node.trial = False
+            if not completed:
+                return  # Cancelled, e.g. the losing copy of a hedged call
+            if error is None:
+                node.state, node.failures = CLOSED, 0
+                if started is not None:
+                    self._latencies.append(time.perf_counter() - started)
+            elif _node_fault(error):
+                node.errors += 1
+                self._fault(node, error)
+
+    def _probed(self, node: _Node, error: Optional[BaseException]) -> None:
+        with self._lock:
+            if error is None:
+                node.state, node.failures = CLOSED, 0
+            else:
+                # A failed probe takes the backend out of rotation, like a failed trial call
+                node.state = HALF_OPEN
+                self._fault(node, error)
+
+    def _fault(self, node: _Node, error: BaseException) -> None:
+        """Count a backend failure, taking the backend out of rotation when due. Lock held."""
+        node.failures += 1
+        node.last_error = str(error)
+        if node.state == HALF_OPEN or node.failures >= self.breaker_failures:
+            if node.state != OPEN:
+                print(f"Ollama backend {node.url} taken out of rotation: {error}")
+            node.state, node.opened_at = OPEN, time.monotonic()
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter keeps retries from several callers from arriving together
+        return random.uniform(0.5, 1.0) * self.backoff * 2 ** attempt
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge_percentile or len(self._nodes) < 2:
+            return None
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, len(samples) * self.hedge_percentile // 100)]
+
+    def _hedge(self, tried: Set[_Node]) -> Optional[_Node]:
+        node = self._pick(tried, fresh_only=True)
+        if node is not None:
+            tried.add(node)
+            with self._lock:
+                node.hedges += 1
+        return node
+
+    # --- Blocking calls ---
+
+    def _call(self, fn: Callable[[OllamaConnector], T]) -> T:
+        tried: Set[_Node] = set()
+        error: Optional[Exception] = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self._backoff(attempt - 1))
+            node = self._pick(tried)
+            if node is None:
+                break
+            tried.add(node)
+            try:
+                return self._attempt(node, fn, tried)
+            except Exception as e:
+                if not _node_fault(e):
+                    raise
+                error = e
+        raise error or BackendUnavailable(f"No Ollama backend available among {self.base_url}")
+
+    def _attempt(self, node: _Node, fn: Callable[[OllamaConnector], T], tried: Set[_Node]) -> T:
+        delay = self._hedge_delay()
+        if delay is None:
+            return self._run(node, fn)
+        primary = self._hedge_executor().submit(self._run, node, fn)
+        if wait([primary], timeout=delay).done:
+            return primary.result()
+        backup = self._hedge(tried)
+        if backup is None:
+            return primary.result()
+        # The slower copy cannot be interrupted; it finishes in the background and is ignored
+        pending = {primary, self._hedge_executor().submit(self._run, backup, fn)}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    def _run(self, node: _Node, fn: Callable[[OllamaConnector], T]) -> T:
+        started = time.perf_counter()
+        try:
+            result = fn(node.connector)
+        except BaseException as e:
+            self._finish(node, started, e)
+            raise
+        self._finish(node, started, None)
+        return result
+
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Room for a primary and a hedged copy of every call the scheduler lets through
+                self._executor = ThreadPoolExecutor(max_workers=2 * config.LLM_MAX_CONCURRENCY * self.backends,
+                                                    thread_name_prefix="ollama-hedge")
+            return self._executor
+
+    # --- Async calls ---
+
+    async def _acall(self, fn: Callable[[OllamaConnector], Awaitable[T]]) -> T:
+        tried: Set[_Node] = set()
+        error: Optional[Exception] = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(self._backoff(attempt - 1))
+            node = self._pick(tried)
+            if node is None:
+                break
+            tried.add(node)
+            try:
+                return await self._aattempt(node, fn, tried)
+            except Exception as e:
+                if not _node_fault(e):
+                    raise
+                error = e
+        raise error or BackendUnavailable(f"No Ollama backend available among {self.base_url}")
+
+    async def _aattempt(self, node: _Node, fn: Callable[[OllamaConnector], Awaitable[T]], tried: Set[_Node]) -> T:
+        delay = self._hedge_delay()
+        if delay is None:
+            return await self._arun(node, fn)
+        pending = {asyncio.ensure_future(self._arun(node, fn))}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                backup = self._hedge(tried)
+                if backup is not None:
+                    pending.add(asyncio.ensure_future(self._arun(backup, fn)))
+            error = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = error or task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # The losing copy of a hedged call is cancelled
+            for task in pending:
+                task.cancel()
+
+    async def _arun(self, node: _Node, fn: Callable[[OllamaConnector], Awaitable[T]]) -> T:
+        started = time.perf_counter()
+        try:
+            result = await fn(node.connector)
+        except Exception as e:
+            self._finish(node, started, e)
+            raise
+        except BaseException:
+            self._finish(node, started, None, completed=False)
+            raise
+        self._finish(node, started, None)
+        return result
@@ -1,17 +1,55 @@
 """Connector for OpenAI's chat API."""
 
-from typing import Dict, List
+from typing import AsyncIterator, Dict, Iterator, List
 
+from . import http
 from .base import LLMConnector
 
 
 class OpenAIConnector(LLMConnector):
     """Interact with OpenAI's chat completion models."""
 
-    def __init__(self, client):
+    provider = "openai"
+
+    def __init__(self, client, model: str = "gpt-3.5-turbo"):
         self.client = client
+        self.model = model
+        self._pool_key = ("openai", str(client.base_url), self.model)
 
     def chat(self, messages: List[Dict[str, str]]) -> str:
         """Call OpenAI client to get a response."""
-        response = self.client.chat.completions.create(model="gpt-3.5-turbo", messages=messages)
+        response = self.client.chat.completions.create(model=self.model, messages=messages)
         return response.choices[0].message.content.strip()
+
+    async def achat(self, messages: List[Dict[str, str]]) -> str:
+        """Call the chat completions REST endpoint on a pooled async client."""
+        client = http.async_client(self._pool_key)
+        resp = await client.post(self._completions_url(), json={"model": self.model, "messages": messages},
+                                 headers=self._headers())
+        resp.raise_for_status()
+        return resp.json()["choices"][0]["message"]["content"].strip()
+
+    def chat_stream(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        stream = self.client.chat.completions.create(model=self.model, messages=messages, stream=True)
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def achat_stream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        client = http.async_client(self._pool_key)
+        async with client.stream("POST", self._completions_url(), headers=self._headers(),
+                                 json={"model": self.model, "messages": messages, "stream": True}) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                delta = http.sse_delta(line)
+                if delta:
+                    yield delta
+
+    def close(self) -> None:
+        http.discard(self._pool_key)
+
+    def _completions_url(self) -> str:
+        return f"{str(self.client.base_url).rstrip('/')}/chat/completions"
+
+    def _headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.client.api_key}"}
@@ -0,0 +1,145 @@
+"""Registry of live LLM connectors shared across requests."""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .. import config
+from .base import LLMConnector
+
+Key = Tuple[str, Optional[str], Optional[str]]
+
+
+class _Entry:
+    __slots__ = ("key", "connector", "last_used", "healthy", "checked_at", "last_error", "failures", "probing")
+
+    def __init__(self, key: Key, connector: LLMConnector, now: float):
+        self.key = key
+        self.connector = connector
+        self.last_used = now
+        # None until the first warm-up or reported call
+        self.healthy: Optional[bool] = None
+        self.checked_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.failures = 0  # Consecutive failed calls
+        self.probing = False
+
+
+class ConnectorRegistry:
+    """
+    Reuse connector instances, and with them their HTTP pools, per (provider, base_url, model).
+
+    Connectors are built by `factory` on first use and warmed up in the
+    background. Entries idle for longer than `idle_ttl` seconds are closed and
+    evicted. Health comes from warm-up probes and reported call outcomes;
+    an unhealthy backend is probed again at most every `health_retry` seconds.
+    """
+
+    def __init__(self, factory: Callable[[str, Optional[str], Optional[str]], LLMConnector],
+                 idle_ttl: Optional[int] = None, health_retry: Optional[int] = None,
+                 warm_up: Optional[bool] = None):
+        self.factory = factory
+        self.idle_ttl = config.LLM_IDLE_TTL if idle_ttl is None else idle_ttl
+        self.health_retry = config.LLM_HEALTH_RETRY if health_retry is None else health_retry
+        self.warm_up = bool(config.LLM_WARM_UP) if warm_up is None else warm_up
+        self._lock = threading.Lock()
+        self._entries: Dict[Key, _Entry] = {}
+
+    def get(self, provider: str, base_url: Optional[str] = None, model: Optional[str] = None) -> LLMConnector:
+        """Return the shared connector for the key, building it on first use."""
+        key = (provider, base_url, model)
+        now = time.monotonic()
+        with self._lock:
+            evicted = self._evict_idle(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Entry(key, self.factory(provider, base_url, model), now)
+                self._entries[key] = entry
+            entry.last_used = now
+            probe = self._needs_probe(entry, now)
+            if probe:
+                entry.probing = True
+        for old in evicted:
+            old.connector.close()
+        if probe:
+            threading.Thread(target=self._probe, args=(entry,), name="llm-warm-up", daemon=True).start()
+        return entry.connector
+
+    def touch(self, connector: LLMConnector) -> bool:
+        """Mark a connector as used; False if it is no longer registered."""
+        with self._lock:
+            entry = self._find(connector)
+            if entry is None:
+                return False
+            entry.last_used = time.monotonic()
+            return True
+
+    def report(self, connector: LLMConnector, ok: bool, error: Optional[str] = None) -> None:
+        """Record the outcome of a call made through a registered connector."""
+        with self._lock:
+            entry = self._find(connector)
+            if entry is not None:
+                self._record(entry, ok, error)
+
+    def status(self) -> List[dict]:
+        """Return the health of every registered connector."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "provider": e.key[0],
+                    "base_url": e.key[1],
+                    "model": e.key[2],
+                    "healthy": e.healthy,
+                    "last_error": e.last_error,
+                    "failures": e.failures,
+                    "idle_seconds": round(now - e.last_used, 1),
+                    "nodes": e.connector.node_status(),
+                }
+                for e in self._entries.values()
+            ]
+
+    def clear(self) -> None:
+        """Close and forget every connector, e.g. on application shutdown."""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            entry.connector.close()
+
+    def _find(self, connector: LLMConnector) -> Optional[_Entry]:
+        # Only a handful of backends are ever live, so a scan is cheap
+        for entry in self._entries.values():
+            if entry.connector is connector:
+                return entry
+        return None
+
+    def _evict_idle(self, now: float) -> List[_Entry]:
+        idle = [key for key, e in self._entries.items() if now - e.last_used > self.idle_ttl]
+        return [self._entries.pop(key) for key in idle]
+
+    def _needs_probe(self, entry: _Entry, now: float) -> bool:
+        if not self.warm_up or entry.probing:
+            return False
+        if entry.checked_at is None:
+            return True
+        return entry.healthy is False and now - entry.checked_at >= self.health_retry
+
+    def _probe(self, entry: _Entry) -> None:
+        try:
+            entry.connector.warm_up()
+        except Exception as e:
+            print(f"LLM warm-up failed for {entry.key}: {e}")
+            ok, error = False, str(e)
+        else:
+            ok, error = True, None
+        with self._lock:
+            entry.probing = False
+            self._record(entry, ok, error)
+
+    @staticmethod
+    def _record(entry: _Entry, ok: bool, error: Optional[str]) -> None:
+        entry.healthy = ok
+        entry.checked_at = time.monotonic()
+        entry.failures = 0 if ok else entry.failures + 1
+        entry.last_error = None if ok else error
@@ -0,0 +1,208 @@
+"""Admission control and priority scheduling of calls to LLM backends."""
+
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .. import config, metrics
+from .base import LLMConnector
+
+# Priorities, most urgent first: calls a user is waiting on, then work done on their behalf
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+_RANK = {INTERACTIVE: 0, BACKGROUND: 1}
+
+# Weight of the latest call in the running average of slot hold time
+_HOLD_SMOOTHING = 0.2
+
+BackendKey = Tuple[str, Optional[str]]
+
+
+class Overloaded(Exception):
+    """The backend's wait queue is full, or a queued call waited too long; retry later."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("rank", "priority", "wake", "enqueued", "granted")
+
+    def __init__(self, priority: str, wake: Callable[[], None]):
+        self.rank = _RANK[priority]
+        self.priority = priority
+        self.wake = wake
+        self.enqueued = time.monotonic()
+        self.granted = False
+
+
+class Scheduler:
+    """
+    Limit the calls running at once against one backend and queue the rest.
+
+    Up to `max_concurrency` calls hold a slot; further callers wait in a
+    queue of at most `max_queue` entries, ordered by priority and then
+    arrival, so interactive calls overtake queued background work. A caller
+    finding the queue full, or still queued after `queue_timeout` seconds,
+    gets `Overloaded` with a Retry-After estimate instead of piling onto a
+    backend that would time out anyway. Blocking callers (`slot`) and
+    coroutines (`aslot`) share the same slots.
+    """
+
+    def __init__(self, key: BackendKey, max_concurrency: Optional[int] = None,
+                 max_queue: Optional[int] = None, queue_timeout: Optional[float] = None):
+        self.key = key
+        self.max_concurrency = max(1, max_concurrency or config.LLM_MAX_CONCURRENCY)
+        self.max_queue = config.LLM_MAX_QUEUE if max_queue is None else max_queue
+        self.queue_timeout = config.LLM_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queue: List[Tuple[int, int, _Waiter]] = []
+        self._order = itertools.count()
+        self._hold = 0.0  # Running average of seconds a slot is held
+        self._counters = {"admitted": 0, "rejected": 0, "timed_out": 0}
+        self._labels = {"provider": key[0], "base_url": key[1] or ""}
+
+    @contextmanager
+    def slot(self, priority: str = INTERACTIVE) -> Iterator[None]:
+        """Hold one of the backend's slots for the enclosed call, waiting in the queue if needed."""
+        granted = threading.Event()
+        waiter = self._admit(priority, granted.set)
+        if waiter is not None and not granted.wait(self.queue_timeout):
+            self._give_up(waiter)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    @asynccontextmanager
+    async def aslot(self, priority: str = INTERACTIVE) -> AsyncIterator[None]:
+        """Async variant of `slot`; waiting does not block the event loop."""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        waiter = self._admit(priority, wake)
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(granted, self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._give_up(waiter)
+            except asyncio.CancelledError:
+                with self._lock:
+                    owned = self._withdraw(waiter)
+                if owned:
+                    self._release()
+                raise
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    def _admit(self, priority: str, wake: Callable[[], None]) -> Optional[_Waiter]:
+        """Take a free slot (returns None) or join the queue (returns the waiter)."""
+        with self._lock:
+            if self._active < self.max_concurrency and not self._queue:
+                self._active += 1
+                self._counters["admitted"] += 1
+                self._publish()
+                metrics.HISTOGRAMS["llm_queue_wait"].observe(0.0, priority=priority, **self._labels)
+                return None
+            if len(self._queue) >= self.max_queue:
+                self._counters["rejected"] += 1
+                raise Overloaded(f"LLM backend {self.key[0]} is overloaded ({len(self._queue)} calls queued)",
+                                 self._retry_after())
+            waiter = _Waiter(priority, wake)
+            heapq.heappush(self._queue, (waiter.rank, next(self._order), waiter))
+            self._publish()
+            return waiter
+
+    def _give_up(self, waiter: _Waiter) -> None:
+        """Leave the queue after a timeout, unless the slot was granted in the meantime."""
+        with self._lock:
+            if self._withdraw(waiter):
+                return
+            self._counters["timed_out"] += 1
+            retry_after = self._retry_after()
+        raise Overloaded(f"LLM backend {self.key[0]} is overloaded (no slot within {self.queue_timeout}s)",
+                         retry_after)
+
+    def _withdraw(self, waiter: _Waiter) -> bool:
+        """Remove a waiter from the queue; True if it already owns a slot instead. Lock held."""
+        if waiter.granted:
+            return True
+        self._queue = [entry for entry in self._queue if entry[2] is not waiter]
+        heapq.heapify(self._queue)
+        self._publish()
+        return False
+
+    def _release(self, held: Optional[float] = None) -> None:
+        """Hand the slot to the most urgent waiter, or free it."""
+        with self._lock:
+            if held is not None:
+                self._hold += _HOLD_SMOOTHING * (held - self._hold)
+            if self._queue:
+                _, _, waiter = heapq.heappop(self._queue)
+                waiter.granted = True
+                self._counters["admitted"] += 1
+                metrics.HISTOGRAMS["llm_queue_wait"].observe(time.monotonic() - waiter.enqueued,
+                                                             priority=waiter.priority, **self._labels)
+                wake = waiter.wake
+            else:
+                self._active -= 1
+                wake = None
+            self._publish()
+        if wake is not None:
+            wake()
+
+    def _retry_after(self) -> int:
+        """Seconds until the current queue is expected to drain. Lock held."""
+        return max(1, math.ceil(self._hold * (len(self._queue) + 1) / self.max_concurrency))
+
+    def _publish(self) -> None:
+        metrics.GAUGES["llm_queue_depth"].set(len(self._queue), **self._labels)
+        metrics.GAUGES["llm_active"].set(self._active, **self._labels)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"provider": self.key[0], "base_url": self.key[1], "max_concurrency": self.max_concurrency,
+                    "active": self._active, "queued": len(self._queue), "max_queue": self.max_queue,
+                    "avg_hold_seconds": round(self._hold, 3), **self._counters}
+
+
+_schedulers: Dict[BackendKey, Scheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def for_connector(connector: LLMConnector) -> Scheduler:
+    """
+    Return the scheduler of the backend `connector` talks to, shared by every connector using it.
+
+    A connector spreading calls over several servers gets `LLM_MAX_CONCURRENCY`
+    slots per server, so adding servers adds throughput.
+    """
+    provider = getattr(connector, "provider", None) or type(connector).__name__
+    key = (provider, getattr(connector, "base_url", None))
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            backends = max(1, getattr(connector, "backends", 1))
+            scheduler = _schedulers[key] = Scheduler(key, max_concurrency=config.LLM_MAX_CONCURRENCY * backends)
+        return scheduler
+
+
+def stats() -> list[dict]:
+    """Return slot usage, queue depth and admission counters per backend."""
+    with _schedulers_lock:
+        schedulers = list(_schedulers.values())
+    return [scheduler.stats() for scheduler in schedulers]
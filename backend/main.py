@@ -1,17 +1,53 @@
 """FastAPI application wiring."""
 
+import time
+
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
-from .routers import entries, llm, chat
+from . import agent, chat_log, config, db, metrics, startup
+from .llm import http as llm_http
+from .llm import Overloaded
+from .routers import admin, backup, entries, llm, chat, summary
+
 
-app = FastAPI(title="Calorie Tracker API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup work happens here rather than at import, each phase timed
+    with startup.phase("migrations"):
+        await run_in_threadpool(db.init_db)
+    with startup.phase("food_table"):
+        await run_in_threadpool(agent.load_foods)
+    yield
+    # Write out queued chat logs before the database pool goes away
+    await run_in_threadpool(chat_log.writer.close)
+    # Release the pooled keep-alive connections to LLM backends and SQLite
+    await llm_http.aclose_clients()
+    llm.connectors.clear()
+    db.close_pools()
+
+
+app = FastAPI(title="Calorie Tracker API", lifespan=lifespan)
 
 app.include_router(entries.router, prefix="/api/entries", tags=["entries"])
 app.include_router(llm.router, prefix="/api/llm", tags=["llm"])
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
+app.include_router(summary.router, prefix="/api/summary", tags=["summary"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+app.include_router(backup.router, prefix="/api", tags=["backup"])
+
+
+@app.exception_handler(Overloaded)
+async def overloaded(request: Request, exc: Overloaded) -> JSONResponse:
+    """Reject work the LLM backend has no room for, telling the client when to retry."""
+    return JSONResponse({"detail": str(exc)}, status_code=429, headers={"Retry-After": str(exc.retry_after)})
 
 
 @app.get("/api/health")
@@ -20,5 +56,24 @@ async def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/api/metrics")
+async def prometheus_metrics() -> PlainTextResponse:
+    """Latency histograms in the Prometheus text exposition format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+if config.SERVER_TIMING:
+    @app.middleware("http")
+    async def server_timing(request: Request, call_next):
+        """Report the stages timed while handling the request in a Server-Timing header."""
+        spans = metrics.start_request()
+        response = await call_next(request)
+        if spans:
+            response.headers["Server-Timing"] = metrics.server_timing(spans)
+        return response
+
+
 frontend_dir = Path(__file__).resolve().parent.parent / "frontend"
 app.mount("/", StaticFiles(directory=frontend_dir, html=True), name="frontend")
+
+startup.record("import", time.perf_counter() - _import_started)
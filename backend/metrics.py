@@ -0,0 +1,176 @@
+"""In-process latency histograms, gauges, timing spans and Prometheus text exposition."""
+
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# Upper bounds (seconds) for LLM calls, searches and whole stages
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Finer bounds for SQLite work
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+
+class Histogram:
+    """A Prometheus-style histogram with one series per label combination."""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...], buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, seconds: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        slot = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][slot] += 1
+            series[1] += seconds
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        for key, counts, total in series:
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labels, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{labels}{"," if labels else ""}le="{le}"}} {cumulative}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total:.6f}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Gauge:
+    """A Prometheus-style gauge with one value per label combination."""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            labels = ",".join(f'{name}="{_escape(v)}"' for name, v in zip(self.labels, key))
+            lines.append(f"{self.name}{{{labels}}} {value:g}" if labels else f"{self.name} {value:g}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+HISTOGRAMS = {
+    "agent_stage": Histogram("calorie_agent_stage_seconds", "Duration of agent pipeline stages.", ("stage",)),
+    "llm_call": Histogram("calorie_llm_call_seconds", "Duration of LLM connector calls.",
+                          ("provider", "model", "purpose")),
+    "search": Histogram("calorie_search_seconds", "Duration of nutrition searches.", ("cache",)),
+    "db": Histogram("calorie_db_operation_seconds", "Duration of database operations.", ("operation",), DB_BUCKETS),
+    "llm_queue_wait": Histogram("calorie_llm_queue_wait_seconds", "Time LLM calls waited for a backend slot.",
+                                ("provider", "base_url", "priority")),
+}
+
+GAUGES = {
+    "llm_queue_depth": Gauge("calorie_llm_queue_depth", "LLM calls waiting for a backend slot.",
+                             ("provider", "base_url")),
+    "llm_active": Gauge("calorie_llm_active_calls", "LLM calls holding a backend slot.", ("provider", "base_url")),
+}
+
+# Spans recorded during the current request, when Server-Timing is enabled
+_request_spans: ContextVar[Optional[list]] = ContextVar("request_spans", default=None)
+
+
+@contextmanager
+def span(metric: str, timing_name: str, **labels: str) -> Iterator[dict]:
+    """
+    Time the enclosed block into histogram `metric`.
+
+    Yields the label dict so labels only known at the end (e.g. a cache
+    outcome) can still be set. `timing_name` names the span in the
+    Server-Timing header of the current request.
+    """
+    histogram = HISTOGRAMS[metric]
+    started = time.perf_counter()
+    try:
+        yield labels
+    finally:
+        elapsed = time.perf_counter() - started
+        histogram.observe(elapsed, **labels)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((timing_name, elapsed))
+
+
+def llm_call(connector, purpose: str):
+    """Span around one chat call of `connector`, labeled by provider and model."""
+    provider = getattr(connector, "provider", None) or type(connector).__name__
+    return span("llm_call", f"llm-{purpose}", provider=provider,
+                model=getattr(connector, "model", None) or "", purpose=purpose)
+
+
+def db_operation(operation: str):
+    """Span around one database operation."""
+    return span("db", f"db-{operation}", operation=operation)
+
+
+def start_request() -> list:
+    """Start collecting spans for Server-Timing in the current context."""
+    spans: list = []
+    _request_spans.set(spans)
+    return spans
+
+
+_TOKEN = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def server_timing(spans: list) -> str:
+    """Format collected spans as a Server-Timing header, summing repeated names."""
+    totals: dict[str, float] = {}
+    for name, elapsed in spans:
+        key = _TOKEN.sub("_", name)
+        totals[key] = totals.get(key, 0.0) + elapsed
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items())
+
+
+def render() -> str:
+    """Return every histogram and gauge in the Prometheus text exposition format."""
+    lines: list[str] = []
+    for metric in (*HISTOGRAMS.values(), *GAUGES.values()):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """Forget every observation (used by tests)."""
+    for metric in (*HISTOGRAMS.values(), *GAUGES.values()):
+        metric.reset()
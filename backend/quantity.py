@@ -0,0 +1,103 @@
+"""Parse quantities and units out of free-text food items."""
+
+import re
+from typing import NamedTuple, Optional
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "half": 0.5, "quarter": 0.25, "dozen": 12,
+}
+
+# Mass units and their weight in grams
+MASS_UNITS = {
+    "g": 1.0, "gram": 1.0, "grams": 1.0, "gr": 1.0,
+    "kg": 1000.0, "kilogram": 1000.0, "kilograms": 1000.0,
+    "oz": 28.35, "ounce": 28.35, "ounces": 28.35,
+    "lb": 453.6, "lbs": 453.6, "pound": 453.6, "pounds": 453.6,
+}
+
+# Household measures, normalized to the singular form used in serving descriptions
+HOUSEHOLD_UNITS = {
+    "cup": "cup", "cups": "cup",
+    "slice": "slice", "slices": "slice",
+    "tbsp": "tbsp", "tablespoon": "tbsp", "tablespoons": "tbsp",
+    "tsp": "tsp", "teaspoon": "tsp", "teaspoons": "tsp",
+    "container": "container", "containers": "container",
+    "serving": "serving", "servings": "serving",
+    "piece": "piece", "pieces": "piece",
+}
+
+_NUMBER = r"(?:\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?|\.\d+)"
+_MASS_RE = re.compile(rf"({_NUMBER})\s*({'|'.join(sorted(MASS_UNITS, key=len, reverse=True))})\b")
+_LEADING_RE = re.compile(rf"^({_NUMBER}|{'|'.join(NUMBER_WORDS)})\b\s*")
+
+
+class Quantity(NamedTuple):
+    # Number of units (or servings when unit is None); None when no amount was given
+    amount: Optional[float]
+    # "g" for masses (amount converted to grams), a household unit, or None
+    unit: Optional[str]
+    # The item text with the quantity and unit removed
+    food: str
+
+
+def parse_number(text: str) -> Optional[float]:
+    """Parse "2", "1.5", "1/2", "1 1/2" or a number word."""
+    text = text.strip().lower()
+    if text in NUMBER_WORDS:
+        return float(NUMBER_WORDS[text])
+    try:
+        if " " in text:
+            whole, frac = text.split(None, 1)
+            return float(whole) + parse_number(frac)
+        if "/" in text:
+            num, den = text.split("/", 1)
+            return float(num) / float(den)
+        return float(text)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+
+
+def parse_quantity(item: str) -> Quantity:
+    """
+    Split an item such as "2 boiled eggs", "150g chicken breast" or
+    "half a cup of oatmeal" into amount, unit and food phrase.
+    """
+    text = " ".join(item.lower().split())
+
+    # An explicit mass anywhere in the text wins ("chicken breast 200g")
+    mass = _MASS_RE.search(text)
+    if mass:
+        grams = parse_number(mass.group(1))
+        if grams is not None:
+            food = (text[:mass.start()] + text[mass.end():]).replace(" of ", " ")
+            return Quantity(grams * MASS_UNITS[mass.group(2)], "g", _clean(food))
+
+    match = _LEADING_RE.match(text)
+    # A number that does not parse ("1/0") stays part of the food phrase
+    amount = parse_number(match.group(1)) if match else None
+    if amount is not None:
+        text = text[match.end():]
+        # "half a cup", "a dozen eggs", "one and a half cups"
+        follow = re.match(r"^(?:and\s+a\s+half|a\s+half)\b\s*", text)
+        if follow:
+            amount += 0.5
+            text = text[follow.end():]
+        follow = re.match(r"^(?:a|an|dozen)\b\s*", text)
+        if follow:
+            amount *= 12 if follow.group(0).strip() == "dozen" else 1
+            text = text[follow.end():]
+
+    unit = None
+    words = text.split(" ", 1)
+    if words[0] in HOUSEHOLD_UNITS:
+        unit = HOUSEHOLD_UNITS[words[0]]
+        text = words[1] if len(words) > 1 else ""
+
+    return Quantity(amount, unit, _clean(text))
+
+
+def _clean(text: str) -> str:
+    text = re.sub(r"^of\s+", "", text.strip())
+    return " ".join(text.split())
@@ -0,0 +1,43 @@
+"""Administrative endpoints for caches and maintenance."""
+
+from fastapi import APIRouter
+
+from .. import chat_log, db, fastpath, singleflight, startup
+
+router = APIRouter()
+
+
+@router.get("/cache")
+def cache_stats() -> dict:
+    """Return hit/miss counters and size of the extraction cache."""
+    return db.extraction_cache_stats()
+
+
+@router.delete("/cache")
+def invalidate_cache(model: str | None = None) -> dict:
+    """Invalidate cached extractions, optionally only those produced by one model."""
+    return {"deleted": db.clear_extraction_cache(model)}
+
+
+@router.get("/chat-log")
+def chat_log_stats() -> dict:
+    """Return queue depth and write/drop counters of the background chat logger."""
+    return chat_log.writer.stats()
+
+
+@router.get("/startup")
+def startup_timings() -> dict:
+    """Return how long each startup phase took, in milliseconds."""
+    return startup.timings()
+
+
+@router.get("/fast-path")
+def fast_path_stats() -> dict:
+    """Return how many chat turns were planned without the intent LLM call."""
+    return fastpath.stats()
+
+
+@router.get("/single-flight")
+def single_flight_stats() -> dict:
+    """Return, per kind of work, how many calls ran and how many joined one already in flight."""
+    return singleflight.stats()
@@ -0,0 +1,189 @@
+"""Streaming export and import of entries and chat logs for backups."""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterator, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+
+from .. import chat_log, config, db, metrics
+from .entries import MAX_REPORTED_ERRORS, ingest_entries, ndjson_objects
+
+router = APIRouter()
+
+# Exported columns per table, in order (also the CSV header)
+TABLES = {
+    "entries": ("id", "name", "calories", "details", "protein", "carbs", "fat", "sugar", "created_at"),
+    "chat_logs": ("id", "user_message", "bot_response", "timestamp"),
+}
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+class ChatLogIn(BaseModel):
+    user_message: Optional[str] = None
+    bot_response: Optional[str] = None
+    timestamp: Optional[str] = None
+
+
+def _export_batches(tables: list[str], batch_size: int) -> Iterator[list[tuple[str, list]]]:
+    """Yield (table, rows) batches from one read snapshot, holding at most `batch_size` rows."""
+    # A dedicated connection: the export may run far longer than a request should hold a pooled one
+    conn = db.get_conn()
+    try:
+        # One read transaction, so tables are exported as of the same moment while writers continue
+        conn.execute("BEGIN")
+        for table in tables:
+            cur = conn.execute(f"SELECT {', '.join(TABLES[table])} FROM {table} ORDER BY id")
+            while True:
+                with metrics.db_operation("export_rows"):
+                    rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield table, rows
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def _ndjson_lines(tables: list[str], batch_size: int) -> Iterator[str]:
+    for table, rows in _export_batches(tables, batch_size):
+        yield "".join(json.dumps({"table": table, **dict(row)}) + "\n" for row in rows)
+
+
+def _csv_lines(table: str, batch_size: int) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(TABLES[table])
+    for _, rows in _export_batches([table], batch_size):
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _gzipped(lines: Iterator[str]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for text in lines:
+        data = compressor.compress(text.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@router.get("/export")
+def export_data(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    table: Literal["entries", "chat_logs"] | None = None,
+    compress: bool = Query(False, alias="gzip"),
+) -> StreamingResponse:
+    """
+    Stream a backup of entries and chat logs.
+
+    NDJSON has one object per row, tagged with its `table`; it covers both
+    tables unless `table` is given, and is what `/import` reads back. CSV
+    covers a single table and starts with a header row. With `gzip=true`
+    the download is gzip-compressed. Rows are read in batches from one
+    snapshot, so memory use does not grow with the size of the database.
+    """
+    if format == "csv" and table is None:
+        raise HTTPException(status_code=400, detail="CSV export covers one table; pass table=entries or table=chat_logs")
+    batch_size = max(1, config.EXPORT_BATCH_SIZE)
+    if format == "csv":
+        lines, media_type = _csv_lines(table, batch_size), "text/csv"
+    else:
+        lines, media_type = _ndjson_lines([table] if table else list(TABLES), batch_size), "application/x-ndjson"
+
+    filename = f"calorie-tracker-{table or 'backup'}-{datetime.now(timezone.utc):%Y%m%d}.{format}"
+    body: Iterator = lines
+    if compress:
+        body, media_type, filename = _gzipped(lines), "application/gzip", filename + ".gz"
+    # A sync iterator: Starlette pulls each batch in a worker thread
+    return StreamingResponse(body, media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+async def _decompressed(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Pass a request body through, gunzipping it as it arrives if it is gzip-compressed."""
+    decompressor = None
+    async for chunk in chunks:
+        if decompressor is None:
+            if not chunk:
+                continue
+            decompressor = zlib.decompressobj(wbits=31) if chunk.startswith(_GZIP_MAGIC) else False
+        if decompressor:
+            try:
+                chunk = decompressor.decompress(chunk)
+            except zlib.error as e:
+                raise HTTPException(status_code=400, detail=f"Invalid gzip data: {e}")
+        yield chunk
+
+
+@metrics.db_operation("insert_chat_logs")
+def insert_chat_log_rows(rows: list[tuple]) -> None:
+    """Write chat log rows in a single transaction."""
+    with db.transaction() as conn:
+        conn.executemany(chat_log.INSERT_LOG_SQL, rows)
+
+
+@router.post("/import")
+async def import_data(request: Request) -> dict:
+    """
+    Restore a backup written by `/export` in NDJSON, optionally gzip-compressed.
+
+    The body is read as it streams in and written in chunked transactions.
+    Rows are appended with new ids, so importing into a non-empty database
+    merges rather than replaces. Invalid rows are skipped and reported by
+    line number; rows without a `table` tag are treated as entries.
+    """
+    chunk_size = config.BULK_CHUNK_SIZE
+    logs: list[tuple] = []
+    counts = {"chat_logs": 0, "error_count": 0}
+    errors: list[dict] = []
+
+    def reject(row_no: int, error: str) -> None:
+        counts["error_count"] += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_no, "error": error})
+
+    async def entry_objects() -> AsyncIterator[tuple[int, object]]:
+        # Entries go on to ingest_entries; chat logs are buffered and written here
+        nonlocal logs
+        async for row_no, obj in ndjson_objects(_decompressed(request.stream())):
+            table = obj.pop("table", "entries") if isinstance(obj, dict) else "entries"
+            if table == "entries":
+                yield row_no, obj
+                continue
+            if table != "chat_logs":
+                reject(row_no, f"Unknown table {table!r}")
+                continue
+            try:
+                log = ChatLogIn.model_validate(obj)
+            except ValidationError as e:
+                reject(row_no, str(e))
+                continue
+            logs.append((log.user_message, log.bot_response, log.timestamp or db.utc_timestamp()))
+            if len(logs) >= chunk_size:
+                await run_in_threadpool(insert_chat_log_rows, logs)
+                counts["chat_logs"] += len(logs)
+                logs = []
+
+    result = await ingest_entries(entry_objects(), chunk_size)
+    if logs:
+        await run_in_threadpool(insert_chat_log_rows, logs)
+        counts["chat_logs"] += len(logs)
+    errors = sorted(result["errors"] + errors, key=lambda error: error["row"])[:MAX_REPORTED_ERRORS]
+    return {
+        "entries": result["inserted"],
+        "chat_logs": counts["chat_logs"],
+        "error_count": result["error_count"] + counts["error_count"],
+        "errors": errors,
+    }
@@ -1,24 +1,30 @@
 """Endpoints for the chat agent."""
 
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Any
+from typing import AsyncIterator, List, Optional, Any
+import json
 import logging
+import threading
 
 # Adjust import to be relative or absolute depending on how app is run
 try:
     from ..agent import Agent
-    from .. import db
+    from .. import chat_log, db
+    from ..llm import Overloaded
+    from .llm import connectors
 except ImportError:
     from backend.agent import Agent
-    from backend import db
+    from backend import chat_log, db
+    from backend.llm import Overloaded
+    from backend.routers.llm import connectors
 
 router = APIRouter()
 
-# Instantiate the agent globally or per request
-# For this V1, we use a global instance which might be configured via env vars
-# We default to 'ollama' as the preferred local provider
-agent = Agent(provider="ollama")
+# Agents are reused per (provider, model) for as long as their connector stays registered
+_agents: dict[tuple, Agent] = {}
+_agents_lock = threading.Lock()
 
 class Message(BaseModel):
     role: str
@@ -47,66 +53,112 @@ class MealPlan(BaseModel):
     total_fat: float
     total_sugar: float
 
+class PromptUsage(BaseModel):
+    prompt_tokens: int
+    kept: int
+    summarized: int
+    dropped: int
+
 class ChatResponse(BaseModel):
     text: str
     draft_entry: Optional[MealPlan] = None
+    usage: Optional[PromptUsage] = None
 
 @router.post("/message", response_model=ChatResponse)
-def chat_message(req: ChatRequest):
+async def chat_message(req: ChatRequest):
     """
     Process a user message through the Agent pipeline.
     """
-    # 1. Log User Message
-    last_msg = req.messages[-1]
-    log_id = None
-    if last_msg.role == 'user':
-        log_id = log_user_message(last_msg.content)
+    # 1. Note the user message; the turn is logged once the reply is known
+    user_message, started = _user_turn(req)
 
     # 2. Re-configure agent if provider changed
-    # (In a real app, we might pool agents or pass config to process_message)
-    # Here we just create a new one for simplicity if needed, or use the global one.
-    # To support the `provider` param:
-    provider_to_use = req.provider or "ollama"
-    try:
-        current_agent = Agent(provider=provider_to_use, model=req.model)
-    except Exception:
-        # Fallback to local (dummy) if provider init fails
-        current_agent = Agent(provider="local")
+    current_agent = _agent_for(req)
 
     # 3. Process
     # Convert Pydantic models to dicts
     history_dicts = [m.model_dump() for m in req.messages]
-    response_data = current_agent.process_message(history_dicts)
-
-    # 4. Log Bot Response (Update the specific row if we created one, else new row)
-    log_bot_response(log_id, response_data['text'])
+    response_data = None
+    try:
+        response_data = await current_agent.aprocess_message(history_dicts)
+    finally:
+        # 4. Log the turn in the background; a failed turn still records the user message
+        _log_turn(user_message, response_data['text'] if response_data else None, started)
 
     return response_data
 
-def log_user_message(msg: str) -> Optional[int]:
-    """Log user message and return the row ID."""
+@router.post("/stream")
+async def chat_stream(req: ChatRequest):
+    """
+    Process a user message like /message, streaming progress as Server-Sent Events.
+
+    Each event's `data` is JSON. The final `done` event carries the same
+    payload /message would return. If the LLM backend becomes overloaded
+    mid-stream, an `error` event with `retry_after` seconds ends it instead.
+    """
+    user_message, started = _user_turn(req)
+    current_agent = _agent_for(req)
+    history_dicts = [m.model_dump() for m in req.messages]
+    stream = current_agent.astream_message(history_dicts)
+    # Wait for the first event before answering, so an overloaded LLM backend is still a 429
     try:
-        conn = db.get_conn()
-        cur = conn.cursor()
-        cur.execute("INSERT INTO chat_logs (user_message) VALUES (?)", (msg,))
-        row_id = cur.lastrowid
-        conn.commit()
-        conn.close()
-        return row_id
-    except Exception as e:
-        print(f"Logging error (User): {e}")
-        return None
-
-def log_bot_response(row_id: Optional[int], msg: str):
-    """Log bot response, updating the row if ID is provided."""
+        first = await anext(stream)
+    except BaseException:
+        _log_turn(user_message, None, started)
+        raise
+
+    async def events() -> AsyncIterator[str]:
+        reply = None
+        try:
+            event = first
+            while True:
+                if event["event"] == "done":
+                    reply = event["data"]['text']
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+                event = await anext(stream)
+        except StopAsyncIteration:
+            pass
+        except Overloaded as e:
+            # Headers are already sent; tell the client in-band when to retry
+            yield f"event: error\ndata: {json.dumps({'detail': str(e), 'retry_after': e.retry_after})}\n\n"
+        finally:
+            _log_turn(user_message, reply, started)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Disable caching and proxy buffering so events reach the client immediately
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _agent_for(req: ChatRequest) -> Agent:
+    """Return an agent for the provider and model requested by the client."""
+    # We default to 'ollama' as the preferred local provider
+    key = (req.provider or "ollama", req.model)
+    with _agents_lock:
+        agent = _agents.get(key)
+        if agent is not None and connectors.touch(agent.connector):
+            return agent
     try:
-        conn = db.get_conn()
-        cur = conn.cursor()
-        if row_id:
-            cur.execute("UPDATE chat_logs SET bot_response = ? WHERE id = ?", (msg, row_id))
-        else:
-            cur.execute("INSERT INTO chat_logs (bot_response) VALUES (?)", (msg,))
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        print(f"Logging error (Bot): {e}")
+        agent = Agent(provider=key[0], model=key[1])
+    except Exception:
+        # Fallback to local (dummy) if provider init fails
+        return Agent(provider="local")
+    with _agents_lock:
+        # Forget agents whose connector was evicted from the registry
+        for stale in [k for k, a in _agents.items() if not connectors.touch(a.connector)]:
+            del _agents[stale]
+        _agents[key] = agent
+    return agent
+
+def _user_turn(req: ChatRequest) -> tuple[Optional[str], str]:
+    """Return the message this turn answers (if the user sent one) and when it arrived."""
+    last_msg = req.messages[-1]
+    return (last_msg.content if last_msg.role == 'user' else None), db.utc_timestamp()
+
+def _log_turn(user_message: Optional[str], bot_response: Optional[str], timestamp: str) -> None:
+    """Queue one chat_logs row; the write-behind writer persists it off the request path."""
+    if user_message is None and bot_response is None:
+        return
+    if not chat_log.writer.record(user_message, bot_response, timestamp):
+        print("Logging error: chat log queue is full, turn dropped")
@@ -1,10 +1,15 @@
 """Endpoints for meal entry management."""
 
-from fastapi import APIRouter
-from pydantic import BaseModel
-from typing import Optional
+import json
+import sqlite3
+from datetime import date, datetime, time
+from typing import AsyncIterator, Literal, Optional
 
-from .. import calorie_engine, db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+
+from .. import calorie_engine, config, db, metrics
 
 router = APIRouter()
 
@@ -19,50 +24,223 @@ class EntryIn(BaseModel):
     carbs: Optional[float] = 0.0
     fat: Optional[float] = 0.0
     sugar: Optional[float] = 0.0
+    # When the meal was eaten (UTC if no timezone is given); defaults to now
+    created_at: Optional[datetime] = None
 
 
-@router.post("/")
-def add_entry(data: EntryIn) -> dict:
-    """Store a meal entry and return its identifier and calories."""
-    # If nutrition object is provided, calculate calories (legacy support)
-    if data.calories is None and data.nutrition:
-        cal = calorie_engine.calories(data.nutrition)
-    else:
-        cal = data.calories or 0
+INSERT_ENTRY_SQL = """
+    INSERT INTO entries
+    (name, calories, details, protein, carbs, fat, sugar, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Per-row errors reported by bulk ingestion; beyond this only the count grows
+MAX_REPORTED_ERRORS = 1000
+
+
+def entry_rows(entries: list[EntryIn]) -> list[tuple]:
+    """Return the INSERT parameters for entries, computing calories where needed."""
+    # Entries without calories but with a nutrition object (legacy support) are computed in one batch
+    legacy = [i for i, data in enumerate(entries) if data.calories is None and data.nutrition]
+    computed = dict(zip(legacy, calorie_engine.batch_calories(
+        [entries[i].nutrition.protein for i in legacy],
+        [entries[i].nutrition.carbs for i in legacy],
+        [entries[i].nutrition.fat for i in legacy],
+    )))
 
     # Use provided macros or default to 0
-    prot = data.protein or 0.0
-    carb = data.carbs or 0.0
-    fat = data.fat or 0.0
-    sugar = data.sugar or 0.0
-
-    conn = db.get_conn()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO entries
-        (name, calories, details, protein, carbs, fat, sugar)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        """,
-        (data.name, cal, data.details or "", prot, carb, fat, sugar),
-    )
-    conn.commit()
+    return [
+        (data.name, computed.get(i, data.calories or 0), data.details or "",
+         data.protein or 0.0, data.carbs or 0.0, data.fat or 0.0, data.sugar or 0.0,
+         db.utc_timestamp(data.created_at))
+        for i, data in enumerate(entries)
+    ]
+
+
+def entry_row(data: EntryIn) -> tuple:
+    """Return the INSERT parameters for a single entry."""
+    return entry_rows([data])[0]
+
+
+@metrics.db_operation("insert_entries")
+def insert_entry_rows(rows: list[tuple]) -> None:
+    """Write prepared entry rows in a single transaction."""
+    with db.transaction() as conn:
+        conn.executemany(INSERT_ENTRY_SQL, rows)
+
+
+@router.post("/")
+def add_entry(data: EntryIn, conn: sqlite3.Connection = Depends(db.get_db)) -> dict:
+    """Store a meal entry and return its identifier and calories."""
+    row = entry_row(data)
+    with metrics.db_operation("add_entry"), conn:
+        cur = conn.execute(INSERT_ENTRY_SQL, row)
     entry_id = cur.lastrowid
-    conn.close()
-    return {"id": entry_id, "calories": cal}
+    return {"id": entry_id, "calories": row[1]}
+
+
+async def ndjson_objects(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, object]]:
+    """Yield (line number, parsed value) from streamed NDJSON bytes, skipping blank lines."""
+    buffer = b""
+    line_no = 0
+
+    def parse(line: bytes):
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            return e
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, parse(line)
+    if buffer.strip():
+        yield line_no + 1, parse(buffer)
+
+
+async def _json_array_objects(request: Request) -> AsyncIterator[tuple[int, object]]:
+    try:
+        items = json.loads(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of entries")
+    for i, item in enumerate(items, start=1):
+        yield i, item
+
+
+async def ingest_entries(objects: AsyncIterator[tuple[int, object]], chunk_size: int | None = None) -> dict:
+    """Validate entries and write them in chunked transactions, collecting per-row errors."""
+    chunk_size = chunk_size or config.BULK_CHUNK_SIZE
+    inserted = 0
+    error_count = 0
+    errors: list[dict] = []
+    chunk: list[EntryIn] = []
+
+    async for row_no, obj in objects:
+        try:
+            if isinstance(obj, Exception):
+                raise obj
+            chunk.append(EntryIn.model_validate(obj))
+        except (ValidationError, ValueError) as e:
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"row": row_no, "error": str(e)})
+            continue
+        if len(chunk) >= chunk_size:
+            await run_in_threadpool(insert_entry_rows, entry_rows(chunk))
+            inserted += len(chunk)
+            chunk = []
+
+    if chunk:
+        await run_in_threadpool(insert_entry_rows, entry_rows(chunk))
+        inserted += len(chunk)
+    return {"inserted": inserted, "error_count": error_count, "errors": errors}
+
+
+@router.post("/bulk")
+async def add_entries_bulk(request: Request) -> dict:
+    """
+    Store many entries at once.
+
+    The body is either a JSON array of entries or, with an
+    `application/x-ndjson` content type, one entry per line streamed as it
+    arrives. Rows are numbered from 1 (array index or line number) in the
+    reported errors; invalid rows are skipped and valid ones are kept.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return await ingest_entries(ndjson_objects(request.stream()))
+    return await ingest_entries(_json_array_objects(request))
+
+
+def _bound(value: date | datetime) -> str:
+    """Convert a date (midnight) or datetime query bound to the stored timestamp format."""
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    return db.utc_timestamp(value)
 
 
 @router.get("/")
-def list_entries() -> list[dict]:
-    """Return all meal entries in reverse chronological order."""
-    conn = db.get_conn()
-    cur = conn.cursor()
-    rows = cur.execute(
-        """
-        SELECT id, name, calories, details, protein, carbs, fat, sugar
-        FROM entries
-        ORDER BY id DESC
-        """
-    ).fetchall()
-    conn.close()
+def list_entries(
+    response: Response,
+    start: datetime | date | None = None,
+    end: datetime | date | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    before_id: int | None = None,
+    conn: sqlite3.Connection = Depends(db.get_db),
+) -> list[dict]:
+    """
+    Return meal entries in reverse chronological order, one page at a time.
+
+    Entries are ordered by `created_at`, then id for entries created in the
+    same second. `start` is inclusive and `end` exclusive; plain dates mean
+    midnight UTC. Pass the id of the last entry of a page as `before_id` to
+    fetch the next one; the `X-Next-Before-Id` header carries it when more
+    rows may follow.
+    """
+    clauses, params = [], []
+    if start is not None:
+        clauses.append("created_at >= ?")
+        params.append(_bound(start))
+    if end is not None:
+        clauses.append("created_at < ?")
+        params.append(_bound(end))
+
+    with metrics.db_operation("list_entries"):
+        if before_id is not None:
+            cursor = conn.execute("SELECT created_at FROM entries WHERE id = ?", (before_id,)).fetchone()
+            if cursor is None:
+                raise HTTPException(status_code=404, detail="Cursor entry no longer exists; restart the listing")
+            # Keyset on the (created_at, id) index
+            clauses.append("(created_at, id) < (?, ?)")
+            params.extend((cursor["created_at"], before_id))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = conn.execute(
+            f"""
+            SELECT id, name, calories, details, protein, carbs, fat, sugar, created_at
+            FROM entries
+            {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+            """,
+            (*params, limit),
+        ).fetchall()
+    if len(rows) == limit:
+        response.headers["X-Next-Before-Id"] = str(rows[-1]["id"])
     return [dict(row) for row in rows]
+
+
+# Tables searched for each `scope` of /search
+SEARCH_SCOPES = {"entries": ("entries",), "chat_logs": ("chat_logs",), "all": ("entries", "chat_logs")}
+
+
+@router.get("/search")
+def search_entries(
+    response: Response,
+    q: str = Query(..., min_length=1),
+    scope: Literal["entries", "chat_logs", "all"] = "entries",
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+) -> list[dict]:
+    """
+    Full-text search over meal names and details, chat history, or both.
+
+    Every word of `q` must match (word forms are stemmed, so "eggs" finds
+    "egg"); results are ranked best first. `snippet` is HTML: the stored
+    text is escaped and matches are wrapped in <mark> tags.
+    Pass the `X-Next-Offset` header value as `offset` to fetch the next page.
+    """
+    results = db.search(q, SEARCH_SCOPES[scope], limit, offset)
+    if len(results) == limit:
+        response.headers["X-Next-Offset"] = str(offset + limit)
+    return results
+
+
+@router.post("/search/rebuild")
+def rebuild_search_index() -> dict:
+    """Re-index all entries and chat logs, e.g. after editing the database outside the app."""
+    return db.rebuild_search_index()
@@ -3,32 +3,81 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 
-from ..llm import OpenAIConnector, LocalConnector, LLMConnector, OllamaConnector
+from .. import config, metrics
+from ..llm import (ConnectorRegistry, OpenAIConnector, LocalConnector, LLMConnector, OllamaConnector,
+                   OllamaPoolConnector, scheduler)
 
 router = APIRouter()
 
 
-def get_connector(provider: str = "local", base_url: str | None = None, model: str | None = None) -> LLMConnector:
-    """Return an LLM connector for the requested provider."""
-    if provider == "openai":
+_openai_client = None
+
+
+def _get_openai_client():
+    """Return the process-wide OpenAI client, creating it on first use."""
+    global _openai_client
+    if _openai_client is None:
         try:
             import openai
         except Exception:  # pragma: no cover - optional dependency
             raise RuntimeError("openai package not installed")
-        client = openai.OpenAI()
-        return OpenAIConnector(client)
+        _openai_client = openai.OpenAI()
+    return _openai_client
+
+
+def _build_connector(provider: str, base_url: str | None, model: str | None) -> LLMConnector:
+    if provider == "openai":
+        return OpenAIConnector(_get_openai_client())
     if provider == "ollama":
-        return OllamaConnector(base_url or "http://localhost:11434", model or "llama3.2:latest")
+        # Several comma-separated URLs are served as one load-balanced backend
+        urls = [url.strip() for url in base_url.split(",") if url.strip()]
+        if len(urls) > 1:
+            return OllamaPoolConnector(urls, model)
+        return OllamaConnector(base_url, model)
     return LocalConnector()
 
 
+# Connectors are shared across requests so their HTTP pools stay warm
+connectors = ConnectorRegistry(_build_connector)
+
+
+def get_connector(provider: str = "local", base_url: str | None = None, model: str | None = None) -> LLMConnector:
+    """Return the shared LLM connector for the requested provider."""
+    if provider == "openai":
+        # The OpenAI connector always uses the client's configured endpoint and default model
+        return connectors.get("openai")
+    if provider == "ollama":
+        return connectors.get("ollama", base_url or config.OLLAMA_BASE_URLS, model or "llama3.2:latest")
+    return connectors.get("local")
+
+
 class ChatRequest(BaseModel):
     messages: list[dict]
 
 
 @router.post("/chat")
-def chat(req: ChatRequest, provider: str = "local", base_url: str | None = None, model: str | None = None) -> dict:
+async def chat(req: ChatRequest, provider: str = "local", base_url: str | None = None, model: str | None = None) -> dict:
     """Proxy chat messages to the selected LLM provider."""
     connector = get_connector(provider, base_url, model)
-    reply = connector.chat(req.messages)
+    # Overloaded is raised before the backend is called, so it does not count against its health
+    async with scheduler.for_connector(connector).aslot(scheduler.INTERACTIVE):
+        try:
+            with metrics.llm_call(connector, "proxy"):
+                reply = await connector.achat(req.messages)
+        except Exception as e:
+            connectors.report(connector, False, str(e))
+            raise
+    connectors.report(connector, True)
     return {"reply": reply}
+
+
+@router.get("/connectors")
+async def connector_status() -> list[dict]:
+    """List the live connectors and the health of their backends."""
+    return connectors.status()
+
+
+@router.get("/schedulers")
+async def scheduler_status() -> list[dict]:
+    """Concurrency, queue depth and admission counters per LLM backend."""
+    return scheduler.stats()
@@ -0,0 +1,71 @@
+"""Endpoints for daily, weekly and monthly nutrition rollups."""
+
+from array import array
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi import APIRouter, HTTPException
+
+from .. import calorie_engine, db
+
+router = APIRouter()
+
+TOTAL_FIELDS = ("entries", "calories", "protein", "carbs", "fat", "sugar")
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def rollup(start: date, end: date) -> dict:
+    """Sum the precomputed per-day totals for the inclusive range [start, end]."""
+    days = db.daily_totals(start.isoformat(), end.isoformat())
+    columns = {field: array("d", (day[field] for day in days)) for field in TOTAL_FIELDS}
+    totals = calorie_engine.totals(columns)
+    for field in TOTAL_FIELDS[1:]:
+        totals[field] = round(totals[field], 1)
+    totals["calories"] = int(totals["calories"])
+    totals["entries"] = int(totals["entries"])
+    # Share of macronutrient energy from protein, carbs and fat over the whole range
+    split = calorie_engine.macro_split(totals["protein"], totals["carbs"], totals["fat"])
+    energy_split = {name: round(ratio, 3) for name, ratio in split.items()}
+    return {"start": start.isoformat(), "end": end.isoformat(), **totals, "energy_split": energy_split, "days": days}
+
+
+@router.get("/day")
+def day_summary(day: date | None = None) -> dict:
+    """Totals for a single UTC day (default: today)."""
+    day = day or _today()
+    return rollup(day, day)
+
+
+@router.get("/week")
+def week_summary(day: date | None = None) -> dict:
+    """Totals for the Monday-to-Sunday week containing `day` (default: this week)."""
+    day = day or _today()
+    monday = day - timedelta(days=day.weekday())
+    return rollup(monday, monday + timedelta(days=6))
+
+
+@router.get("/month")
+def month_summary(month: str | None = None) -> dict:
+    """Totals for a calendar month given as YYYY-MM (default: this month)."""
+    try:
+        first = datetime.strptime(month, "%Y-%m").date() if month else _today().replace(day=1)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="month must be formatted as YYYY-MM")
+    next_month = (first + timedelta(days=32)).replace(day=1)
+    return rollup(first, next_month - timedelta(days=1))
+
+
+@router.get("/range")
+def range_summary(start: date, end: date) -> dict:
+    """Totals and per-day rows for an arbitrary inclusive date range."""
+    if end < start:
+        raise HTTPException(status_code=422, detail="end must not be before start")
+    return rollup(start, end)
+
+
+@router.post("/rebuild")
+def rebuild() -> dict:
+    """Recompute all per-day totals from the entries table, e.g. after a backfill."""
+    return {"days": db.rebuild_daily_totals()}
@@ -1,11 +1,141 @@
 """Search engine wrapper for online nutritional lookups."""
 
-from ddgs import DDGS
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Protocol
+
+try:
+    from . import config, db, metrics
+except ImportError:
+    from backend import config, db, metrics
+
+
+class SnippetProvider(Protocol):
+    """Source of nutrition snippets for a search query."""
+
+    def search(self, query: str, max_results: int) -> list[str]:
+        """Return snippets for `query`; raise on failure so errors are not cached."""
+        ...
+
+
+class DDGSProvider:
+    """Live DuckDuckGo search through a single shared client."""
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                # Imported lazily: ddgs pulls in heavy HTTP and HTML parsing dependencies
+                from ddgs import DDGS
+                self._client = DDGS()
+            return self._client
+
+    def search(self, query: str, max_results: int) -> list[str]:
+        results = self._get_client().text(query, max_results=max_results)
+        snippets = []
+        if results:
+            for r in results:
+                title = r.get('title', '')
+                body = r.get('body', '')
+                snippets.append(f"Title: {title}\nSnippet: {body}")
+        return snippets
+
+
+class OfflineProvider:
+    """Serve snippets from a fixed mapping, for tests and air-gapped deployments."""
+
+    def __init__(self, snippets: dict[str, list[str]]):
+        self.snippets = {normalize_query(k): list(v) for k, v in snippets.items()}
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "OfflineProvider":
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def search(self, query: str, max_results: int) -> list[str]:
+        query = normalize_query(query)
+        if query in self.snippets:
+            return self.snippets[query][:max_results]
+        # Otherwise use the longest known key contained in the query
+        matches = [k for k in self.snippets if k and k in query]
+        if not matches:
+            return []
+        return self.snippets[max(matches, key=len)][:max_results]
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so repeated queries share a cache entry."""
+    return " ".join(query.lower().split())
+
+
+def _default_provider() -> SnippetProvider:
+    if config.SEARCH_OFFLINE_SNIPPETS:
+        return OfflineProvider.from_file(config.SEARCH_OFFLINE_SNIPPETS)
+    return DDGSProvider()
+
+
+# Resolved on first use, so a bad offline snippets file fails searches rather than startup
+_provider: Optional[SnippetProvider] = None
+_provider_lock = threading.Lock()
+_refreshing: set[str] = set()
+_refresh_lock = threading.Lock()
+
+
+def get_provider() -> SnippetProvider:
+    """Return the active snippet provider, creating the configured one on first use."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = _default_provider()
+        return _provider
+
+
+def set_provider(provider: Optional[SnippetProvider]) -> Optional[SnippetProvider]:
+    """Replace the active snippet provider and return the previous one (None to use the configured one)."""
+    global _provider
+    with _provider_lock:
+        previous, _provider = _provider, provider
+    return previous
+
+
+def _fetch(cache_key: str, search_query: str, max_results: int) -> list[str]:
+    """Query the provider and cache non-empty results. Raises on provider errors."""
+    snippets = get_provider().search(search_query, max_results)
+    if snippets:
+        db.put_cached_search(cache_key, snippets)
+    return snippets
+
+
+def _refresh_in_background(cache_key: str, search_query: str, max_results: int) -> None:
+    with _refresh_lock:
+        if cache_key in _refreshing:
+            return
+        _refreshing.add(cache_key)
+
+    def run():
+        try:
+            _fetch(cache_key, search_query, max_results)
+        except Exception as e:
+            print(f"Search refresh error: {e}")
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(cache_key)
+
+    threading.Thread(target=run, name="search-refresh", daemon=True).start()
+
 
 def search_nutrition(query: str, max_results: int = 3) -> list[str]:
     """
     Search DuckDuckGo for nutritional information.
 
+    Results are cached on disk. Fresh entries are returned directly; stale
+    entries are returned immediately while a background refresh runs.
+
     Args:
         query: The food item to search for (e.g., "nutrition facts fried egg").
         max_results: Number of results to return.
@@ -19,18 +149,27 @@ def search_nutrition(query: str, max_results: int = 3) -> list[str]:
     else:
         search_query = query
 
-    try:
-        results = DDGS().text(search_query, max_results=max_results)
-        snippets = []
-        if results:
-            for r in results:
-                title = r.get('title', '')
-                body = r.get('body', '')
-                snippets.append(f"Title: {title}\nSnippet: {body}")
-        return snippets
-    except Exception as e:
-        print(f"Search error: {e}")
-        return []
+    cache_key = f"{normalize_query(search_query)}|{max_results}"
+    with metrics.span("search", "search", cache="miss") as labels:
+        cached = db.get_cached_search(cache_key) if config.SEARCH_CACHE_MAX_STALE > 0 else None
+        if cached is not None:
+            snippets, fetched_at = cached
+            age = time.time() - fetched_at
+            if age <= config.SEARCH_CACHE_TTL:
+                labels["cache"] = "hit"
+                return snippets
+            if age <= config.SEARCH_CACHE_MAX_STALE:
+                labels["cache"] = "stale"
+                _refresh_in_background(cache_key, search_query, max_results)
+                return snippets
+
+        try:
+            return _fetch(cache_key, search_query, max_results)
+        except Exception as e:
+            print(f"Search error: {e}")
+            labels["cache"] = "error"
+            # A failed refetch still beats no context at all
+            return cached[0] if cached is not None else []
 
 if __name__ == "__main__":
     # Simple test
@@ -0,0 +1,28 @@
+"""Per-phase timings of application startup."""
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+# Phase name -> milliseconds, in the order the phases ran
+_timings: dict[str, float] = {}
+
+
+def record(name: str, seconds: float) -> None:
+    """Record how long a startup phase took."""
+    _timings[name] = round(seconds * 1000, 2)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time the enclosed block as startup phase `name`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def timings() -> dict[str, float]:
+    """Return the recorded phases in milliseconds."""
+    return dict(_timings)
@@ -0,0 +1 @@
+"""Offline benchmarks for the backend hot paths (run with ``python -m benchmarks.run``)."""
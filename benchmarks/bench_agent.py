@@ -0,0 +1,23 @@
+"""Latency of `Agent.process_message` for meals of growing size."""
+
+from unittest.mock import patch
+
+from backend.agent import Agent
+
+from .common import FakeConnector, fake_search, measure, scratch_database
+
+ITEM_COUNTS = (1, 5, 20)
+
+
+def run(quick: bool = False, latency: float = 0.02) -> dict:
+    runs = 3 if quick else 10
+    results = {}
+    with scratch_database():
+        for count in ITEM_COUNTS:
+            connector = FakeConnector([f"bench item {i}" for i in range(count)], latency)
+            with patch("backend.agent.get_connector", return_value=connector), \
+                    patch("backend.agent.search_nutrition", side_effect=fake_search):
+                bot = Agent(provider="local")
+                history = [{"role": "user", "content": f"I had {count} things"}]
+                results[f"{count}_items"] = measure(lambda i: bot.process_message(history), runs)
+    return {"connector_latency_ms": latency * 1000, "results": results}
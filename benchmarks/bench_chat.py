@@ -0,0 +1,33 @@
+"""End-to-end requests per second of POST /api/chat/message through TestClient."""
+
+import time
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+
+from .common import FakeConnector, fake_search, scratch_database, summarize
+
+SCENARIOS = {"chitchat": [], "3_items": ["bench soup", "bench bread", "bench salad"]}
+
+
+def run(quick: bool = False, latency: float = 0.0) -> dict:
+    requests = 30 if quick else 200
+    client = TestClient(app)
+    results = {}
+    with scratch_database():
+        for name, items in SCENARIOS.items():
+            connector = FakeConnector(items, latency)
+            body = {"messages": [{"role": "user", "content": "I had lunch"}]}
+            with patch("backend.agent.get_connector", return_value=connector), \
+                    patch("backend.agent.search_nutrition", side_effect=fake_search):
+                client.post("/api/chat/message", json=body)
+                samples = []
+                for _ in range(requests):
+                    started = time.perf_counter()
+                    resp = client.post("/api/chat/message", json=body)
+                    samples.append(time.perf_counter() - started)
+                    resp.raise_for_status()
+            results[name] = summarize(samples)
+    return {"connector_latency_ms": latency * 1000, "results": results}
@@ -0,0 +1,40 @@
+"""Throughput of the batch calorie engine against the per-row calculation."""
+
+import random
+import time
+from array import array
+
+from backend import calorie_engine
+from backend.calorie_engine import Nutrition
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ROWS = (1_000, 100_000)
+
+
+def _rate(rows: int, seconds: float) -> float:
+    return round(rows / seconds, 1) if seconds else float("inf")
+
+
+def run(quick: bool = False) -> dict:
+    rng = random.Random(3)
+    results = {}
+    for rows in ROWS[:1] if quick else ROWS:
+        protein, carbs, fat = (array("d", (rng.uniform(0, 50) for _ in range(rows))) for _ in range(3))
+        started = time.perf_counter()
+        [calorie_engine.calories(Nutrition(p, c, f)) for p, c, f in zip(protein, carbs, fat)]
+        per_row = time.perf_counter() - started
+        started = time.perf_counter()
+        calorie_engine.batch_calories(protein, carbs, fat)
+        batch = time.perf_counter() - started
+        results[f"{rows}_rows"] = {"per_row_rows_per_sec": _rate(rows, per_row),
+                                   "batch_rows_per_sec": _rate(rows, batch)}
+        if np is not None:
+            columns = [np.frombuffer(column) for column in (protein, carbs, fat)]
+            started = time.perf_counter()
+            calorie_engine.batch_calories(*columns)
+            results[f"{rows}_rows"]["numpy_rows_per_sec"] = _rate(rows, time.perf_counter() - started)
+    return {"results": results}
@@ -0,0 +1,56 @@
+"""Throughput of `add_entry`, `list_entries` and text search as the entries table grows."""
+
+from fastapi import Response
+
+from backend import db
+from backend.routers import entries
+
+from .common import measure, scratch_database
+
+TABLE_SIZES = (1_000, 10_000, 100_000)
+QUICK_TABLE_SIZES = (1_000, 10_000)
+
+
+# One row in RARE_EVERY mentions salmon; every row mentions food
+RARE_EVERY = 1000
+
+
+def _fill(target: int, current: int) -> None:
+    rows = [(f"food {i}", 100 + i % 400, "grilled salmon" if i % RARE_EVERY == 0 else "", 5.0, 20.0, 3.0, 2.0,
+             db.utc_timestamp())
+            for i in range(current, target)]
+    for start in range(0, len(rows), 5000):
+        entries.insert_entry_rows(rows[start:start + 5000])
+
+
+def run(quick: bool = False) -> dict:
+    runs = 100 if quick else 500
+    results = {}
+    with scratch_database():
+        size = 0
+        for target in QUICK_TABLE_SIZES if quick else TABLE_SIZES:
+            _fill(target, size)
+            size = target
+            with db.connection() as conn:
+                def add(i: int) -> None:
+                    entries.add_entry(entries.EntryIn(name=f"bench {i}", calories=250, protein=10.0), conn)
+
+                def first_page(i: int) -> None:
+                    entries.list_entries(Response(), None, None, 100, None, conn)
+
+                def deep_page(i: int) -> None:
+                    entries.list_entries(Response(), None, None, 100, size // 2, conn)
+
+                def like_scan(i: int) -> None:
+                    conn.execute("SELECT id FROM entries WHERE details LIKE '%salmon%' LIMIT 20").fetchall()
+
+                results[f"{target}_rows"] = {
+                    "add_entry": measure(add, runs),
+                    "list_entries_first_page": measure(first_page, runs),
+                    "list_entries_deep_page": measure(deep_page, runs),
+                    "search_rare_term": measure(lambda i: db.search("salmon"), runs),
+                    "search_common_term": measure(lambda i: db.search("food"), runs),
+                    "like_scan_baseline": measure(like_scan, runs),
+                }
+            size += runs + 1
+    return {"results": results}
@@ -0,0 +1,44 @@
+"""Build time and lookup throughput of the food index at growing table sizes."""
+
+import random
+import time
+
+from backend.food_index import FoodIndex
+
+from .common import summarize
+
+SIZES = (20, 10_000, 500_000)
+QUICK_SIZES = (20, 10_000, 50_000)
+
+_WORDS = ("apple", "banana", "bread", "butter", "cheese", "chicken", "egg", "fish", "milk", "oat",
+          "pasta", "potato", "rice", "salad", "soup", "steak", "tofu", "tomato", "yogurt", "bean")
+_STYLES = ("", "boiled", "fried", "baked", "grilled", "raw", "roasted", "steamed", "sweet", "spicy")
+
+
+def food_names(count: int, seed: int = 7) -> list[str]:
+    """Deterministic, distinct food names such as 'grilled cheese oat 412'."""
+    rng = random.Random(seed)
+    names = []
+    for i in range(count):
+        parts = [rng.choice(_STYLES), rng.choice(_WORDS), rng.choice(_WORDS)]
+        names.append(" ".join(p for p in parts if p) + (f" {i}" if i >= 20 else ""))
+    return names
+
+
+def run(quick: bool = False, lookups: int = 2000) -> dict:
+    rng = random.Random(11)
+    results = {}
+    for size in QUICK_SIZES if quick else SIZES:
+        names = food_names(size)
+        started = time.perf_counter()
+        index = FoodIndex(names)
+        build = time.perf_counter() - started
+        # Half the queries contain a known food, half are misses
+        queries = [f"2 portions of {rng.choice(names)}" if i % 2 else f"unknown dish {i}" for i in range(lookups)]
+        samples = []
+        for query in queries:
+            t = time.perf_counter()
+            index.best(query)
+            samples.append(time.perf_counter() - t)
+        results[f"{size}_foods"] = {"build_ms": round(build * 1000, 1), **summarize(samples)}
+    return {"results": results}
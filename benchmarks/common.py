@@ -0,0 +1,88 @@
+"""Shared helpers for the offline benchmarks: timing, a scratch database and fake LLMs."""
+
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+from backend import agent, chat_log, db
+
+
+def summarize(samples: list[float]) -> dict:
+    """Summarize per-operation durations (seconds) in milliseconds."""
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        "runs": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "ops_per_sec": round(len(ordered) / total, 1) if total else None,
+    }
+
+
+def measure(fn: Callable[[int], object], runs: int, warmup: int = 1) -> dict:
+    """Call `fn(i)` `runs` times after `warmup` untimed calls and summarize the durations."""
+    for i in range(warmup):
+        fn(-1 - i)
+    samples = []
+    for i in range(runs):
+        started = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+@contextmanager
+def scratch_database() -> Iterator[Path]:
+    """Point the backend at an empty database in a temporary directory."""
+    original = db.DB_PATH
+    with tempfile.TemporaryDirectory(prefix="calorie-bench-") as tmp:
+        db.DB_PATH = Path(tmp) / "bench.db"
+        db.init_db()
+        try:
+            yield db.DB_PATH
+        finally:
+            chat_log.writer.flush()
+            db.close_pools()
+            db.DB_PATH = original
+
+
+class FakeConnector:
+    """
+    Deterministic stand-in for an LLM backend.
+
+    The intent call answers SEARCH for `items` (each made unique per call so
+    the extraction cache never hits); extraction calls return fixed
+    nutrition. Every call sleeps for `latency` seconds, like a real model.
+    """
+
+    def __init__(self, items: list[str], latency: float = 0.0):
+        self.items = items
+        self.latency = latency
+        self.calls = 0
+
+    def _reply(self, messages: list[dict]) -> str:
+        self.calls += 1
+        if messages[0]["content"] == agent.INTENT_INSTRUCTION:
+            if not self.items:
+                return json.dumps({"action": "CHITCHAT", "reply": "Hello!"})
+            return json.dumps({"action": "SEARCH", "items": [f"{item} #{self.calls}" for item in self.items]})
+        return json.dumps({"name": "bench food", "amount": "1 serving", "calories": 250,
+                           "protein": 10.0, "carbs": 30.0, "fat": 8.0, "sugar": 4.0})
+
+    def chat(self, messages: list[dict]) -> str:
+        time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def achat(self, messages: list[dict]) -> str:
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+
+def fake_search(query: str, max_results: int = 3) -> list[str]:
+    return [f"Title: {query}\nSnippet: One serving has 250 calories."]
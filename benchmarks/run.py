@@ -0,0 +1,74 @@
+"""
+Run the offline benchmarks and write the results as JSON.
+
+    python -m benchmarks.run [--quick] [--only agent,lookup] [--output results.json]
+
+No network is used: LLM backends and web search are replaced with
+deterministic fakes, and every benchmark works on a scratch database.
+Compare result files from two commits to spot regressions.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from . import bench_agent, bench_chat, bench_engine, bench_entries, bench_lookup
+
+BENCHMARKS = {
+    "agent": bench_agent.run,
+    "lookup": bench_lookup.run,
+    "entries": bench_entries.run,
+    "engine": bench_engine.run,
+    "chat": bench_chat.run,
+}
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the offline backend benchmarks.")
+    parser.add_argument("--quick", action="store_true", help="fewer runs and smaller tables")
+    parser.add_argument("--only", help=f"comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--output", type=Path, help="result file (default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args(argv)
+
+    selected = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    commit = _commit()
+    report = {
+        "commit": commit,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "quick": args.quick,
+        "benchmarks": {},
+    }
+    for name in selected:
+        print(f"Running {name}...", file=sys.stderr)
+        started = time.perf_counter()
+        report["benchmarks"][name] = {**BENCHMARKS[name](quick=args.quick),
+                                      "seconds": round(time.perf_counter() - started, 2)}
+
+    output = args.output or RESULTS_DIR / f"{commit or 'results'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Wrote {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
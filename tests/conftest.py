@@ -0,0 +1,16 @@
+"""Shared pytest fixtures."""
+
+import pytest
+
+from backend import chat_log, db
+
+
+@pytest.fixture(autouse=True)
+def temp_db(tmp_path, monkeypatch):
+    """Point the backend at a fresh SQLite file for every test."""
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "test.db")
+    db.init_db()
+    yield db.DB_PATH
+    # Background chat-log writes belong to this test's database
+    chat_log.writer.flush()
+    db.close_pools()
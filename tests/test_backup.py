@@ -0,0 +1,69 @@
+"""Tests for streaming export and import of backups."""
+
+import csv
+import gzip
+import io
+import json
+
+from fastapi.testclient import TestClient
+
+from backend import chat_log, config, db
+from backend.main import app
+
+client = TestClient(app)
+
+
+def _seed() -> None:
+    client.post("/api/entries/bulk", json=[
+        {"name": f"meal {i}", "calories": 100 + i, "protein": i, "details": "line one\nline two",
+         "created_at": f"2024-01-0{i + 1}T12:00:00"}
+        for i in range(5)
+    ])
+    for i in range(3):
+        chat_log.writer.record(f"question {i}", f"answer {i}", f"2024-01-0{i + 1} 08:00:00")
+    chat_log.writer.flush()
+
+
+def test_export_streams_ndjson_csv_and_gzip(monkeypatch) -> None:
+    """Every row comes out whatever the batch size, in each format."""
+    monkeypatch.setattr(config, "EXPORT_BATCH_SIZE", 2)
+    _seed()
+
+    resp = client.get("/api/export")
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["table"] for r in rows] == ["entries"] * 5 + ["chat_logs"] * 3
+    assert rows[0]["name"] == "meal 0" and rows[0]["created_at"] == "2024-01-01 12:00:00"
+
+    packed = client.get("/api/export", params={"gzip": "true"})
+    assert packed.headers["content-disposition"].endswith('.ndjson.gz"')
+    assert gzip.decompress(packed.content).decode() == resp.text
+
+    table = list(csv.reader(io.StringIO(client.get("/api/export", params={"format": "csv", "table": "entries"}).text)))
+    assert table[0] == ["id", "name", "calories", "details", "protein", "carbs", "fat", "sugar", "created_at"]
+    assert len(table) == 6 and table[1][3] == "line one\nline two"
+    assert client.get("/api/export", params={"format": "csv"}).status_code == 400
+
+
+def test_import_restores_export_into_empty_database(tmp_path, monkeypatch) -> None:
+    _seed()
+    backup = client.get("/api/export", params={"gzip": "true"}).content
+    original = client.get("/api/export").text
+
+    db.close_pools()
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "restored.db")
+    resp = client.post("/api/import", content=backup, headers={"Content-Type": "application/gzip"})
+    assert resp.json() == {"entries": 5, "chat_logs": 3, "error_count": 0, "errors": []}
+    assert client.get("/api/export").text == original
+
+
+def test_import_reports_bad_rows() -> None:
+    lines = "\n".join([
+        json.dumps({"table": "entries", "name": "ok", "calories": 5}),
+        json.dumps({"table": "entries", "calories": 5}),
+        json.dumps({"table": "chat_logs", "user_message": "hi", "bot_response": "hello"}),
+        json.dumps({"table": "nutrients"}),
+    ])
+    body = client.post("/api/import", content=lines, headers={"Content-Type": "application/x-ndjson"}).json()
+    assert (body["entries"], body["chat_logs"], body["error_count"]) == (1, 1, 2)
+    assert [e["row"] for e in body["errors"]] == [2, 4]
@@ -1,10 +1,14 @@
 """Unit tests for the calorie engine."""
 
 import sys
+from array import array
 from pathlib import Path
 
+import pytest
+
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+from backend import calorie_engine
 from backend.calorie_engine import Nutrition, calories
 
 
@@ -12,3 +16,39 @@ def test_calorie_computation() -> None:
     """Calorie calculation follows macronutrient formula."""
     n = Nutrition(protein=10, carbs=20, fat=5)
     assert calories(n) == 10 * 4 + 20 * 4 + 5 * 9
+
+
+def test_scaled_ingredient() -> None:
+    """Per-serving values are scaled and the formula fills in missing energy."""
+    item = calorie_engine.scaled_ingredient("2 eggs", "2 x Large", 2, 78, 6, 0.6, 5, 0.6)
+    assert item["calories"] == 156
+    assert item["protein"] == 12.0
+    assert calorie_engine.scaled_ingredient("x", "1", 1, 0, 10, 20, 5, 0)["calories"] == 165
+
+
+def test_batch_calories_matches_single_rows() -> None:
+    """The batch formula truncates like `calories` and keeps given energy values."""
+    protein, carbs, fat = array("d", [10, 0.5, 0]), array("d", [20, 1.5, 0]), array("d", [5, 0.3, 0])
+    assert list(calorie_engine.batch_calories(protein, carbs, fat)) == [
+        calories(Nutrition(p, c, f)) for p, c, f in zip(protein, carbs, fat)]
+    assert list(calorie_engine.batch_calories(protein, carbs, fat, kcal=[0, 90, 0])) == [165, 90, 0]
+
+
+def test_batch_totals_and_ratios() -> None:
+    """Columns sum and split energy by macronutrient, per row or for single values."""
+    assert calorie_engine.totals({"protein": array("d", [12, 5]), "fat": [10, 0]}) == {"protein": 17.0, "fat": 10.0}
+
+    ratios = calorie_engine.macro_ratios([25, 0], [25, 0], [0, 0])
+    assert list(ratios["protein"]) == [0.5, 0.0] and list(ratios["fat"]) == [0.0, 0.0]
+    assert calorie_engine.macro_split(10, 0, 0) == {"protein": 1.0, "carbs": 0.0, "fat": 0.0}
+    assert calorie_engine.macro_split(0, 0, 0) == {"protein": 0.0, "carbs": 0.0, "fat": 0.0}
+
+
+def test_batch_api_with_numpy() -> None:
+    """NumPy columns are computed vectorized with the same results."""
+    np = pytest.importorskip("numpy")
+    protein, carbs, fat = np.array([10.0, 0.5]), np.array([20.0, 1.5]), np.array([5.0, 0.3])
+    assert calorie_engine.batch_calories(protein, carbs, fat, kcal=np.array([0.0, 90.0])).tolist() == [165, 90]
+    assert calorie_engine.totals({"fat": np.array([1.0, 2.0, 3.0])}) == {"fat": 6.0}
+    assert calorie_engine.macro_ratios(protein, carbs, np.zeros(2))["carbs"].tolist() == [
+        20 * 4 / (10 * 4 + 20 * 4), 1.5 * 4 / (0.5 * 4 + 1.5 * 4)]
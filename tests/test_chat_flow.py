@@ -2,14 +2,21 @@
 import sys
 import os
 from unittest.mock import MagicMock, patch
+import asyncio
 import json
 import pytest
 
 # Add repo root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from backend import config
 from backend.agent import Agent, AgentResponse
 
+@pytest.fixture(autouse=True)
+def llm_intent(monkeypatch):
+    """These tests exercise the LLM intent call, so keep simple messages off the fast path."""
+    monkeypatch.setattr(config, "FAST_PATH", 0)
+
 # Mock Connector
 class MockConnector:
     def __init__(self, responses):
@@ -75,3 +82,167 @@ def test_agent_chitchat():
 
         assert response['text'] == "Hello there!"
         assert response['draft_entry'] is None
+
+class ItemConnector:
+    """Answers extraction prompts by item name so call order does not matter."""
+
+    def __init__(self, plan, nutrition):
+        self.plan = plan
+        self.nutrition = nutrition
+
+    def chat(self, messages):
+        prompt = messages[0]['content']
+        if prompt.startswith("You are a calorie tracking assistant"):
+            return json.dumps(self.plan)
+        for name, data in self.nutrition.items():
+            if f"'{name}'" in prompt:
+                return json.dumps(data) if data else "not json"
+        return ""
+
+def test_agent_concurrent_items_keep_order():
+    items = ["mystery stew", "kale chips", "bad item", "seitan wrap"]
+    nutrition = {
+        name: {"name": name, "amount": "1 serving", "calories": 100 * (i + 1),
+               "protein": 1.0, "carbs": 2.0, "fat": 3.0, "sugar": 0.5}
+        for i, name in enumerate(items)
+    }
+    nutrition["bad item"] = None
+
+    connector = ItemConnector({"action": "SEARCH", "items": items}, nutrition)
+    with patch('backend.agent.search_nutrition', return_value=["Title: x\nSnippet: y"]):
+        with patch('backend.agent.get_connector', return_value=connector):
+            agent = Agent(provider="local", max_workers=4)
+            response = agent.process_message([{"role": "user", "content": "lunch"}])
+
+    draft = response['draft_entry']
+    assert [i['name'] for i in draft['ingredients']] == ["mystery stew", "kale chips", "seitan wrap"]
+    assert draft['total_calories'] == 100 + 200 + 400
+
+def test_agent_async_search_and_calculate():
+    search_response = json.dumps({"action": "SEARCH", "items": ["2 boiled eggs"]})
+    extraction_response = json.dumps({
+        "name": "2 boiled eggs", "amount": "2 large", "calories": 156,
+        "protein": 12.6, "carbs": 1.1, "fat": 10.6, "sugar": 1.1
+    })
+
+    with patch('backend.agent.search_nutrition', return_value=["Title: Boiled Egg\nSnippet: 78 calories."]):
+        with patch('backend.agent.get_connector', return_value=MockConnector([search_response, extraction_response])):
+            agent = Agent(provider="local")
+            response = asyncio.run(agent.aprocess_message([{"role": "user", "content": "I had 2 boiled eggs"}]))
+
+    assert response['draft_entry']['total_calories'] == 156
+
+def test_agent_reuses_cached_extraction():
+    search_response = json.dumps({"action": "SEARCH", "items": ["2 boiled eggs"]})
+    extraction_response = json.dumps({
+        "name": "2 boiled eggs", "amount": "2 large", "calories": 156,
+        "protein": 12.6, "carbs": 1.1, "fat": 10.6, "sugar": 1.1
+    })
+    history = [{"role": "user", "content": "I had 2 boiled eggs"}]
+
+    search = MagicMock(return_value=["Title: Boiled Egg\nSnippet: 78 calories."])
+    with patch('backend.agent.search_nutrition', search):
+        connector = MockConnector([search_response, extraction_response, search_response])
+        with patch('backend.agent.get_connector', return_value=connector):
+            agent = Agent(provider="local")
+            first = agent.process_message(history)
+            second = agent.process_message([{"role": "user", "content": "2  Boiled eggs."}])
+
+    # The second turn only needed the intent call: no search, no extraction
+    assert connector.call_count == 3
+    assert search.call_count == 1
+    assert second['draft_entry']['total_calories'] == first['draft_entry']['total_calories']
+
+def test_agent_malformed_extraction_not_cached():
+    search_response = json.dumps({"action": "SEARCH", "items": ["2 boiled eggs"]})
+    malformed = json.dumps({"name": "2 boiled eggs", "amount": "2 large", "calories": "about 300",
+                            "carbs": 1.1, "fat": 10.6, "sugar": 1.1})
+    extraction_response = json.dumps({
+        "name": "2 boiled eggs", "amount": "2 large", "calories": 156,
+        "protein": 12.6, "carbs": 1.1, "fat": 10.6, "sugar": 1.1
+    })
+    history = [{"role": "user", "content": "I had 2 boiled eggs"}]
+
+    with patch('backend.agent.search_nutrition', return_value=["Title: Boiled Egg\nSnippet: 78 calories."]):
+        connector = MockConnector([search_response, malformed, search_response, extraction_response])
+        with patch('backend.agent.get_connector', return_value=connector):
+            agent = Agent(provider="local")
+            first = agent.process_message(history)
+            second = asyncio.run(agent.aprocess_message(history))
+
+    # The malformed answer is a failed item, and the next turn asks the LLM again
+    assert first['draft_entry'] is None
+    assert connector.call_count == 4
+    assert second['draft_entry']['total_calories'] == 156
+
+def test_agent_lookup_hit_skips_extraction():
+    lookup_response = json.dumps({"action": "LOOKUP", "items": ["2 boiled eggs", "apple pie"]})
+    extraction_response = json.dumps({
+        "name": "apple pie", "amount": "1 slice", "calories": 296,
+        "protein": 2.4, "carbs": 42.5, "fat": 13.8, "sugar": 19.6
+    })
+
+    connector = MockConnector([lookup_response, extraction_response])
+    with patch('backend.agent.get_connector', return_value=connector):
+        agent = Agent(provider="local", max_workers=1)
+        response = agent.process_message([{"role": "user", "content": "2 boiled eggs and apple pie"}])
+
+    eggs, pie = response['draft_entry']['ingredients']
+    # The exact database hit is computed from the food table; only the pie needed the LLM
+    assert eggs == {"name": "2 boiled eggs", "amount": "2 x Large (100g)", "calories": 156,
+                    "protein": 12.0, "carbs": 1.2, "fat": 10.0, "sugar": 1.2}
+    assert pie['calories'] == 296
+    assert connector.call_count == 2
+
+class BatchConnector(ItemConnector):
+    """Answers batch prompts with a fixed array and single-item prompts by name."""
+
+    def __init__(self, plan, nutrition, batch_answer):
+        super().__init__(plan, nutrition)
+        self.batch_answer = batch_answer
+        self.prompts = []
+
+    def chat(self, messages):
+        prompt = messages[0]['content']
+        self.prompts.append(prompt)
+        if "Output valid JSON only: an array" in prompt:
+            return json.dumps(self.batch_answer)
+        return super().chat(messages)
+
+def _batch_fixture():
+    items = ["mystery stew", "kale chips", "seitan wrap"]
+    nutrition = {
+        name: {"name": name, "amount": "1 serving", "calories": 100 * (i + 1),
+               "protein": 1.0, "carbs": 2.0, "fat": 3.0, "sugar": 0.5}
+        for i, name in enumerate(items)
+    }
+    # The batch answer drops calories for the second item, so only it is retried alone
+    batch_answer = [dict(nutrition[name]) for name in items]
+    del batch_answer[1]["calories"]
+    return BatchConnector({"action": "SEARCH", "items": items}, nutrition, batch_answer)
+
+def test_agent_batch_extraction_retries_malformed_items(monkeypatch):
+    monkeypatch.setattr(config, "EXTRACTION_MODE", "batch")
+    connector = _batch_fixture()
+    with patch('backend.agent.search_nutrition', return_value=["Title: x\nSnippet: y"]):
+        with patch('backend.agent.get_connector', return_value=connector):
+            agent = Agent(provider="local")
+            response = agent.process_message([{"role": "user", "content": "lunch"}])
+
+    # Intent, one batch extraction, one retry for the malformed item
+    assert len(connector.prompts) == 3
+    assert "'kale chips'" in connector.prompts[2] and "array" not in connector.prompts[2]
+    draft = response['draft_entry']
+    assert [i['name'] for i in draft['ingredients']] == ["mystery stew", "kale chips", "seitan wrap"]
+    assert draft['total_calories'] == 600
+
+def test_agent_async_batch_extraction(monkeypatch):
+    monkeypatch.setattr(config, "EXTRACTION_MODE", "batch")
+    connector = _batch_fixture()
+    with patch('backend.agent.search_nutrition', return_value=["Title: x\nSnippet: y"]):
+        with patch('backend.agent.get_connector', return_value=connector):
+            agent = Agent(provider="local")
+            response = asyncio.run(agent.aprocess_message([{"role": "user", "content": "lunch"}]))
+
+    assert len(connector.prompts) == 3
+    assert response['draft_entry']['total_calories'] == 600
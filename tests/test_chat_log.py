@@ -0,0 +1,60 @@
+"""Tests for the write-behind chat log writer."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import chat_log, config, db
+from backend.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def llm_intent(monkeypatch):
+    """These tests exercise the LLM intent call, so keep simple messages off the fast path."""
+    monkeypatch.setattr(config, "FAST_PATH", 0)
+
+
+def _rows() -> list[tuple]:
+    with db.connection() as conn:
+        return [tuple(row) for row in conn.execute("SELECT user_message, bot_response FROM chat_logs ORDER BY id")]
+
+
+def test_turns_written_in_batches() -> None:
+    """Queued turns are written together once the worker drains the queue."""
+    writer = chat_log.ChatLogWriter(max_queue=100, batch_size=50)
+    for i in range(20):
+        assert writer.record(f"user {i}", f"bot {i}")
+    writer.close()
+
+    assert _rows() == [(f"user {i}", f"bot {i}") for i in range(20)]
+    stats = writer.stats()
+    assert stats["written"] == 20 and stats["queue_depth"] == 0 and stats["batches"] <= 20
+
+
+def test_full_queue_drops_and_counts() -> None:
+    """Turns beyond the queue size are dropped instead of blocking the caller."""
+    writer = chat_log.ChatLogWriter(max_queue=2)
+    with patch.object(writer, "_ensure_worker"):
+        results = [writer.record("hi", "hello") for _ in range(3)]
+
+    assert results == [True, True, False]
+    assert writer.stats()["dropped"] == 1 and writer.stats()["queue_depth"] == 2
+
+
+def test_chat_turn_logged_once() -> None:
+    """A chat request produces a single row holding both sides of the turn."""
+    class Connector:
+        def chat(self, messages):
+            return json.dumps({"action": "CHITCHAT", "reply": "Hello!"})
+
+    with patch('backend.agent.get_connector', return_value=Connector()):
+        resp = client.post("/api/chat/message", json={"messages": [{"role": "user", "content": "Hi"}]})
+    assert resp.status_code == 200
+    chat_log.writer.flush()
+
+    assert _rows() == [("Hi", "Hello!")]
+    assert client.get("/api/admin/chat-log").json()["queue_depth"] == 0
@@ -0,0 +1,66 @@
+"""Tests for the Server-Sent Events chat endpoint."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import config
+from backend.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def llm_intent(monkeypatch):
+    """These tests exercise the LLM intent call, so keep simple messages off the fast path."""
+    monkeypatch.setattr(config, "FAST_PATH", 0)
+
+
+class StreamingConnector:
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    def chat(self, messages):
+        return self.responses.pop(0)
+
+    async def achat_stream(self, messages):
+        text = self.responses.pop(0)
+        for i in range(0, len(text), 4):
+            yield text[i:i + 4]
+
+
+def _events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        name, data = block.split("\n", 1)
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_stream_chitchat_tokens() -> None:
+    """CHITCHAT replies are streamed as tokens before the final event."""
+    connector = StreamingConnector([json.dumps({"action": "CHITCHAT", "reply": "Hello there, friend!"})])
+    with patch('backend.agent.get_connector', return_value=connector):
+        resp = client.post("/api/chat/stream", json={"messages": [{"role": "user", "content": "Hi"}]})
+
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = _events(resp.text)
+    tokens = "".join(data["text"] for name, data in events if name == "token")
+    assert tokens == "Hello there, friend!"
+    name, data = events[-1]
+    assert name == "done"
+    assert data["text"] == "Hello there, friend!" and data["draft_entry"] is None
+    assert data["usage"]["kept"] == 1
+
+
+def test_stream_pipeline_progress() -> None:
+    """Item lookups, extractions and the draft are reported as they happen."""
+    connector = StreamingConnector([json.dumps({"action": "LOOKUP", "items": ["2 boiled eggs"]})])
+    with patch('backend.agent.get_connector', return_value=connector):
+        resp = client.post("/api/chat/stream", json={"messages": [{"role": "user", "content": "2 boiled eggs"}]})
+
+    names = [name for name, _ in _events(resp.text)]
+    assert names == ["intent", "item_lookup", "item_extracted", "draft", "done"]
+    assert _events(resp.text)[-1][1]["draft_entry"]["total_calories"] == 156
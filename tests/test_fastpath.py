@@ -0,0 +1,54 @@
+"""Tests for the rule-based fast path that skips the intent LLM call."""
+
+import json
+from unittest.mock import patch
+
+from backend import fastpath
+from backend.agent import Agent
+
+
+class NoIntentConnector:
+    """Counts LLM calls and answers every prompt with a clarifying question."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def chat(self, messages):
+        self.calls += 1
+        return json.dumps({"action": "CLARIFY", "question": "Which one?"})
+
+
+def test_plans_for_simple_messages() -> None:
+    """Greetings and exact table foods with amounts are planned; the rest defers."""
+    lookup = Agent._lookup
+    assert fastpath.plan_for("Hello there!", lookup)["action"] == "CHITCHAT"
+    assert fastpath.plan_for("I had 2 boiled eggs and an apple", lookup) == {
+        "action": "LOOKUP", "items": ["2 boiled eggs", "an apple"]}
+    # No amount, not exactly a table food, or free-form text: leave it to the LLM
+    assert fastpath.plan_for("boiled eggs", lookup) is None
+    assert fastpath.plan_for("1 slice of apple pie", lookup) is None
+    assert fastpath.plan_for("what should I eat today?", lookup) is None
+    assert fastpath.plan_for("1/0 a banana", lookup) is None
+    # A count of a measured serving ("1 oz" of almonds) cannot be computed from the table
+    assert fastpath.plan_for("10 almonds", lookup) is None
+    assert fastpath.plan_for("3 salmon and 2 boiled eggs", lookup) is None
+
+
+def test_agent_skips_intent_call_and_counts_share() -> None:
+    """A fast-path turn needs no LLM call at all; ambiguous turns still use it."""
+    connector = NoIntentConnector()
+    before = fastpath.stats()
+    with patch('backend.agent.get_connector', return_value=connector):
+        agent = Agent(provider="local")
+    response = agent.process_message([{"role": "user", "content": "2 boiled eggs"}])
+    assert connector.calls == 0
+    assert response['draft_entry']['total_calories'] == 156
+
+    agent.process_message([{"role": "user", "content": "a sandwich"}])
+    assert connector.calls == 1
+    response = agent.process_message([{"role": "user", "content": "10 almonds"}])
+    assert connector.calls == 2 and response['draft_entry'] is None
+
+    after = fastpath.stats()
+    assert after["turns"] - before["turns"] == 3
+    assert after["fast_path"] - before["fast_path"] == 1
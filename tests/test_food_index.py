@@ -0,0 +1,26 @@
+"""Tests for the food match index."""
+
+from backend.food_index import FoodIndex
+
+FOODS = ["apple", "egg", "boiled egg", "potato", "sweet potato", "white rice", "brown rice"]
+
+
+def test_exact_match_wins() -> None:
+    """An exact name is returned even when longer names contain it."""
+    assert FoodIndex(FOODS).best("Egg ") == "egg"
+
+
+def test_longest_name_in_query_wins() -> None:
+    """The longest name occurring in the item is preferred."""
+    index = FoodIndex(FOODS)
+    assert index.best("2 boiled eggs") == "boiled egg"
+    assert index.best("baked sweet potato") == "sweet potato"
+
+
+def test_query_inside_name_and_alternatives() -> None:
+    """Names containing the query match, ranked longest first with insertion order on ties."""
+    index = FoodIndex(FOODS)
+    matches = index.search("rice", limit=5)
+    assert [m.key for m in matches] == ["white rice", "brown rice"]
+    assert matches[0].kind == "in_name"
+    assert index.best("zucchini") is None
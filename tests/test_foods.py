@@ -0,0 +1,31 @@
+"""Tests for the typed food table and portion scaling."""
+
+from backend import foods
+
+
+def test_import_legacy_entry() -> None:
+    """Free-text entries are parsed into numeric columns."""
+    food = foods.parse_common_food(
+        "white rice",
+        "White Rice (Cooked, 1 cup, 158g): 205 kcal, 4.3g Protein, 44.5g Carbs, 0.4g Fat, 0.1g Sugar. USDA Data.",
+    )
+    assert food == foods.Food("white rice", "White Rice", "Cooked, 1 cup", 158, 205, 4.3, 44.5, 0.4, 0.1)
+
+
+def test_csv_matches_legacy_json() -> None:
+    """The shipped CSV is the import of common_foods.json."""
+    assert list(foods.read_csv()) == list(foods.import_common_foods())
+
+
+def test_portion_scaling() -> None:
+    """Counts, grams and matching household units scale the serving; unclear amounts defer."""
+    table = foods.load_food_table()
+    assert foods.portion("150g chicken breast", table["chicken breast"])["calories"] == 248
+    assert foods.portion("2 cups of white rice", table["white rice"])["carbs"] == 89.0
+    assert foods.portion("1 tbsp almonds", table["almonds"]) is None
+    # A count is not a number of measured servings ("1 oz", "Cooked, 3 oz")
+    assert foods.portion("10 almonds", table["almonds"]) is None
+    assert foods.portion("3 salmon", table["salmon"]) is None
+    assert foods.portion("2 servings of salmon", table["salmon"])["calories"] == 354
+    assert foods.portion("2 slices of bread", table["bread"])["calories"] == 220
+    assert foods.portion("apple pie", table["apple"]) is None
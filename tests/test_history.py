@@ -0,0 +1,66 @@
+"""Tests for token-budgeted history windowing."""
+
+import json
+from unittest.mock import patch
+
+from backend.agent import Agent
+from backend.history import HistoryManager, estimate_tokens
+
+
+def _turns(count: int) -> list[dict]:
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"message number {i} " + "x" * 40}
+            for i in range(count)]
+
+
+def test_short_history_sent_verbatim() -> None:
+    """A conversation within budget is sent unchanged after the system prompt."""
+    history = _turns(3)
+    messages, usage = HistoryManager(budget_tokens=1000, keep_last=6).build("system", history)
+
+    assert messages[0] == {"role": "system", "content": "system"}
+    assert messages[1:] == history
+    assert (usage.kept, usage.summarized, usage.dropped) == (3, 0, 0)
+    assert usage.prompt_tokens == sum(estimate_tokens(m["content"]) + 4 for m in messages)
+
+
+def test_older_turns_summarized() -> None:
+    """Turns beyond keep_last are folded into one summary message, newest kept first."""
+    history = _turns(10)
+    manager = HistoryManager(budget_tokens=120, keep_last=2)
+    messages, usage = manager.build("system", history)
+
+    assert messages[-2:] == history[-2:]
+    summary = messages[1]
+    assert summary["role"] == "system" and summary["content"].startswith("Summary of earlier conversation")
+    assert "message number 7" in summary["content"]
+    assert "message number 0" not in summary["content"]
+    assert usage.kept == 2 and usage.summarized + usage.dropped == 8 and usage.dropped > 0
+    assert usage.prompt_tokens <= 120
+
+
+def test_drop_mode_and_latest_always_kept() -> None:
+    """Drop mode leaves older turns out, and the latest message survives any budget."""
+    history = _turns(4)
+    messages, usage = HistoryManager(budget_tokens=5, keep_last=3, compaction="drop").build("system", history)
+
+    assert messages[1:] == history[-1:]
+    assert (usage.kept, usage.summarized, usage.dropped) == (1, 0, 3)
+
+
+def test_agent_reports_usage() -> None:
+    """The agent trims the intent prompt and reports what it sent."""
+    seen = []
+
+    class Connector:
+        def chat(self, messages):
+            seen.append(messages)
+            return json.dumps({"action": "CHITCHAT", "reply": "Hi!"})
+
+    with patch('backend.agent.get_connector', return_value=Connector()):
+        agent = Agent(provider="local")
+    agent.history = HistoryManager(budget_tokens=10000, keep_last=2, compaction="drop")
+    response = agent.process_message(_turns(5))
+
+    assert len(seen[0]) == 3
+    assert response["usage"] == {"prompt_tokens": response["usage"]["prompt_tokens"],
+                                 "kept": 2, "summarized": 0, "dropped": 3}
@@ -0,0 +1,72 @@
+"""Tests for the shared LLM connector registry."""
+
+import threading
+import time
+
+from backend.llm import ConnectorRegistry, LLMConnector
+from backend.routers import llm
+
+
+class FakeConnector(LLMConnector):
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.closed = False
+        self.warmed = threading.Event()
+
+    def chat(self, messages):
+        return "ok"
+
+    def warm_up(self):
+        self.warmed.set()
+        if self.fail:
+            raise ConnectionError("backend down")
+
+    def close(self):
+        self.closed = True
+
+
+def test_connectors_reused_per_key() -> None:
+    """The same key returns the same instance; another key builds a new one."""
+    built = []
+    registry = ConnectorRegistry(lambda *key: built.append(key) or FakeConnector(), warm_up=False)
+
+    first = registry.get("ollama", "http://a", "m")
+    assert registry.get("ollama", "http://a", "m") is first
+    assert registry.get("ollama", "http://b", "m") is not first
+    assert built == [("ollama", "http://a", "m"), ("ollama", "http://b", "m")]
+
+
+def test_idle_connectors_evicted_and_closed() -> None:
+    """Connectors idle past the TTL are closed and rebuilt on next use."""
+    registry = ConnectorRegistry(lambda *key: FakeConnector(), idle_ttl=0, warm_up=False)
+
+    first = registry.get("local")
+    assert registry.touch(first)
+    registry._entries[("local", None, None)].last_used -= 1
+    second = registry.get("local")
+
+    assert second is not first and first.closed
+    assert not registry.touch(first)
+
+
+def test_warm_up_records_health() -> None:
+    """A failed warm-up marks the backend unhealthy; a reported success clears it."""
+    registry = ConnectorRegistry(lambda *key: FakeConnector(fail=True))
+
+    connector = registry.get("ollama", "http://a", "m")
+    assert connector.warmed.wait(2)
+    for _ in range(100):
+        if registry.status()[0]["healthy"] is not None:
+            break
+        time.sleep(0.01)
+    status = registry.status()[0]
+    assert status["healthy"] is False and status["last_error"] == "backend down"
+
+    registry.report(connector, True)
+    assert registry.status()[0]["healthy"] is True and registry.status()[0]["failures"] == 0
+
+
+def test_get_connector_shares_instances() -> None:
+    """The router-level helper hands out shared connectors."""
+    assert llm.get_connector("local") is llm.get_connector("local")
+    assert llm.get_connector("ollama") is llm.get_connector("ollama", "http://localhost:11434", "llama3.2:latest")
@@ -0,0 +1,101 @@
+"""Tests for admission control and priority scheduling of LLM calls."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import config
+from backend.llm import LocalConnector, Overloaded, scheduler
+from backend.llm.scheduler import BACKGROUND, INTERACTIVE, Scheduler
+from backend.main import app
+
+client = TestClient(app)
+
+
+def _wait_until(condition, timeout=2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_interactive_calls_overtake_queued_background_work() -> None:
+    """A freed slot goes to the most urgent waiter, not the one that queued first."""
+    slots = Scheduler(("fake", None), max_concurrency=1, max_queue=4, queue_timeout=5)
+    order = []
+
+    def call(priority):
+        with slots.slot(priority):
+            order.append(priority)
+
+    with slots.slot():
+        background = threading.Thread(target=call, args=(BACKGROUND,))
+        background.start()
+        _wait_until(lambda: slots.stats()["queued"] == 1)
+        interactive = threading.Thread(target=call, args=(INTERACTIVE,))
+        interactive.start()
+        _wait_until(lambda: slots.stats()["queued"] == 2)
+    background.join()
+    interactive.join()
+
+    assert order == [INTERACTIVE, BACKGROUND]
+    assert slots.stats()["active"] == 0
+
+
+def test_full_queue_and_long_waits_are_rejected() -> None:
+    slots = Scheduler(("fake", None), max_concurrency=1, max_queue=0, queue_timeout=0.05)
+    with slots.slot():
+        with pytest.raises(Overloaded) as rejected:
+            with slots.slot():
+                pass
+    assert rejected.value.retry_after >= 1
+
+    slots.max_queue = 1
+    with slots.slot():
+        with pytest.raises(Overloaded):
+            with slots.slot():
+                pass
+    stats = slots.stats()
+    assert (stats["rejected"], stats["timed_out"], stats["queued"], stats["active"]) == (1, 1, 0, 0)
+
+
+def test_async_calls_limited_per_backend() -> None:
+    slots = Scheduler(("fake", None), max_concurrency=2, max_queue=8, queue_timeout=5)
+    running = []
+    peak = []
+
+    async def call():
+        async with slots.aslot():
+            running.append(1)
+            peak.append(len(running))
+            await asyncio.sleep(0.02)
+            running.pop()
+
+    async def run():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(run())
+    assert max(peak) == 2
+    assert slots.stats()["admitted"] == 6
+
+
+def test_overloaded_backend_answers_429(monkeypatch) -> None:
+    """The proxy and the agent fail fast with Retry-After instead of queueing without bound."""
+    monkeypatch.setattr(config, "FAST_PATH", 0)
+    slots = scheduler.for_connector(LocalConnector())
+    monkeypatch.setattr(slots, "max_concurrency", 1)
+    monkeypatch.setattr(slots, "max_queue", 0)
+
+    with slots.slot():
+        proxy = client.post("/api/llm/chat", json={"messages": [{"role": "user", "content": "hi"}]})
+        chat = client.post("/api/chat/message", json={
+            "messages": [{"role": "user", "content": "Hi"}], "provider": "local"})
+
+    for response in (proxy, chat):
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+    assert client.post("/api/llm/chat", json={"messages": [{"role": "user", "content": "hi"}]}).status_code == 200
+    assert any(s["provider"] == "local" for s in client.get("/api/llm/schedulers").json())
@@ -10,3 +10,93 @@ def test_health_endpoint() -> None:
     resp = client.get("/api/health")
     assert resp.status_code == 200
     assert resp.json() == {"status": "ok"}
+
+
+def test_llm_chat_endpoint_local_provider() -> None:
+    """The async LLM proxy falls back to the blocking local connector."""
+    resp = client.post("/api/llm/chat?provider=local", json={"messages": [{"role": "user", "content": "Hello"}]})
+    assert resp.status_code == 200
+    assert "dummy local model" in resp.json()["reply"]
+
+
+def test_admin_cache_invalidation() -> None:
+    """Cached extractions can be inspected and invalidated."""
+    from backend import db
+
+    db.put_cached_extraction("Apple", "database", "m", {"name": "apple", "calories": 95})
+    assert db.get_cached_extraction(" apple ", "database", "m")["calories"] == 95
+
+    stats = client.get("/api/admin/cache").json()
+    assert stats["entries"] == 1
+    assert stats["hits"] >= 1
+
+    assert client.delete("/api/admin/cache").json() == {"deleted": 1}
+    assert db.get_cached_extraction("apple", "database", "m") is None
+
+
+def test_entries_roundtrip_uses_wal() -> None:
+    """Entries are written through pooled WAL-mode connections."""
+    from backend import db
+
+    resp = client.post("/api/entries/", json={"name": "Toast", "calories": 120, "carbs": 20})
+    assert resp.status_code == 200
+    entry_id = resp.json()["id"]
+
+    entries = client.get("/api/entries/").json()
+    assert entries[0]["id"] == entry_id
+    assert entries[0]["name"] == "Toast"
+
+    with db.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_entries_pagination_and_date_range() -> None:
+    """Listing supports a date range, a page size and a keyset cursor, newest entry first."""
+    from backend import db
+
+    # Created out of order, as bulk ingestion and imports do
+    for day in (2, 3, 1, 2):
+        client.post("/api/entries/", json={"name": f"meal {day}", "calories": 100,
+                                           "created_at": f"2024-05-0{day}T12:00:00"})
+
+    page = client.get("/api/entries/", params={"limit": 2})
+    assert [e["name"] for e in page.json()] == ["meal 3", "meal 2"]
+    cursor = page.headers["X-Next-Before-Id"]
+
+    rest = client.get("/api/entries/", params={"limit": 2, "before_id": cursor}).json()
+    assert [e["name"] for e in rest] == ["meal 2", "meal 1"]
+
+    day_two = client.get("/api/entries/", params={"start": "2024-05-02", "end": "2024-05-03"}).json()
+    assert [e["created_at"] for e in day_two] == ["2024-05-02 12:00:00"] * 2
+
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM entries WHERE id = ?", (cursor,))
+    assert client.get("/api/entries/", params={"before_id": cursor}).status_code == 404
+
+
+def test_bulk_entries_json_and_ndjson() -> None:
+    """Bulk ingestion accepts arrays and NDJSON and reports bad rows."""
+    resp = client.post("/api/entries/bulk", json=[
+        {"name": "oats", "calories": 150},
+        {"name": "legacy", "nutrition": {"protein": 10, "carbs": 20, "fat": 5}},
+        {"calories": 10},
+    ])
+    body = resp.json()
+    assert body["inserted"] == 2
+    assert body["error_count"] == 1
+    assert body["errors"][0]["row"] == 3
+
+    lines = "\n".join(['{"name": "a", "calories": 1}', "not json", "", '{"name": "b", "calories": 2}'])
+    resp = client.post("/api/entries/bulk", content=lines, headers={"Content-Type": "application/x-ndjson"})
+    assert resp.json()["inserted"] == 2
+    assert resp.json()["errors"][0]["row"] == 2
+
+    names = {e["name"]: e["calories"] for e in client.get("/api/entries/").json()}
+    assert names == {"oats": 150, "legacy": 165, "a": 1, "b": 2}
+
+
+def test_startup_runs_phases_and_reports_timings() -> None:
+    """The lifespan migrates and loads foods, and reports each phase's duration."""
+    with TestClient(app) as started:
+        timings = started.get("/api/admin/startup").json()
+    assert {"import", "migrations", "food_table"} <= set(timings)
@@ -0,0 +1,58 @@
+"""Tests for timing spans, histograms and the metrics endpoint."""
+
+import json
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from backend import metrics
+from backend.agent import Agent
+from backend.main import app
+
+client = TestClient(app)
+
+
+class ItemsConnector:
+    provider = "fake"
+    model = "fake-1"
+
+    def chat(self, messages):
+        if "nutritionist" in messages[0]["content"]:
+            return json.dumps({"name": "x", "amount": "1", "calories": 100,
+                               "protein": 1, "carbs": 2, "fat": 3, "sugar": 0})
+        return json.dumps({"action": "SEARCH", "items": ["mystery stew", "odd pie"]})
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    """Observations land in the first bucket whose bound they do not exceed."""
+    histogram = metrics.Histogram("test_seconds", "Test.", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.1, stage="a")
+    histogram.observe(0.5, stage="a")
+    histogram.observe(5.0, stage="a")
+
+    lines = histogram.render()
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="a",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{stage="a"} 3' in lines
+
+
+def test_agent_stages_timed_across_worker_threads() -> None:
+    """Stage and LLM spans are recorded, including those from parallel item workers."""
+    metrics.reset()
+    with patch('backend.agent.get_connector', return_value=ItemsConnector()), \
+            patch('backend.agent.search_nutrition', return_value=["snippet"]):
+        agent = Agent(provider="local", max_workers=2)
+        spans = metrics.start_request()
+        agent.process_message([{"role": "user", "content": "stew and pie"}])
+
+    names = [name for name, _ in spans]
+    assert names.count("llm-extract") == 2
+    assert {"intent", "items", "llm-intent"} <= set(names)
+    header = metrics.server_timing(spans)
+    assert "llm-extract;dur=" in header and header.count("llm-extract") == 1
+
+    text = client.get("/api/metrics").text
+    assert 'calorie_llm_call_seconds_count{provider="fake",model="fake-1",purpose="extract"} 2' in text
+    assert 'calorie_agent_stage_seconds_count{stage="intent"} 1' in text
+    assert 'calorie_db_operation_seconds_count{operation="put_cached_extraction"} 2' in text
@@ -0,0 +1,30 @@
+"""Tests for versioned schema migrations."""
+
+import sqlite3
+
+from backend import db
+
+
+def test_migrations_run_once(tmp_path) -> None:
+    """A fresh database is migrated to the current version exactly once."""
+    path = tmp_path / "fresh.db"
+    assert db.init_db(path) == db.SCHEMA_VERSION
+    assert db.init_db(path) == 0
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == db.SCHEMA_VERSION
+
+
+def test_legacy_database_upgraded(tmp_path) -> None:
+    """Databases from before versioning gain the newer columns and keep their rows."""
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE entries (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, "
+                     "calories INTEGER NOT NULL, details TEXT)")
+        conn.execute("INSERT INTO entries (name, calories) VALUES ('Toast', 120)")
+
+    db.init_db(path)
+
+    with sqlite3.connect(path) as conn:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+        assert {"protein", "carbs", "fat", "sugar", "created_at"} <= columns
+        assert conn.execute("SELECT entries, calories FROM daily_totals").fetchall() == [(1, 120)]
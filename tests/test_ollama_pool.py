@@ -0,0 +1,193 @@
+"""Tests for the load-balanced Ollama connector, against stand-in HTTP servers."""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from backend import config
+from backend.llm import OllamaPoolConnector, Overloaded, scheduler
+from backend.routers import llm
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+class StandIn:
+    """A local server answering like Ollama's OpenAI-compatible chat endpoint."""
+
+    def __init__(self, name: str, status: int = 200, delay: float = 0.0):
+        self.name = name
+        self.status = status
+        self.delay = delay
+        self.requests = 0
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stand_in.requests += 1
+                time.sleep(stand_in.delay)
+                body = json.dumps({"choices": [{"message": {"content": stand_in.name}}]}).encode()
+                self.send_response(stand_in.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def start(*args, **kwargs):
+        server = StandIn(*args, **kwargs)
+        started.append(server)
+        return server
+
+    yield start
+    for server in started:
+        server.stop()
+
+
+def _pool(*stand_ins, **kwargs) -> OllamaPoolConnector:
+    kwargs.setdefault("backoff", 0.001)
+    kwargs.setdefault("hedge_percentile", 0)
+    return OllamaPoolConnector([s.url for s in stand_ins], "m", **kwargs)
+
+
+def test_routes_to_least_outstanding_backend(servers) -> None:
+    """Idle backends share sequential calls; a busy one is skipped."""
+    a, b = servers("a"), servers("b")
+    pool = _pool(a, b)
+    try:
+        assert sorted(pool.chat(MESSAGES) for _ in range(4)) == ["a", "a", "b", "b"]
+
+        a.delay = b.delay = 0.3
+        busy = []
+        slow = threading.Thread(target=lambda: busy.append(pool.chat(MESSAGES)))
+        slow.start()
+        time.sleep(0.1)
+        a.delay = b.delay = 0.0
+        replies = {pool.chat(MESSAGES) for _ in range(3)}
+        slow.join()
+        assert len(replies) == 1 and busy[0] not in replies
+    finally:
+        pool.close()
+
+
+def test_failing_backend_ejected_and_retried_elsewhere(servers) -> None:
+    """Calls fail over to a healthy backend; the failing one leaves rotation, then returns after a trial."""
+    bad, good = servers("bad", status=500), servers("good")
+    pool = _pool(bad, good, breaker_failures=2, breaker_cooldown=0.2)
+    try:
+        assert [pool.chat(MESSAGES) for _ in range(6)] == ["good"] * 6
+        assert bad.requests == 2
+        status = {n["base_url"]: n for n in pool.node_status()}
+        assert status[bad.url]["state"] == "open" and status[bad.url]["errors"] == 2
+
+        bad.status = 200
+        time.sleep(0.25)
+        replies = {pool.chat(MESSAGES) for _ in range(4)}
+        assert replies == {"bad", "good"}
+        assert {n["state"] for n in pool.node_status()} == {"closed"}
+    finally:
+        pool.close()
+
+
+def test_client_errors_not_retried(servers) -> None:
+    bad, good = servers("bad", status=400), servers("good")
+    pool = _pool(bad, good)
+    try:
+        errors = 0
+        for _ in range(2):
+            try:
+                pool.chat(MESSAGES)
+            except httpx.HTTPStatusError:
+                errors += 1
+        assert errors == 1 and bad.requests == 1
+        assert all(n["state"] == "closed" for n in pool.node_status())
+    finally:
+        pool.close()
+
+
+def test_slow_calls_hedged_to_another_backend(servers) -> None:
+    """Past the latency percentile a second copy is sent, and the first answer wins."""
+    slow, fast = servers("slow", delay=1.0), servers("fast")
+    pool = _pool(slow, fast, hedge_percentile=90)
+    try:
+        pool._latencies.extend([0.02] * 20)
+        for call in (lambda: pool.chat(MESSAGES), lambda: asyncio.run(pool.achat(MESSAGES))):
+            # Make the slow backend the first choice
+            pool._nodes[1].outstanding += 1
+            started = time.perf_counter()
+            try:
+                assert call() == "fast"
+            finally:
+                pool._nodes[1].outstanding -= 1
+            assert time.perf_counter() - started < 0.8
+        assert {n["base_url"]: n["hedges"] for n in pool.node_status()}[fast.url] == 2
+    finally:
+        pool.close()
+
+
+def test_scheduler_admits_calls_for_every_backend(servers, monkeypatch) -> None:
+    """Each backend of a pool brings its own slots, so more backends take more calls at once."""
+    monkeypatch.setattr(config, "LLM_MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(config, "LLM_MAX_QUEUE", 0)
+    a, b = servers("a", delay=0.3), servers("b", delay=0.3)
+
+    def admitted(pool) -> int:
+        slots = scheduler.for_connector(pool)
+        replies = []
+
+        def call():
+            try:
+                with slots.slot():
+                    replies.append(pool.chat(MESSAGES))
+            except Overloaded:
+                pass
+
+        threads = [threading.Thread(target=call) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        pool.close()
+        return len(replies)
+
+    assert admitted(_pool(a)) == 2
+    assert admitted(_pool(a, b)) == 4
+
+
+def test_unreachable_backends_fail_after_retries() -> None:
+    pool = OllamaPoolConnector(["http://127.0.0.1:9", "http://127.0.0.1:10"], "m", retries=2, backoff=0.001,
+                               breaker_failures=1, breaker_cooldown=60)
+    try:
+        with pytest.raises(httpx.TransportError):
+            pool.chat(MESSAGES)
+        assert all(n["state"] == "open" for n in pool.node_status())
+    finally:
+        pool.close()
+
+
+def test_get_connector_pools_comma_separated_urls(monkeypatch) -> None:
+    monkeypatch.setattr(llm.connectors, "warm_up", False)
+    connector = llm.get_connector("ollama", "http://a:11434, http://b:11434", "m")
+    assert isinstance(connector, OllamaPoolConnector)
+    assert [n["base_url"] for n in connector.node_status()] == ["http://a:11434", "http://b:11434"]
@@ -0,0 +1,67 @@
+"""Tests for the cached search layer."""
+
+import importlib
+import threading
+import time
+
+from backend import db, search
+
+
+class CountingProvider:
+    def __init__(self, snippets):
+        self.snippets = snippets
+        self.calls = 0
+        self.called = threading.Event()
+
+    def search(self, query, max_results):
+        self.calls += 1
+        self.called.set()
+        return list(self.snippets)
+
+
+def test_search_results_are_cached(monkeypatch) -> None:
+    """Repeated queries are served from the on-disk cache."""
+    provider = CountingProvider(["Title: Egg\nSnippet: 78 kcal"])
+    monkeypatch.setattr(search, "_provider", provider)
+
+    assert search.search_nutrition("Boiled  Egg") == ["Title: Egg\nSnippet: 78 kcal"]
+    assert search.search_nutrition("boiled egg") == ["Title: Egg\nSnippet: 78 kcal"]
+    assert provider.calls == 1
+
+
+def test_stale_results_refresh_in_background(monkeypatch) -> None:
+    """Expired entries are returned immediately and refreshed asynchronously."""
+    with db.transaction() as conn:
+        conn.execute(
+            "INSERT INTO search_cache (query, snippets, fetched_at) VALUES (?, ?, ?)",
+            ("kale nutrition facts|3", '["old"]', time.time() - 8 * 24 * 3600),
+        )
+    provider = CountingProvider(["new"])
+    monkeypatch.setattr(search, "_provider", provider)
+
+    assert search.search_nutrition("kale") == ["old"]
+    assert provider.called.wait(2)
+    deadline = time.time() + 2
+    while search._refreshing and time.time() < deadline:
+        time.sleep(0.01)
+    assert db.get_cached_search("kale nutrition facts|3")[0] == ["new"]
+
+
+def test_offline_provider_matches_known_foods(monkeypatch) -> None:
+    """The offline provider answers from its mapping without network access."""
+    offline = search.OfflineProvider({"Boiled Egg": ["Title: Egg\nSnippet: 78 kcal"]})
+    monkeypatch.setattr(search, "_provider", offline)
+    assert search.search_nutrition("2 boiled eggs") == ["Title: Egg\nSnippet: 78 kcal"]
+    assert search.search_nutrition("dragon fruit") == []
+
+
+def test_provider_resolved_on_first_use(monkeypatch, tmp_path) -> None:
+    """A missing offline snippets file fails searches, not importing the app."""
+    monkeypatch.setattr(search.config, "SEARCH_OFFLINE_SNIPPETS", str(tmp_path / "missing.json"))
+    monkeypatch.setattr(search, "_provider", None)
+    importlib.reload(search)
+    assert search.search_nutrition("boiled egg") == []
+
+    (tmp_path / "missing.json").write_text('{"boiled egg": ["Title: Egg"]}')
+    assert search.search_nutrition("boiled egg") == ["Title: Egg"]
+    assert isinstance(search.get_provider(), search.OfflineProvider)
@@ -0,0 +1,106 @@
+"""Tests for coalescing of concurrent identical calls."""
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from backend.agent import Agent, _Extraction
+from backend.singleflight import SingleFlight
+
+
+class SlowExtractionConnector:
+    """Answers every prompt with the same extraction after a short delay, counting calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def chat(self, messages):
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.1)
+        return json.dumps({"name": "x", "amount": "1", "calories": 95,
+                           "protein": 0.5, "carbs": 25, "fat": 0.3, "sugar": 19})
+
+
+def test_concurrent_calls_share_one_execution() -> None:
+    """Callers arriving while a call is in flight get its result instead of running it again."""
+    flight = SingleFlight()
+    started = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, "key", slow)
+        started.wait()
+        followers = [pool.submit(flight.do, "key", slow) for _ in range(3)]
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    assert flight.stats() == {"calls": 1, "coalesced": 3, "in_flight": 0}
+    # Nothing is cached once the call has finished
+    assert flight.do("key", slow) == "result"
+    assert len(calls) == 2
+
+
+def test_errors_reach_every_waiter() -> None:
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.05)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "key", failing)
+        started.wait()
+        follower = pool.submit(flight.do, "key", failing)
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+
+
+def test_async_calls_share_one_execution() -> None:
+    flight = SingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*(flight.ado("key", slow) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.stats()["coalesced"] == 4
+
+
+def test_agent_extracts_identical_items_once() -> None:
+    """Concurrent extractions of the same item make one LLM call and each get their own dict."""
+    connector = SlowExtractionConnector()
+    with patch("backend.agent.get_connector", return_value=connector):
+        agent = Agent(provider="local")
+    requests = [_Extraction(item, "search results", "Search Results", "")
+                for item in ("1 apple", "1 Apple", "1 apple")]
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results = list(pool.map(agent._extract, requests))
+
+    assert connector.calls == 1
+    assert [r["name"] for r in results] == ["1 apple", "1 Apple", "1 apple"]
+    assert all(r["calories"] == 95 for r in results)
+    assert results[0] is not results[2]
@@ -0,0 +1,44 @@
+"""Tests for the incrementally maintained nutrition summaries."""
+
+from fastapi.testclient import TestClient
+
+from backend import db
+from backend.main import app
+
+client = TestClient(app)
+
+
+def _add(name: str, calories: int, protein: float, when: str) -> None:
+    client.post("/api/entries/", json={"name": name, "calories": calories, "protein": protein, "created_at": when})
+
+
+def test_totals_follow_inserts_updates_and_deletes() -> None:
+    """Per-day totals change with every write to entries."""
+    _add("eggs", 156, 12.0, "2024-05-06T08:00:00")
+    _add("rice", 205, 4.3, "2024-05-06T13:00:00")
+    _add("salmon", 177, 19.0, "2024-05-08T19:00:00")
+
+    day = client.get("/api/summary/day", params={"day": "2024-05-06"}).json()
+    assert (day["entries"], day["calories"], day["protein"]) == (2, 361, 16.3)
+
+    with db.transaction() as conn:
+        conn.execute("UPDATE entries SET calories = 200, created_at = '2024-05-07 08:00:00' WHERE name = 'eggs'")
+        conn.execute("DELETE FROM entries WHERE name = 'rice'")
+
+    week = client.get("/api/summary/week", params={"day": "2024-05-08"}).json()
+    assert week["start"] == "2024-05-06"
+    assert [d["day"] for d in week["days"]] == ["2024-05-07", "2024-05-08"]
+    assert week["calories"] == 377
+
+    month = client.get("/api/summary/month", params={"month": "2024-05"}).json()
+    assert month["end"] == "2024-05-31"
+    assert month["entries"] == 2
+
+
+def test_rebuild_matches_incremental_totals() -> None:
+    """A rebuild from entries reproduces the trigger-maintained table."""
+    _add("a", 100, 1.0, "2024-01-01T00:00:00")
+    _add("b", 50, 2.0, "2024-01-02T00:00:00")
+    before = db.daily_totals("2024-01-01", "2024-01-31")
+    assert client.post("/api/summary/rebuild").json() == {"days": 2}
+    assert db.daily_totals("2024-01-01", "2024-01-31") == before
@@ -0,0 +1,92 @@
+"""Tests for full-text search over entries and chat history."""
+
+import sqlite3
+
+from fastapi.testclient import TestClient
+
+from backend import chat_log, config, db
+from backend.main import app
+
+client = TestClient(app)
+
+
+def _search(**params):
+    return client.get("/api/entries/search", params=params)
+
+
+def test_search_ranks_and_highlights_matches() -> None:
+    client.post("/api/entries/bulk", json=[
+        {"name": "Grilled salmon", "calories": 400, "details": "with rice"},
+        {"name": "Rice bowl", "calories": 500, "details": "topped with smoked salmon"},
+        {"name": "Toast", "calories": 120},
+    ])
+    chat_log.writer.record("What goes well with salmon?", "Try lemon and dill.")
+    chat_log.writer.flush()
+
+    entries = _search(q="salmon").json()
+    # A match in the name outranks one in the details
+    assert [e["name"] for e in entries] == ["Grilled salmon", "Rice bowl"]
+    assert "<mark>salmon</mark>" in entries[0]["snippet"]
+
+    both = _search(q="salmon", scope="all").json()
+    assert sorted(r["type"] for r in both) == ["chat", "entry", "entry"]
+    # Every word must match, in any of its forms
+    assert [e["name"] for e in _search(q="salmons RICE").json()] == ["Grilled salmon", "Rice bowl"]
+    assert _search(q="salmon toast").json() == []
+
+
+def test_snippets_escape_stored_markup() -> None:
+    client.post("/api/entries/", json={"name": "Salmon <script>alert(1)</script> bowl", "calories": 400})
+    [entry] = _search(q="salmon").json()
+    assert entry["snippet"] == "<mark>Salmon</mark> &lt;script&gt;alert(1)&lt;/script&gt; bowl"
+    assert entry["name"] == "Salmon <script>alert(1)</script> bowl"
+
+
+def test_index_follows_updates_and_deletes() -> None:
+    client.post("/api/entries/", json={"name": "Tuna salad", "calories": 300})
+    with db.transaction() as conn:
+        conn.execute("UPDATE entries SET name = 'Chicken salad' WHERE name = 'Tuna salad'")
+    assert _search(q="tuna").json() == []
+    assert [e["name"] for e in _search(q="chicken").json()] == ["Chicken salad"]
+
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM entries")
+    assert _search(q="salad").json() == []
+
+
+def test_search_pages_and_tolerates_query_syntax(monkeypatch) -> None:
+    client.post("/api/entries/bulk", json=[{"name": f"apple {i}", "calories": i} for i in range(5)])
+
+    first = _search(q="apple", limit=3)
+    assert len(first.json()) == 3 and first.headers["X-Next-Offset"] == "3"
+    rest = _search(q="apple", limit=3, offset=3)
+    assert len(rest.json()) == 2 and "X-Next-Offset" not in rest.headers
+    assert {e["id"] for e in first.json()}.isdisjoint(e["id"] for e in rest.json())
+
+    # Only the newest matches are ranked once a word is very common
+    monkeypatch.setattr(config, "TEXT_SEARCH_MAX_CANDIDATES", 2)
+    assert sorted(e["name"] for e in _search(q="apple").json()) == ["apple 3", "apple 4"]
+
+    # FTS5 operators and stray quotes in user input are searched as plain words
+    for q in ['"apple', "apple AND (", "NEAR(apple", "*"]:
+        assert _search(q=q).status_code == 200
+
+
+def test_existing_rows_indexed_on_upgrade_and_rebuild(tmp_path) -> None:
+    path = tmp_path / "old.db"
+    db.init_db(path)
+    with sqlite3.connect(path) as conn:
+        # A database from before the search index, with rows already in it
+        for table in ("entries", "chat_logs"):
+            conn.execute(f"DROP TABLE {table}_fts")
+            for event in ("insert", "delete", "update"):
+                conn.execute(f"DROP TRIGGER {table}_fts_{event}")
+        conn.execute("INSERT INTO entries (name, calories) VALUES ('Porridge', 200)")
+        conn.execute("PRAGMA user_version = 3")
+    db.init_db(path)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT rowid FROM entries_fts WHERE entries_fts MATCH 'porridge'").fetchall() == [(1,)]
+
+    client.post("/api/entries/", json={"name": "Porridge", "calories": 200})
+    assert client.post("/api/entries/search/rebuild").json() == {"entries": 1, "chat_logs": 0}
+    assert len(_search(q="porridge").json()) == 1